@@ -16,18 +16,27 @@ Two "superpowers" in one pass:
        - depth       : conversations-per-user distribution + outlier flag
 
 STRICTLY GET-only — no users/conversations/tags are created or modified. Paced
-under the 120 req/60s limit, with retries on Delphi's intermittent 500s. Sets a
-custom User-Agent because Cloudflare 403s the default python-urllib UA.
+per key by an adaptive limiter that backs off on 429/5xx and honours
+Retry-After (see rate_limit.py), with retries on Delphi's intermittent 500s,
+over pooled keep-alive connections (see http_client.py). Sets a custom User-Agent
+because Cloudflare 403s the default python-urllib UA.
 
 Usage:
     python3 scripts/audience_audit.py --api-key "$DELPHI_API_KEY"
     python3 scripts/audience_audit.py --account karamo          # from keys.json
     python3 scripts/audience_audit.py --api-key dsk-... --json   # machine-readable
     python3 scripts/audience_audit.py --api-key dsk-... --no-retention  # sizing only
+    python3 scripts/audience_audit.py --account karamo --resume  # continue an interrupted sweep
 """
 
-import argparse, datetime, json, os, statistics, sys, time
-import urllib.error, urllib.parse, urllib.request
+import argparse, datetime, json, os, statistics, sys
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import checkpoint
+import history_cache
+import rate_limit as rl
+import timestamps
 
 BASE = "https://api.delphi.ai"
 UA = "delphi-audience-audit/1.0"  # default python-urllib UA is 403'd by Cloudflare
@@ -67,64 +76,88 @@ def resolve_key(args) -> str:
 
 
 def get(path: str, key: str, retries: int = 5):
-    req = urllib.request.Request(f"{BASE}{path}", headers={"x-api-key": key, "User-Agent": UA})
-    for attempt in range(retries):
-        try:
-            with urllib.request.urlopen(req, timeout=45) as r:
-                return json.loads(r.read())
-        except urllib.error.HTTPError as e:
-            if e.code in (429, 500, 502, 503, 504) and attempt < retries - 1:
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            raise
-        except Exception:
-            if attempt < retries - 1:
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            raise
-
-
-def _day(ts):
-    try:
-        return datetime.datetime.fromisoformat(ts.replace("Z", "+00:00")).date()
-    except Exception:
-        return None
-
-
-def _ts(ts):
-    try:
-        return datetime.datetime.fromisoformat(ts.replace("Z", "+00:00"))
-    except Exception:
-        return None
-
-
-def sweep_users(key: str) -> list:
+    """GET with per-key adaptive pacing (rate_limit.py) and retries on 429/5xx."""
+    headers = {"x-api-key": key, "User-Agent": UA}
+    return rl.paced_request("GET", f"{BASE}{path}", key, headers=headers, retries=retries).json()
+
+
+def users_page(key: str, cursor: str = None) -> dict:
+    """One page of GET /v3/users at the API's max page size (200)."""
+    url = "/v3/users?limit=200" + (f"&cursor={urllib.parse.quote(cursor, safe='')}" if cursor else "")
+    return get(url, key)
+
+
+def sweep_users(key: str, ckpt=None) -> list:
+    """Every user on file, paging /v3/users. With a checkpoint.Checkpoint
+    (`ckpt`) each page is journaled as it arrives, and a resumed sweep
+    continues from the last completed cursor instead of page one."""
     users, cursor = [], None
+    if ckpt is not None and ckpt.records:
+        for page in ckpt.records:
+            users.extend(page.get("users", []))
+        last = ckpt.records[-1]
+        cursor = last.get("cursor")
+        if not last.get("has_more") or not cursor:
+            ckpt.finish()
+            return users
     while True:
-        url = "/v3/users?limit=200" + (f"&cursor={urllib.parse.quote(cursor, safe='')}" if cursor else "")
-        d = get(url, key)
-        users.extend(d.get("users", []))
+        d = users_page(key, cursor)
+        page = d.get("users", [])
+        users.extend(page)
         cursor = d.get("next_cursor")
+        if ckpt is not None:
+            ckpt.append({"cursor": cursor, "has_more": d.get("has_more"), "users": page})
         print(f"  swept {len(users)} (has_more={d.get('has_more')})", file=sys.stderr)
         if not d.get("has_more") or not cursor:
+            if ckpt is not None:
+                ckpt.finish()
             return users
-        time.sleep(0.4)
 
 
-def pull_conversations(real_users: list, key: str):
+def clone_slug(key: str) -> str:
+    """Stable per-clone identifier (slug, else name) -- keys local caches."""
+    c = get("/v3/clone", key).get("clone", {})
+    return c.get("slug") or c.get("name") or "unknown"
+
+
+def list_conversations(email: str, key: str, cache=None, active_since=None) -> list:
+    """One user's conversations as [{'created_at','medium'}], via `cache` when fresh."""
+    if cache is not None:
+        hit = cache.get(email, active_since)
+        if hit is not None:
+            return hit
+    d = get("/v3/conversation/list?email=" + urllib.parse.quote(email, safe=""), key)
+    convos = [{"created_at": c.get("created_at"), "medium": c.get("medium")}
+              for c in (d.get("conversations") or d.get("data") or [])]
+    if cache is not None:
+        cache.put(email, convos)
+    return convos
+
+
+def pull_conversations(real_users: list, key: str, cache=None, ckpt=None):
+    """Per-user conversation lists. Users already journaled in `ckpt`
+    (a resumed run) are taken from it; failed users are retried on resume."""
     records, errors = [], []
+    done = {r["email"]: r for r in ckpt.records} if ckpt is not None else {}
     for i, u in enumerate(real_users):
+        if u["email"] in done:
+            records.append(done[u["email"]])
+            continue
         try:
-            d = get("/v3/conversation/list?email=" + urllib.parse.quote(u["email"], safe=""), key)
-            convos = d.get("conversations") or d.get("data") or []
-            records.append({"email": u["email"], "date_joined": u.get("date_joined"),
-                            "convos": [{"created_at": c.get("created_at"), "medium": c.get("medium")}
-                                       for c in convos]})
+            convos = list_conversations(u["email"], key, cache)
+            rec = {"email": u["email"], "date_joined": u.get("date_joined"), "convos": convos}
+            records.append(rec)
+            if ckpt is not None:
+                ckpt.append(rec)
         except Exception as e:
             errors.append({"email": u["email"], "error": str(e)})
         if (i + 1) % 75 == 0:
             print(f"  conversations {i+1}/{len(real_users)} (errors {len(errors)})", file=sys.stderr)
-        time.sleep(0.18)
+    if ckpt is not None:
+        if errors:
+            ckpt.close()   # keep the journal so --resume retries only the failures
+        else:
+            ckpt.finish()
     return records, errors
 
 
@@ -134,14 +167,17 @@ def compute_retention(records: list) -> dict:
     per_user = [len(r["convos"]) for r in conversers]
     total = sum(per_user)
     returners = sum(1 for n in per_user if n >= 2)
-    multiday = sum(1 for r in conversers
-                   if len({_day(c["created_at"]) for c in r["convos"] if _day(c["created_at"])}) >= 2)
     buckets = {"1": 0, "2-3": 0, "4-10": 0, "11+": 0}
     for n in per_user:
         buckets["1" if n == 1 else "2-3" if n <= 3 else "4-10" if n <= 10 else "11+"] += 1
+    multiday = 0
     rec = {"<=7d": 0, "8-30d": 0, "31-90d": 0, ">90d": 0}
     for r in conversers:
-        times = [_ts(c["created_at"]) for c in r["convos"] if _ts(c["created_at"])]
+        # Each created_at is decoded once, for both the day count and recency.
+        parsed = [(c["created_at"], timestamps.parse(c["created_at"])) for c in r["convos"]]
+        times = [t for _, t in parsed if t]
+        if len({timestamps.day(s, t) for s, t in parsed if t}) >= 2:
+            multiday += 1
         if times:
             dd = (NOW - max(times)).total_seconds() / 86400
             rec["<=7d" if dd <= 7 else "8-30d" if dd <= 30 else "31-90d" if dd <= 90 else ">90d"] += 1
@@ -173,15 +209,23 @@ def main() -> int:
     ap.add_argument("--json", action="store_true", help="Emit JSON instead of a text report.")
     ap.add_argument("--no-retention", action="store_true", help="Audience sizing only (skip conversation pull).")
     ap.add_argument("--cache", help="Write raw per-user conversation data to this path (PII — keep local).")
+    ap.add_argument("--history-ttl-hours", type=float, default=history_cache.DEFAULT_TTL_HOURS,
+                    help="Reuse per-user conversation lists pulled within this many hours "
+                         "(out/cache, see history_cache.py).")
+    ap.add_argument("--no-history-cache", action="store_true",
+                    help="Always re-pull every user's conversation list.")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continue an interrupted sweep from its checkpoint (out/checkpoints).")
     args = ap.parse_args()
     key = resolve_key(args)
 
     clone = get("/v3/clone", key).get("clone", {})
     name = clone.get("name", "<unknown>")
+    slug = clone.get("slug") or name
     print(f"clone: {name} ({clone.get('slug')})", file=sys.stderr)
 
     print("sweeping users...", file=sys.stderr)
-    users = sweep_users(key)
+    users = sweep_users(key, checkpoint.Checkpoint(slug, "users", args.resume))
     real = [u for u in users if is_real(u.get("email", ""))]
     report = {
         "clone": name, "generated_at": NOW.isoformat(),
@@ -191,7 +235,13 @@ def main() -> int:
 
     if not args.no_retention:
         print(f"pulling conversations for {len(real)} real users...", file=sys.stderr)
-        records, errors = pull_conversations(real, key)
+        hcache = None if args.no_history_cache else history_cache.HistoryCache(
+            slug, args.history_ttl_hours)
+        records, errors = pull_conversations(
+            real, key, hcache, checkpoint.Checkpoint(slug, "audit-conversations", args.resume))
+        if hcache is not None:
+            hcache.close()
+            print(f"history cache: {hcache.stats()}", file=sys.stderr)
         report["retention"] = compute_retention(records)
         report["retention"]["unresolved_errors"] = len(errors)
         if args.cache:
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Delphi chat endpoints, so chat_bench.py runs offline (CI).
+
+Implements just the chat surface the benchmark drives, with the same shapes
+and quirks as the real API:
+
+    POST /v3/conversation                          -> {"conversation_id"}
+    POST /v3/stream                                -> CloneResponse SSE, ends with the [DONE] frame
+    POST /v4/conversations                         -> {"data": {"conversationId", "existed"}}
+    POST /v4/conversations/{id}/messages           -> {"data": {"text", "citations", "parts"}}
+    POST /v4/conversations/{id}/messages/stream    -> CloneResponse SSE, ends with the [DONE] frame
+
+  * SSE replies are chunked, on keep-alive connections, one frame per token,
+    after --ttft-ms and then every --token-ms (with jitter). The last frame is
+    the documented JSON one, {"current_token": "[DONE]", "text", "id"}, with
+    the whole reply in `text` -- not a bare `data: [DONE]` line.
+  * V4 conversations are EVENTUALLY CONSISTENT like the real thing: sends
+    within --not-ready-ms of creation get 404 "Thread not found". `externalId`
+    makes creation idempotent (`existed: true` on reuse).
+  * --error-rate makes that fraction of sends fail with a 502 dependency_failure.
+
+Any x-api-key is accepted. Nothing leaves the machine.
+
+Usage:
+    python3 scripts/bench_stub.py --port 8790
+    python3 scripts/chat_bench.py --base http://127.0.0.1:8790 --mode v3-stream ...
+    python3 scripts/chat_bench.py --stub ...        # starts one in-process instead
+"""
+import argparse, http.server, json, random, re, threading, time, uuid
+
+REPLY = "Thanks for asking. This is a canned reply from the local benchmark stand-in server."
+
+
+class Settings:
+    def __init__(self, ttft_ms=300.0, token_ms=30.0, tokens=20, error_rate=0.0, not_ready_ms=0.0):
+        self.ttft_ms, self.token_ms, self.tokens = ttft_ms, token_ms, tokens
+        self.error_rate, self.not_ready_ms = error_rate, not_ready_ms
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings = Settings()
+    created = {}            # v4 conversationId -> monotonic creation time
+    external = {}           # v4 externalId -> conversationId (idempotent create)
+    lock = threading.Lock()
+
+    def log_message(self, *a):
+        pass
+
+    def _json(self, code: int, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _tokens(self):
+        words = REPLY.split(" ")
+        n = max(1, self.settings.tokens)
+        return [(" " if i else "") + words[i % len(words)] for i in range(n)]
+
+    def _sleep_ms(self, ms: float):
+        if ms > 0:
+            time.sleep(ms * random.uniform(0.8, 1.2) / 1000)
+
+    def _sse(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._sleep_ms(self.settings.ttft_ms)
+        tokens = self._tokens()
+        for i, tok in enumerate(tokens):
+            if i:
+                self._sleep_ms(self.settings.token_ms)
+            self._chunk(f"data: {json.dumps({'current_token': tok})}\n\n".encode())
+        final = {"current_token": "[DONE]", "text": "".join(tokens), "id": str(uuid.uuid4())}
+        self._chunk(f"data: {json.dumps(final)}\n\n".encode())
+        self._chunk(b"")
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _failed(self) -> bool:
+        if random.random() < self.settings.error_rate:
+            self._json(502, {"type": "error", "code": "dependency_failure",
+                             "message": "stand-in injected failure"})
+            return True
+        return False
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(n)) if n else None
+        except ValueError:
+            body = None
+        path = self.path.split("?")[0]
+        if path == "/v3/conversation":
+            return self._json(200, {"conversation_id": str(uuid.uuid4())})
+        if path == "/v3/stream":
+            return self._failed() or self._sse()
+        if path == "/v4/conversations":
+            ext = (body or {}).get("externalId")
+            with self.lock:
+                cid = self.external.get(ext) if ext else None
+                existed = cid is not None
+                if not existed:
+                    cid = str(uuid.uuid4())
+                    self.created[cid] = time.monotonic()
+                    if ext:
+                        self.external[ext] = cid
+            return self._json(200, {"data": {"conversationId": cid, "existed": existed}})
+        m = re.fullmatch(r"/v4/conversations/([^/]+)/messages(/stream)?", path)
+        if m:
+            with self.lock:
+                born = self.created.get(m.group(1))
+            if born is None or (time.monotonic() - born) * 1000 < self.settings.not_ready_ms:
+                return self._json(404, {"type": "error", "code": "resource_not_found",
+                                        "message": "Thread not found"})
+            if self._failed():
+                return
+            if m.group(2):
+                return self._sse()
+            self._sleep_ms(self.settings.ttft_ms + self.settings.token_ms * (self.settings.tokens - 1))
+            text = "".join(self._tokens())
+            return self._json(200, {"data": {"text": text, "citations": [],
+                                             "parts": [{"type": "text", "text": text}]}})
+        self._json(404, {"detail": "not implemented by the stand-in"})
+
+
+def start(port: int = 0, settings: Settings = None, host: str = "127.0.0.1"):
+    """Serve in a background thread; returns (server, base_url)."""
+    handler = type("StubHandler", (Handler,), {"settings": settings or Settings(),
+                                                  "created": {}, "external": {}})
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_settings_args(ap):
+    ap.add_argument("--ttft-ms", type=float, default=300.0, help="Stand-in: delay before the first token.")
+    ap.add_argument("--token-ms", type=float, default=30.0, help="Stand-in: delay between tokens.")
+    ap.add_argument("--tokens", type=int, default=20, help="Stand-in: tokens per reply.")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Stand-in: fraction of sends that 502.")
+    ap.add_argument("--not-ready-ms", type=float, default=0.0,
+                    help="Stand-in: V4 sends 404 until a conversation is this old (eventual consistency).")
+
+
+def settings_from(args) -> Settings:
+    return Settings(args.ttft_ms, args.token_ms, args.tokens, args.error_rate, args.not_ready_ms)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local stand-in for the Delphi chat endpoints (offline benchmarks).")
+    ap.add_argument("--port", type=int, default=8790)
+    add_settings_args(ap)
+    args = ap.parse_args()
+    server, base = start(args.port, settings_from(args))
+    print(f"Delphi chat stand-in on {base}  (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
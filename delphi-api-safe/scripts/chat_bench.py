@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Chat load benchmark: N concurrent conversations at a target rate (INVOKES THE MODEL).
+
+WHY
+---
+test_delphi_v3 / v4 send one message and say PASS. Before a launch we need to
+know what chat does at production concurrency: how latency spreads out, what
+fails and how (429? 502? stalls?), and what throughput a key actually sustains.
+
+Three flows, the same calls the testers make:
+
+    v3-stream   POST /v3/conversation, then POST /v3/stream per message
+    v4-sync     POST /v4/conversations, then POST /v4/conversations/{id}/messages
+    v4-stream   POST /v4/conversations, then POST /v4/conversations/{id}/messages/stream
+
+--concurrency workers each own one conversation and send into it back to back;
+--rate caps the total sends/s across them (a shared token bucket -- rate_limit.py)
+so the offered load does not depend on how fast the API answers. Runs for
+--duration seconds after all conversations exist. Sends into a V4
+conversation that is not ready yet (404 "Thread not found" -- creation is
+eventually consistent) are retried and counted separately, not as errors.
+
+Reports p50/p95/p99/max latency of successful sends (plus time-to-first-token
+for the stream modes), the error mix by kind, and achieved vs target
+throughput, and writes it all to a JSON result file.
+
+OFFLINE / CI
+------------
+--stub starts the local stand-in (bench_stub.py) in-process and points the run
+at it; nothing leaves the machine. --base points at any other stand-in.
+Hitting the real API needs --allow-live, because every send is a real model call.
+
+Usage:
+    python3 scripts/chat_bench.py --stub --mode v3-stream --concurrency 20 --rate 10 --duration 30
+    python3 scripts/chat_bench.py --base http://127.0.0.1:8790 --mode v4-sync
+    python3 scripts/chat_bench.py --account karamo --allow-live --mode v4-stream \\
+        --concurrency 5 --rate 1 --duration 60
+"""
+import argparse, collections, datetime, json, os, sys, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import audience_audit as aa
+import bench_stub
+import http_client
+import rate_limit as rl
+import sse_stream
+
+LIVE_BASE = "https://api.delphi.ai"
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODES = ("v3-stream", "v4-sync", "v4-stream")
+NOT_READY_RETRIES = 10
+
+
+class Conversation:
+    """One benchmark conversation: create() once, then send() repeatedly."""
+
+    def __init__(self, mode: str, base: str, key: str, message: str, timeout: float):
+        self.mode, self.base, self.key, self.message, self.timeout = mode, base, key, message, timeout
+        self.headers = {"x-api-key": key, "Content-Type": "application/json"}
+        self.cid = None
+
+    def create(self):
+        if self.mode == "v3-stream":
+            r = http_client.request("POST", f"{self.base}/v3/conversation", headers=self.headers,
+                                    payload={}, timeout=self.timeout)
+            r.raise_for_status()
+            self.cid = r.json().get("conversation_id")
+        else:
+            r = http_client.request("POST", f"{self.base}/v4/conversations", headers=self.headers,
+                                    payload={}, timeout=self.timeout)
+            r.raise_for_status()
+            self.cid = (r.json().get("data") or {}).get("conversationId")
+        if not self.cid:
+            raise RuntimeError(f"no conversation id from {self.mode} create")
+
+    def send(self) -> dict:
+        """One message. {"status", "latency_s", "ttft_s", "kind"}; kind is None on success."""
+        t0 = time.monotonic()
+        if self.mode == "v4-sync":
+            try:
+                r = http_client.request("POST", f"{self.base}/v4/conversations/{self.cid}/messages",
+                                        headers=self.headers, payload={"text": self.message},
+                                        timeout=self.timeout)
+            except Exception as e:
+                return {"status": "000", "latency_s": time.monotonic() - t0, "ttft_s": None,
+                        "kind": _transport_kind(e)}
+            ok = r.status == 200 and bool(((_safe_json(r) or {}).get("data") or {}).get("text"))
+            kind = None if ok else (f"http_{r.status}" if r.status != 200 else "empty_reply")
+            return {"status": str(r.status), "latency_s": time.monotonic() - t0, "ttft_s": None, "kind": kind}
+
+        if self.mode == "v3-stream":
+            url, payload = f"{self.base}/v3/stream", {"message": self.message, "conversation_id": self.cid}
+        else:
+            url, payload = f"{self.base}/v4/conversations/{self.cid}/messages/stream", {"text": self.message}
+        m = sse_stream.stream_chat(url, self.key, payload, timeout=self.timeout)
+        if m["error"]:
+            kind = _transport_kind(m["error"])
+        elif m["status"] != "200":
+            kind = f"http_{m['status']}"
+        elif not m["done"]:
+            kind = "no_done"
+        elif not m["tokens"]:
+            kind = "empty_reply"
+        elif m["text_matches_final"] is False:
+            kind = "text_mismatch"   # tokens lost or mis-parsed against the final frame
+        else:
+            kind = None
+        return {"status": m["status"], "latency_s": m["total_s"], "ttft_s": m["ttft_s"], "kind": kind}
+
+
+def _safe_json(r):
+    try:
+        return r.json()
+    except ValueError:
+        return None
+
+
+def _transport_kind(e) -> str:
+    return "timeout" if "timed out" in str(e).lower() else "transport"
+
+
+def _dist(values: list) -> dict:
+    pct = sse_stream.percentile
+    return {"count": len(values),
+            **{k: (round(pct(values, p), 3) if values else None)
+               for k, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))}}
+
+
+def run(mode: str, base: str, key: str, *, concurrency: int, rate: float, duration: float,
+        message: str, timeout: float = 120, verbose: bool = True) -> dict:
+    """Drive the benchmark and return the result dict (see module docstring)."""
+    convs = [Conversation(mode, base, key, message, timeout) for _ in range(concurrency)]
+    t_setup = time.monotonic()
+    _, setup = rl.fan_out(convs, lambda c: c.create(), workers=concurrency, verbose=False)
+    convs = [c for c in convs if c.cid]
+    if verbose:
+        print(f"{len(convs)}/{concurrency} conversations created in "
+              f"{time.monotonic() - t_setup:.1f}s ({setup['errors']} failed)", file=sys.stderr)
+    if not convs:
+        sys.exit("No conversations could be created -- check the key / base URL.")
+
+    bucket = rl.TokenBucket(rate, max(1.0, min(rate, concurrency))) if rate > 0 else None
+    samples, lock = [], threading.Lock()
+    not_ready = collections.Counter()
+    t0 = time.monotonic()
+    deadline = t0 + duration
+
+    def worker(conv):
+        attempts = 0
+        while time.monotonic() < deadline:
+            if bucket is not None:
+                bucket.acquire()
+                if time.monotonic() >= deadline:
+                    return
+            res = conv.send()
+            if res["kind"] == "http_404" and mode != "v3-stream" and attempts < NOT_READY_RETRIES:
+                attempts += 1   # thread not created yet -- retry, do not count as a send
+                with lock:
+                    not_ready["retries"] += 1
+                time.sleep(1.0)
+                continue
+            attempts = NOT_READY_RETRIES  # ready once; a later 404 is a real error
+            res["t"] = time.monotonic() - t0
+            with lock:
+                samples.append(res)
+                n = len(samples)
+            if verbose and n % 50 == 0:
+                print(f"  {n} sends, {n / (time.monotonic() - t0):.1f}/s", file=sys.stderr)
+
+    threads = [threading.Thread(target=worker, args=(c,), daemon=True) for c in convs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+
+    ok = [s for s in samples if s["kind"] is None]
+    errors = collections.Counter(s["kind"] for s in samples if s["kind"])
+    result = {
+        "mode": mode,
+        "base": base,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "config": {"concurrency": concurrency, "target_rps": rate or None,
+                   "duration_s": duration, "message_chars": len(message)},
+        "conversations": len(convs),
+        "conversation_create_errors": setup["errors"],
+        "sends": len(samples),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else None,
+        "errors": dict(errors.most_common()),
+        "not_ready_retries": not_ready["retries"],
+        "elapsed_s": round(elapsed, 2),
+        "achieved_rps": round(len(samples) / elapsed, 2) if elapsed > 0 else None,
+        "achieved_ok_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else None,
+        "latency_s": _dist([s["latency_s"] for s in ok if s["latency_s"] is not None]),
+    }
+    if mode != "v4-sync":
+        result["ttft_s"] = _dist([s["ttft_s"] for s in ok if s["ttft_s"] is not None])
+    return result
+
+
+def print_report(r: dict):
+    print("=" * 64)
+    print(f"CHAT BENCHMARK  [{r['mode']}]  {r['base']}")
+    print("=" * 64)
+    c = r["config"]
+    print(f"  {r['conversations']} conversations, target {c['target_rps'] or 'unbounded'} req/s, "
+          f"{c['duration_s']}s")
+    print(f"  Sends ........ {r['sends']}  ({r['ok']} ok)   "
+          f"achieved {r['achieved_rps']} req/s ({r['achieved_ok_rps']} ok/s)")
+    for label, key in (("Latency", "latency_s"), ("TTFT", "ttft_s")):
+        d = r.get(key)
+        if d and d["count"]:
+            print(f"  {label:<12} p50 {d['p50']}s  p95 {d['p95']}s  p99 {d['p99']}s  max {d['max']}s")
+    if r["errors"]:
+        print("  Errors ...... " + "  ".join(f"{k}:{v}" for k, v in r["errors"].items())
+              + f"   ({100 * r['error_rate']:.1f}%)")
+    if r["not_ready_retries"]:
+        print(f"  V4 not-ready 404s retried: {r['not_ready_retries']}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Concurrent chat load benchmark (invokes the model).")
+    ap.add_argument("--mode", choices=MODES, default="v3-stream")
+    ap.add_argument("--concurrency", type=int, default=10, help="Concurrent conversations.")
+    ap.add_argument("--rate", type=float, default=5.0, help="Target sends/s across all conversations (0 = unbounded).")
+    ap.add_argument("--duration", type=float, default=30.0, help="Seconds of load after setup.")
+    ap.add_argument("--message", default="Reply in one short sentence.")
+    ap.add_argument("--timeout", type=float, default=120.0, help="Per-read socket timeout, seconds.")
+    ap.add_argument("--api-key")
+    ap.add_argument("--account", help="Account name in keys.json.")
+    ap.add_argument("--base", help="Base URL of a stand-in server (default: the live API).")
+    ap.add_argument("--stub", action="store_true", help="Start the local stand-in (bench_stub.py) and use it.")
+    ap.add_argument("--allow-live", action="store_true",
+                    help="Required to benchmark api.delphi.ai -- every send is a real model call.")
+    ap.add_argument("--out", help="Result file (default out/bench/<mode>-<timestamp>.json).")
+    ap.add_argument("--json", action="store_true", help="Print the result JSON instead of a summary.")
+    bench_stub.add_settings_args(ap)
+    args = ap.parse_args()
+
+    if args.stub:
+        _, base = bench_stub.start(0, bench_stub.settings_from(args))
+        key = args.api_key or "stub-key"
+    elif args.base:
+        base = args.base.rstrip("/")
+        key = args.api_key or "stub-key"   # stand-ins accept any key
+    else:
+        if not args.allow_live:
+            sys.exit("Refusing to load the live API without --allow-live "
+                     "(use --stub or --base for an offline run).")
+        base, key = LIVE_BASE, aa.resolve_key(args)
+
+    http_client.configure(pool_size=max(args.concurrency, http_client.DEFAULT_POOL_SIZE))
+    print(f"benchmark {args.mode} against {base}: {args.concurrency} conversations, "
+          f"{args.rate or 'unbounded'} req/s, {args.duration}s", file=sys.stderr)
+    result = run(args.mode, base, key, concurrency=args.concurrency, rate=args.rate,
+                 duration=args.duration, message=args.message, timeout=args.timeout)
+    if args.stub:
+        result["stub"] = vars(bench_stub.settings_from(args))
+
+    out = args.out or os.path.join(ROOT, "out", "bench",
+                                   f"{args.mode}-{datetime.datetime.now():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    json.dump(result, open(out, "w"), indent=2)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+        print(f"  Result file: {out}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
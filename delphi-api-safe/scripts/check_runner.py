@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Dependency-aware concurrent runner for the V3/V4 tester checks.
+
+WHY
+---
+test_delphi_v3 / test_delphi_v4 ran every check one after another, although
+almost all of them are independent GETs or one-shot POSTs. A full-mode smoke
+spent well over a minute mostly waiting on the slow ones (stream, voice, agent,
+ask) while the fast ones queued behind them.
+
+Each check is registered with the checks it must wait for:
+
+    runner = CheckRunner(workers=8)
+    runner.add("chat", lambda r: test_chat(key, msg))
+    runner.add("conversation_history", lambda r: test_conversation_history(key, cid(r)),
+               after=("chat",))
+    results, timings = runner.run()
+
+A check starts as soon as everything in its `after` has finished, so
+independent checks overlap and the ones sharing a conversation still run in
+the order given. fn(results) gets the results so far and may return None to
+mean "not applicable" (e.g. no conversation id) -- it is then left out of the
+results, exactly as the old `if cid:` blocks did.
+
+A check that raises is recorded as {name: "FAIL", "note": ...} rather than
+aborting the run. workers=1 reproduces the old strictly-serial order.
+"""
+import concurrent.futures, sys, time
+
+
+class CheckRunner:
+    def __init__(self, workers: int = 8):
+        self.workers = max(1, workers)
+        self._checks = {}   # name -> (fn, after); insertion order is report order
+
+    def add(self, name: str, fn, after: tuple = ()):
+        """Register fn(results) -> result dict (or None), run after `after`."""
+        unknown = [d for d in after if d not in self._checks]
+        if unknown:
+            raise ValueError(f"check {name!r} depends on unregistered {unknown}")
+        self._checks[name] = (fn, tuple(after))
+
+    def _timed(self, name, fn, results):
+        t0 = time.monotonic()
+        try:
+            res = fn(results)
+        except Exception as e:
+            res = {name: "FAIL", "note": f"check raised {type(e).__name__}: {e}"}
+        return res, round(time.monotonic() - t0, 2)
+
+    def run(self):
+        """({name: result} in registration order, {name: seconds})."""
+        results, timings, finished = {}, {}, set()
+        pending = dict(self._checks)
+        t0 = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as ex:
+            running = {}
+            while pending or running:
+                for name, (fn, after) in list(pending.items()):
+                    if all(d in finished for d in after):
+                        # snapshot: a check sees only results that finished before it started
+                        running[ex.submit(self._timed, name, fn, dict(results))] = name
+                        del pending[name]
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    res, timings[name] = fut.result()
+                    finished.add(name)
+                    if res is not None:
+                        results[name] = res
+        self.wall_s = round(time.monotonic() - t0, 2)
+        ordered = {n: results[n] for n in self._checks if n in results}
+        return ordered, {n: timings[n] for n in self._checks if n in ordered}
+
+    def timing_report(self, timings: dict) -> dict:
+        return {"wall_s": self.wall_s, "sum_s": round(sum(timings.values()), 2),
+                "workers": self.workers, "checks": timings}
+
+    def print_timings(self, timings: dict, verdict=None, file=sys.stderr):
+        """Per-check wall-time table. verdict(name) -> short status string, optional."""
+        width = max([len(n) for n in timings] + [5])
+        print(f"{'check'.ljust(width)}  {'wall':>7}  status", file=file)
+        for name, secs in timings.items():
+            print(f"{name.ljust(width)}  {secs:>6.2f}s  {verdict(name) if verdict else ''}", file=file)
+        print(f"{'total'.ljust(width)}  {self.wall_s:>6.2f}s  "
+              f"(sum of checks {sum(timings.values()):.2f}s, {self.workers} workers)", file=file)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Append-only checkpoints so a long sweep can resume after it dies (PII -- keep local).
+
+WHY
+---
+A full audience sweep or per-user history pull against a large clone runs for
+a long time, and a network blip or a laptop going to sleep at user 14,000 of
+20,000 used to throw all of it away. Each unit of work is now journaled the
+moment it completes:
+
+    out/checkpoints/<clone>/<sweep>.jsonl   one JSON record per completed unit
+
+    users               {"cursor": "<next_cursor>", "has_more": true, "users": [...]}
+    audit-conversations {"email": "...", "date_joined": "...", "convos": [...]}
+    d30-users           as users, for d30_retention's full user-index sweep
+    d30-histories       {"e": "<email>", "t": ["<iso>", ...]}
+    d30-v4-histories    {"e": "<email>", "t": ["<iso>", ...]}   (--v4)
+    trend-histories     as d30-histories, for retention_trend
+    trend-v4-histories  as d30-v4-histories, for retention_trend --v4
+
+Every script journals under its own sweep names: opening a journal without
+--resume discards it, so a shared name would let one script wipe another's
+progress.
+
+Pass --resume to pick up from the last completed cursor / email. Without it a
+stale journal is discarded and the sweep starts clean. A sweep that finishes
+deletes its journal, so --resume after a clean run simply starts fresh.
+
+A torn last line (killed mid-write) is ignored; that unit is redone.
+"""
+import json, os, sys, threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import history_cache
+
+CHECKPOINT_ROOT = os.path.join(history_cache.ROOT, "out", "checkpoints")
+
+
+class Checkpoint:
+    """One sweep's journal. `records` holds what a resumed run can skip."""
+
+    def __init__(self, clone: str, sweep: str, resume: bool, root: str = CHECKPOINT_ROOT):
+        self.path = os.path.join(history_cache.clone_dir(clone, root), f"{sweep}.jsonl")
+        self.records = []
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            if resume:
+                for line in open(self.path):
+                    try:
+                        self.records.append(json.loads(line))
+                    except Exception:
+                        continue
+                print(f"resuming {sweep}: {len(self.records)} completed unit(s) from {self.path}",
+                      file=sys.stderr)
+            else:
+                os.remove(self.path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fh = open(self.path, "a")
+
+    def append(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+
+    def finish(self):
+        """The sweep completed -- nothing left to resume."""
+        with self._lock:
+            self._fh.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def close(self):
+        """Stop journaling but keep the file (the sweep did not complete)."""
+        with self._lock:
+            self._fh.close()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Warm pool of pre-created V4 conversations, handed out once they are ready.
+
+WHY
+---
+POST /v4/conversations is EVENTUALLY CONSISTENT: it returns a conversationId
+~2-6s before the thread exists, and a message sent in that window gets
+404 "Thread not found" (see references/v4-endpoints.md). In a live chat that is
+the user's FIRST message waiting several seconds for nothing.
+
+This keeps `size` conversations created ahead of time in a background thread
+and hands out ones that are already ready, so the first send goes straight
+through:
+
+    pool = ConversationPool(key, size=4)
+    pool.start()
+    cid, reply = pool.send_first("Hi!")       # acquire + first send, 404-safe
+    ...
+    pool.metrics()    # ready / warming / hit_rate / readiness_s / ready_estimate_s
+    pool.close()
+
+  * IDEMPOTENT CREATE   each slot gets its own `externalId`; a create that
+                        fails mid-flight is retried with the SAME id, so a
+                        retry can never leave a duplicate conversation behind
+                        (`existed: true` just means the first attempt landed).
+  * READINESS           probed with exponential backoff plus jitter, from
+                        PROBE_BASE_S up to PROBE_MAX_S between checks.
+  * HIT / MISS          acquire() returns a ready id instantly (hit). With
+                        none ready it takes the oldest warming one (miss),
+                        and with nothing at all it creates one on the spot.
+
+THE PROBE
+---------
+There is no side-effect-free readiness check: /insights answers 200
+immediately (it is not tied to the thread), and the only call that 404s is a
+real send, which invokes the model. So the default probe (AgeProbe) estimates
+readiness from AGE, and it learns the estimate from the sends themselves.
+send_first() reports back whether the first message on a conversation hit a
+404 and at what age it succeeded:
+
+    a handed-out "ready" conversation 404s  ->  estimate x1.5 (it was too low)
+    a first send on a warming one (a miss)  ->  sample: it was ready by that age
+    a clean first send on a "ready" one     ->  estimate x0.97, never below
+                                                the p95 of those samples
+    starting at DEFAULT_READY_S, the top of the measured window
+
+Pass `probe=` any callable(cid, age_s) -> bool to use a real check instead
+(e.g. a read endpoint that starts answering once the thread exists).
+
+Usage:
+    python3 scripts/conversation_pool.py --stub --size 4 --sends 10
+    python3 scripts/conversation_pool.py --account jim_carter --size 2 --sends 3   # invokes the model
+"""
+import argparse, collections, json, os, random, sys, threading, time, uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import http_client
+import rate_limit as rl
+import sse_stream
+
+BASE = "https://api.delphi.ai/v4"
+DEFAULT_READY_S = 6.0        # top of the measured ~2-6s window: safe before anything is learned
+MIN_READY_S = 0.5
+MAX_READY_S = 30.0
+PROBE_BASE_S = 0.25          # first readiness check this long after create, then doubling
+PROBE_MAX_S = 4.0
+CREATE_RETRIES = 4
+SEND_RETRIES = 8
+
+
+def backoff(attempt: int, base: float = PROBE_BASE_S, cap: float = PROBE_MAX_S) -> float:
+    """Exponential backoff with "equal jitter": half fixed, half random."""
+    d = min(cap, base * 2 ** attempt)
+    return d / 2 + random.uniform(0, d / 2)
+
+
+class AgeProbe:
+    """Readiness from conversation age, with the threshold learned from sends."""
+
+    def __init__(self, initial_s: float = DEFAULT_READY_S, window: int = 50):
+        self.estimate_s = initial_s
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __call__(self, cid: str, age_s: float) -> bool:
+        return age_s >= self.estimate_s
+
+    def observe(self, first_send_404: bool, handed_out_ready: bool, ready_age_s: float):
+        """Feed back one first send: did it 404, had we called it ready, and the
+        age at which it finally went through."""
+        with self._lock:
+            if first_send_404 or not handed_out_ready:
+                self._samples.append(ready_age_s)   # it was ready by this age
+            learned = sse_stream.percentile(list(self._samples), 95) or MIN_READY_S
+            if first_send_404 and handed_out_ready:
+                # we called it ready and it was not: back off hard
+                self.estimate_s = min(MAX_READY_S, max(learned, self.estimate_s * 1.5))
+            elif handed_out_ready:
+                # clean hit: creep down, never below what the samples have shown
+                self.estimate_s = max(MIN_READY_S, learned, self.estimate_s * 0.97)
+            else:
+                self.estimate_s = min(MAX_READY_S, max(MIN_READY_S, learned))
+
+
+class _Slot:
+    __slots__ = ("external_id", "cid", "created", "ready_at", "attempt", "next_check")
+
+    def __init__(self, external_id: str):
+        self.external_id, self.cid = external_id, None
+        self.created = self.ready_at = None
+        self.attempt, self.next_check = 0, 0.0
+
+
+class ConversationPool:
+    def __init__(self, api_key: str, size: int = 4, *, base: str = BASE, probe=None,
+                 overrides: dict = None, contact_id: str = None, external_prefix: str = "pool",
+                 timeout: float = 45):
+        self.api_key, self.size, self.base, self.timeout = api_key, size, base.rstrip("/"), timeout
+        self.probe = probe or AgeProbe()
+        self.body = {k: v for k, v in (("overrides", overrides), ("contactId", contact_id)) if v}
+        self.prefix = f"{external_prefix}-{uuid.uuid4().hex[:8]}"
+        self._ready = collections.deque()     # _Slot, oldest first
+        self._warming = []                    # _Slot
+        self._retry = collections.deque()     # _Slot whose create failed; keeps its externalId
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+        self._seq = 0
+        self._readiness = collections.deque(maxlen=200)
+        self.stats = collections.Counter()
+
+    # ---------------------------------------------------------------- API calls
+
+    def _headers(self):
+        return {"x-api-key": self.api_key, "Content-Type": "application/json"}
+
+    def _create(self, slot: _Slot):
+        """POST /v4/conversations with this slot's externalId, retried idempotently."""
+        payload = dict(self.body, externalId=slot.external_id)
+        r = rl.paced_request("POST", f"{self.base}/conversations", self.api_key, headers=self._headers(),
+                             payload=payload, timeout=self.timeout, retries=CREATE_RETRIES)
+        data = r.json().get("data") or {}
+        slot.cid, slot.created = data["conversationId"], time.monotonic()
+        with self._cond:
+            self.stats["create_replayed"] += bool(data.get("existed"))
+            self.stats["created"] += 1
+
+    # ---------------------------------------------------------------- filler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._fill, name="conversation-pool", daemon=True)
+        self._thread.start()
+        return self
+
+    def _new_slot(self) -> _Slot:
+        self._seq += 1
+        return _Slot(f"{self.prefix}-{self._seq}")
+
+    def _fill(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                need = self.size - len(self._ready) - len(self._warming)
+                slot = (self._retry.popleft() if self._retry else self._new_slot()) if need > 0 else None
+            if slot is not None:
+                try:
+                    self._create(slot)
+                except Exception:
+                    # The POST may have landed: retry under the same externalId
+                    # so a late success is replayed, not duplicated.
+                    with self._cond:
+                        self.stats["create_errors"] += 1
+                        self._retry.appendleft(slot)
+                    time.sleep(backoff(min(self.stats["create_errors"], 6), 1.0, 30.0))
+                    continue
+                slot.next_check = slot.created + backoff(0)
+                with self._cond:
+                    self._warming.append(slot)
+                    self._cond.notify_all()
+                continue
+            self._check_warming()
+
+    def _check_warming(self):
+        with self._cond:
+            now = time.monotonic()
+            due = [s for s in self._warming if s.next_check <= now]
+            if not due:
+                wake = min((s.next_check for s in self._warming), default=now + 1.0)
+                self._cond.wait(max(0.01, wake - now))
+                return
+        for s in due:
+            ok = False
+            try:
+                ok = self.probe(s.cid, time.monotonic() - s.created)
+            except Exception:
+                ok = False
+            with self._cond:
+                if s not in self._warming:
+                    continue       # handed out as a miss meanwhile
+                if ok:
+                    s.ready_at = time.monotonic()
+                    self._readiness.append(s.ready_at - s.created)
+                    self._warming.remove(s)
+                    self._ready.append(s)
+                    self._cond.notify_all()
+                else:
+                    s.attempt += 1
+                    s.next_check = time.monotonic() + backoff(s.attempt)
+
+    # ---------------------------------------------------------------- hand-out
+
+    def _take(self, wait_s: float) -> tuple:
+        deadline = time.monotonic() + wait_s
+        with self._cond:
+            while not self._ready and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            self.stats["acquired"] += 1
+            if self._ready:
+                self.stats["hits"] += 1
+                slot, ready = self._ready.popleft(), True
+            elif self._warming:
+                self.stats["misses"] += 1
+                slot = min(self._warming, key=lambda s: s.created)
+                self._warming.remove(slot)
+                ready = False
+            else:
+                self.stats["misses"] += 1
+                slot, ready = None, False
+            self._cond.notify_all()    # the filler can start a replacement
+        if slot is None:
+            with self._cond:
+                slot = self._retry.popleft() if self._retry else self._new_slot()
+            try:
+                self._create(slot)
+            except Exception:
+                with self._cond:
+                    self._retry.appendleft(slot)
+                raise
+        return slot, ready
+
+    def acquire(self, wait_s: float = 0.0) -> tuple:
+        """(conversationId, was_ready). Waits up to wait_s for a ready one."""
+        slot, ready = self._take(wait_s)
+        return slot.cid, ready
+
+    def send_first(self, text: str, wait_s: float = 0.0, timeout: float = 120):
+        """Acquire a conversation and send its first message (sync /messages).
+
+        404 "Thread not found" is retried with backoff + jitter, and what was
+        seen is fed back to the probe. Returns (cid, http_client.Response).
+        """
+        slot, was_ready = self._take(wait_s)
+        saw_404 = False
+        for attempt in range(SEND_RETRIES):
+            r = http_client.request("POST", f"{self.base}/conversations/{slot.cid}/messages",
+                                    headers=self._headers(), payload={"text": text}, timeout=timeout)
+            if r.status != 404:
+                break
+            saw_404 = True
+            with self._cond:
+                self.stats["first_send_404"] += 1
+            time.sleep(backoff(attempt, 0.5, 4.0))
+        if r.status < 400 and hasattr(self.probe, "observe"):
+            self.probe.observe(saw_404, was_ready, time.monotonic() - slot.created)
+        return slot.cid, r
+
+    # ---------------------------------------------------------------- metrics
+
+    def metrics(self) -> dict:
+        with self._cond:
+            ready, warming = len(self._ready), len(self._warming)
+            readiness = list(self._readiness)
+        acquired = self.stats["acquired"]
+        pct = sse_stream.percentile
+        return {
+            "size": self.size,
+            "ready": ready,
+            "warming": warming,
+            "acquired": acquired,
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": round(self.stats["hits"] / acquired, 3) if acquired else None,
+            "created": self.stats["created"],
+            "create_replayed": self.stats["create_replayed"],
+            "create_errors": self.stats["create_errors"],
+            "first_send_404": self.stats["first_send_404"],
+            "readiness_s": {"count": len(readiness),
+                            **{k: (round(pct(readiness, p), 2) if readiness else None)
+                               for k, p in (("p50", 50), ("p95", 95), ("max", 100))}},
+            "ready_estimate_s": round(getattr(self.probe, "estimate_s", 0), 2) or None,
+        }
+
+    def close(self):
+        """Stop the filler. Conversations still pooled are simply left unused."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Exercise the V4 warm conversation pool (sends invoke the model).")
+    ap.add_argument("--api-key")
+    ap.add_argument("--account", help="Account name in keys.json.")
+    ap.add_argument("--base", help="V4 base URL of a stand-in (default: the live API).")
+    ap.add_argument("--stub", action="store_true", help="Use the local stand-in (bench_stub.py).")
+    ap.add_argument("--size", type=int, default=4)
+    ap.add_argument("--sends", type=int, default=5, help="First messages to send through the pool.")
+    ap.add_argument("--interval", type=float, default=2.0, help="Seconds between sends.")
+    ap.add_argument("--message", default="Reply in one short sentence.")
+    args = ap.parse_args()
+
+    if args.stub:
+        import bench_stub
+        _, root = bench_stub.start(0, bench_stub.Settings(ttft_ms=50, token_ms=5, not_ready_ms=3000))
+        base, key = f"{root}/v4", "stub-key"
+    else:
+        import audience_audit as aa
+        base, key = (args.base or BASE), aa.resolve_key(args)
+
+    pool = ConversationPool(key, args.size, base=base).start()
+    for i in range(args.sends):
+        time.sleep(args.interval)
+        t0 = time.monotonic()
+        cid, r = pool.send_first(args.message)
+        print(f"  send {i + 1}: http {r.status} in {time.monotonic() - t0:.2f}s", file=sys.stderr)
+    print(json.dumps(pool.metrics(), indent=2))
+    pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
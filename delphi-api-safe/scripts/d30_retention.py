@@ -55,36 +55,55 @@ The retention math (`compute_d30`) is a pure function over
                              users were active in the window (cheap, local),
                              then hit the live API ONLY for those candidates
                              to pull their authoritative full history. Also
-                             does one cheap GET /v3/users sweep to report
-                             audience COVERAGE -- how much of the live real
-                             audience the export actually captured. Gets
+                             refreshes the saved /v3/users index (a few
+                             requests once it exists -- user_index.py) to
+                             report audience COVERAGE -- how much of the live
+                             real audience the export actually captured. Gets
                              API-grade accuracy at export-mode cost.
 
+Per-user pulls in both API modes are cached locally per clone (history_cache.py,
+default TTL 24h), so re-running against the same clone only re-pulls users who
+are stale or whom the export shows active since their last pull.
+
+--v4 swaps the live source in both API modes for V4: one /v4/contacts sweep
+(only contacts with interactions, 200 per page, which also gives the coverage
+audience), then /v4/contacts/{id}/threads per user, fanned out at the key's
+rate. Contacts only carry `email` with the contacts:list:pii scope, so that is
+required. Threads have no creation time, so each conversation is dated by its
+lastMessageAt -- its LAST activity, not its start. That only moves a start
+within a day for most chats, but it shifts every one later and can move users
+across the cohort edge, so the output carries start_time_basis and V4 numbers
+should not be read as equivalent to V3 ones. Not served from history_cache;
+--resume works as usual.
+
 Usage:
     python3 scripts/d30_retention.py --export conversations.ndjson
     python3 scripts/d30_retention.py --account david_kessler
     python3 scripts/d30_retention.py --export conversations.ndjson --account david_kessler
     python3 scripts/d30_retention.py --export conversations.ndjson --account david_kessler --window-days 90 --json
+    python3 scripts/d30_retention.py --account david_kessler --resume   # continue an interrupted pull
+    python3 scripts/d30_retention.py --account david_kessler_applaunch --v4  # V4 contacts/threads
 """
-import argparse, datetime, json, os, sys, time
-import urllib.parse
+import argparse, datetime, hashlib, json, os, sys
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import audience_audit as aa  # reuse resolve_key / get / sweep_users / is_real / retry+pacing
+import checkpoint
+import history_cache
+import rate_limit as rl
+import timestamps
+import user_index
+import v4_pages
 
 FAKE_MARKERS = aa.FAKE_MARKERS
 DEFAULT_EXCLUDE = {"support@delphi.ai"}  # Delphi's placeholder for anonymous embed sessions --
                                           # NOT a real repeat visitor; extend with --exclude-email
 
-# Legacy dsk- keys are capped at 120 req/60s (~2 req/s). App-Launch dlph_ keys carry a much
-# higher published cap (10k req/min), so pace them faster -- but pace them, not zero-delay:
-# a rapid burst has been observed to draw a 429 even on a dlph_ key, so this is "safely fast,"
-# not "unlimited." Per-user history pulls (combo/api modes) are the only place volume matters.
-PACE_SECONDS = {"applaunch": 0.05, "legacy": 0.6}
-
-
-def key_style(key: str) -> str:
-    return "applaunch" if key.startswith("dlph_") else "legacy"
+# Legacy dsk- keys are capped at 120 req/60s (~2 req/s); App-Launch dlph_ keys at 10k req/min.
+# Per-user history pulls (combo/api modes) are the only place volume matters, so those fan
+# out over enough workers to reach the key's rate; aa.get paces every call through the
+# key's adaptive limiter (rate_limit.py), which backs off on 429s and speeds up when healthy.
+key_style = rl.key_style
 
 
 def resolve_key_preferring_applaunch(args) -> tuple:
@@ -100,23 +119,36 @@ def resolve_key_preferring_applaunch(args) -> tuple:
                   file=sys.stderr)
         return explicit, key_style(explicit)
 
+    accounts, keys_path = load_accounts()
+    if args.account not in accounts:
+        sys.exit(f"Account '{args.account}' not found in {keys_path}.")
+    key, style, _ = account_key(accounts, args.account)
+    return key, style
+
+
+def load_accounts() -> tuple:
+    """({account: key}, keys.json path) -- empty when there is no keys.json."""
     root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     keys_path = os.path.join(root, "keys.json")
     accounts = json.load(open(keys_path)).get("accounts", {}) if os.path.exists(keys_path) else {}
+    return accounts, keys_path
 
-    base_key = accounts.get(args.account)
-    if base_key is None:
-        sys.exit(f"Account '{args.account}' not found in {keys_path}.")
 
+def account_key(accounts: dict, account: str, verbose: bool = True) -> tuple:
+    """(key, style, account actually used) for one keys.json account, swapping a
+    legacy key for its `<account>_applaunch` dlph_ sibling when there is one."""
+    base_key = accounts[account]
     if key_style(base_key) == "legacy":
-        sibling = f"{args.account}_applaunch"
+        sibling = f"{account}_applaunch"
         if sibling in accounts and key_style(accounts[sibling]) == "applaunch":
-            print(f"NOTE: '{args.account}' is a legacy dsk- key; auto-upgrading to the "
-                  f"higher-rate-limit '{sibling}' (dlph_) key for this run.", file=sys.stderr)
-            return accounts[sibling], "applaunch"
-        print(f"NOTE: '{args.account}' is a legacy dsk- key (120 req/60s cap) and no "
-              f"'{sibling}' App-Launch key exists yet. Pacing conservatively.", file=sys.stderr)
-    return base_key, key_style(base_key)
+            if verbose:
+                print(f"NOTE: '{account}' is a legacy dsk- key; auto-upgrading to the "
+                      f"higher-rate-limit '{sibling}' (dlph_) key for this run.", file=sys.stderr)
+            return accounts[sibling], "applaunch", sibling
+        if verbose:
+            print(f"NOTE: '{account}' is a legacy dsk- key (120 req/60s cap) and no "
+                  f"'{sibling}' App-Launch key exists yet. Pacing conservatively.", file=sys.stderr)
+    return base_key, key_style(base_key), account
 
 
 def is_real(email: str, extra_exclude: set) -> bool:
@@ -125,86 +157,219 @@ def is_real(email: str, extra_exclude: set) -> bool:
     return aa.is_real(email)
 
 
-def parse_ts(s):
-    try:
-        return datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
-    except Exception:
-        return None
+parse_ts = timestamps.parse   # the old name; see timestamps.py
 
 
 # ---------------------------------------------------------------- sources --
 
-def load_from_export(path: str, exclude: set) -> dict:
-    """NDJSON: one thread per line -> {email: [conversation start datetimes]}."""
-    by_user = {}
-    total_threads = 0
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            total_threads += 1
-            t = json.loads(line)
-            email = t.get("user_email", "")
-            if not is_real(email, exclude):
-                continue
-            times = [parse_ts(m.get("created_at")) for m in t.get("messages", [])]
-            times = [x for x in times if x]
-            if not times:
-                continue
-            by_user.setdefault(email, []).append(min(times))
-    for e in by_user:
-        by_user[e].sort()
-    return by_user, total_threads
-
-
-def load_from_api_full(key: str, exclude: set, style: str, verbose=True) -> dict:
-    """Full live sweep: every real user's full conversation history."""
-    pace = PACE_SECONDS[style]
+def load_from_export(path: str, exclude: set, use_cache: bool = True, jobs: int = 1) -> dict:
+    """NDJSON: one thread per line -> {email: [conversation start datetimes]}.
+
+    Read through export_scan.py, so a file whose scan was saved is not parsed
+    again; otherwise only the thread starts are built."""
+    import export_scan   # imports this module
+    scan = export_scan.load_or_scan(path, exclude, use_cache, jobs=jobs, products=("starts",))
+    return scan.starts(), scan.coverage["threads"]
+
+
+def load_export_candidates(path: str, exclude: set) -> tuple:
+    """Combo mode's view of the export: {email: [thread starts]}, thread count.
+
+    Combo mode takes only who is in the export and when they were active from
+    it -- the retention itself comes from the API -- so a plain export is
+    read from its thread index (export_scan.ThreadIndex) instead of the full
+    scan product. Times are UTC there; only instants are compared."""
+    import export_scan   # imports this module
+    idx = export_scan.load_index(path, exclude)
+    if idx is None:   # compressed: no index
+        return load_from_export(path, exclude)
+    return idx.starts(exclude), len(idx)
+
+
+def _fetch_history(email: str, key: str, cache=None, active_since=None) -> list:
+    convos = aa.list_conversations(email, key, cache, active_since)
+    times = [timestamps.parse(c.get("created_at")) for c in convos]
+    return sorted(x for x in times if x)
+
+
+def fetch_histories(emails: list, key: str, style: str, verbose=True, cache=None,
+                    active: dict = None, ckpt=None) -> dict:
+    """Concurrent per-user /v3/conversation/list pulls -> {email: [datetimes]}.
+
+    Paced per key by aa.get's adaptive limiter (see rate_limit.py); users with
+    no conversations, or whose pull still failed after retries, are left out --
+    as before. With a history_cache.HistoryCache, fresh entries are served
+    locally; `active` ({email: latest known activity}) forces a re-pull for
+    anyone active since their entry was fetched. With a checkpoint.Checkpoint
+    (`ckpt`) each user is journaled as it completes and users already in it (a
+    resumed run) are not pulled again."""
+    active = active or {}
+    results = {}
+    if ckpt is not None:
+        for r in ckpt.records:
+            results[r["e"]] = [timestamps.parse(t) for t in r["t"]]
+    todo = [e for e in emails if e not in results]
+
+    def pull(email):
+        times = _fetch_history(email, key, cache, active.get(email))
+        if ckpt is not None:
+            ckpt.append({"e": email, "t": [t.isoformat() for t in times]})
+        return times
+
+    limiter = rl.limiter_for(key)
+    workers = rl.WORKERS[style]
+    sent = limiter.snapshot()["requests"]
+    if verbose:
+        print(f"  (starting at {limiter.rate:.1f} req/s, {workers} workers, key={style}"
+              + (f", {len(emails) - len(todo)} already done" if len(todo) < len(emails) else "")
+              + ")", file=sys.stderr)
+    fetched, stats = rl.fan_out(todo, pull, workers=workers, verbose=verbose)
+    results.update(fetched)
+    if ckpt is not None:
+        if stats["errors"]:
+            ckpt.close()   # keep the journal so --resume retries only the failures
+        else:
+            ckpt.finish()
     if verbose:
-        print("sweeping full live audience...", file=sys.stderr)
-    users = aa.sweep_users(key)
+        lim = limiter.snapshot()
+        reqs = lim["requests"] - sent   # cache hits cost none, long histories several
+        rps = round(reqs / stats["elapsed_s"], 2) if stats["elapsed_s"] else 0.0
+        print(f"  resolved {stats['items']} histories in {stats['elapsed_s']}s with {reqs} API requests -- "
+              f"{rps} req/s achieved (limiter now {lim['rate_rps']} req/s, "
+              f"{lim['throttled_429']} x 429), {stats['errors']} unresolved errors", file=sys.stderr)
+        if cache is not None:
+            c = cache.stats()
+            print(f"  history cache: {c['hits']} served locally, {c['refreshed_stale']} refreshed, "
+                  f"{c['misses']} new", file=sys.stderr)
+    return {e: results[e] for e in emails if results.get(e)}
+
+
+def load_from_api_full(key: str, exclude: set, style: str, verbose=True, cache=None,
+                       users_ckpt=None, ckpt=None, users: list = None) -> dict:
+    """Full live sweep: every real user's full conversation history.
+
+    Pass `users` (e.g. from user_index.refresh) to skip the /v3/users sweep."""
+    if users is None:
+        if verbose:
+            print("sweeping full live audience...", file=sys.stderr)
+        users = aa.sweep_users(key, users_ckpt)
     real = [u for u in users if is_real(u.get("email", ""), exclude)]
     if verbose:
-        print(f"pulling full history for {len(real)} real users... (pace={pace}s, key={style})", file=sys.stderr)
-    by_user = {}
-    for i, u in enumerate(real):
-        email = u["email"]
-        try:
-            d = aa.get("/v3/conversation/list?email=" + urllib.parse.quote(email, safe=""), key)
-            convos = d.get("conversations") or d.get("data") or []
-            times = [parse_ts(c.get("created_at")) for c in convos]
-            times = sorted(x for x in times if x)
-            if times:
-                by_user[email] = times
-        except Exception:
-            pass
-        if verbose and (i + 1) % 100 == 0:
-            print(f"  {i+1}/{len(real)}", file=sys.stderr)
-        time.sleep(pace)
+        print(f"pulling full history for {len(real)} real users...", file=sys.stderr)
+    by_user = fetch_histories([u["email"] for u in real], key, style, verbose, cache, ckpt=ckpt)
     return by_user, len(users), len(real)
 
 
-def load_api_for_emails(emails: list, key: str, style: str, verbose=True) -> dict:
+def load_api_for_emails(emails: list, key: str, style: str, verbose=True, cache=None,
+                        active: dict = None, ckpt=None) -> dict:
     """Authoritative full history for a SPECIFIC candidate list (combo mode)."""
-    pace = PACE_SECONDS[style]
-    by_user = {}
     if verbose:
-        print(f"pulling authoritative history for {len(emails)} candidate users... (pace={pace}s, key={style})", file=sys.stderr)
-    for i, email in enumerate(emails):
-        try:
-            d = aa.get("/v3/conversation/list?email=" + urllib.parse.quote(email, safe=""), key)
-            convos = d.get("conversations") or d.get("data") or []
-            times = [parse_ts(c.get("created_at")) for c in convos]
-            times = sorted(x for x in times if x)
-            if times:
-                by_user[email] = times
-        except Exception:
-            pass
-        if verbose and (i + 1) % 100 == 0:
-            print(f"  {i+1}/{len(emails)}", file=sys.stderr)
-        time.sleep(pace)
-    return by_user
+        print(f"pulling authoritative history for {len(emails)} candidate users...", file=sys.stderr)
+    return fetch_histories(emails, key, style, verbose, cache, active, ckpt)
+
+
+# What a V4-sourced conversation time really is; reported as start_time_basis.
+V4_START_BASIS = "lastMessageAt"
+V3_START_BASIS = "created_at"
+
+
+def _thread_time(t: dict):
+    # Threads carry no creation time today -- lastMessageAt stands in for the
+    # conversation's start (a conversation rarely spans days); prefer createdAt if it appears.
+    return timestamps.parse(t.get("createdAt") or t.get(V4_START_BASIS))
+
+
+def load_from_v4(key: str, exclude: set, style: str, verbose=True, emails: list = None,
+                 ckpt=None) -> tuple:
+    """Live history from V4: sweep /v4/contacts, then each contact's
+    /v4/contacts/{id}/threads concurrently -> ({email: [datetimes]}, audience).
+
+    `audience` is the set of real contact emails (for coverage). Only contacts
+    with at least one interaction are listed (totalInteractionMin=1, server-side).
+    With `emails` (combo mode) threads are pulled only for those users. Needs a
+    key whose contacts carry `email` (the contacts:list:pii scope) -- without it
+    there is nothing to join on, and this exits saying so. With a
+    checkpoint.Checkpoint (`ckpt`) each contact is journaled as it completes."""
+    contacts = v4_pages.CursorPages(key, "/contacts?totalInteractionMin=1&sort=lastActive&direction=desc")
+    ids, audience, seen_any = {}, set(), False
+    for c in contacts:
+        seen_any = True
+        email = (c.get("email") or "").strip()
+        if email and is_real(email, exclude):
+            ids.setdefault(email.lower(), c["id"])
+            audience.add(email.lower())
+    if seen_any and not ids:
+        sys.exit("V4 contacts came back without email -- this key lacks the contacts:list:pii "
+                 "scope, so threads cannot be joined to users. Use the V3 source instead.")
+    wanted = [e for e in (emails if emails is not None else ids) if e.lower() in ids]
+    if verbose:
+        print(f"  {contacts.stats['items']} active contacts in {contacts.stats['pages']} pages; "
+              f"pulling threads for {len(wanted)} real users...", file=sys.stderr)
+
+    results = {}
+    if ckpt is not None:
+        for r in ckpt.records:
+            results[r["e"]] = [timestamps.parse(t) for t in r["t"]]
+    todo = [e for e in wanted if e not in results]
+
+    def pull(email):
+        threads = v4_pages.CursorPages(key, f"/contacts/{ids[email.lower()]}/threads", prefetch=False)
+        times = sorted(x for x in (_thread_time(t) for t in threads) if x)
+        if ckpt is not None:
+            ckpt.append({"e": email, "t": [t.isoformat() for t in times]})
+        return times
+
+    sent = rl.limiter_for(key).snapshot()["requests"]
+    fetched, stats = rl.fan_out(todo, pull, workers=rl.WORKERS[style], verbose=verbose)
+    results.update(fetched)
+    if ckpt is not None:
+        if stats["errors"]:
+            ckpt.close()
+        else:
+            ckpt.finish()
+    if verbose:
+        lim = rl.limiter_for(key).snapshot()
+        print(f"  fetched {stats['items']} thread lists in {stats['elapsed_s']}s with "
+              f"{lim['requests'] - sent} API requests -- "
+              f"{stats['items_per_s']} contacts/s (limiter now {lim['rate_rps']} req/s, "
+              f"{lim['throttled_429']} x 429), {stats['errors']} unresolved errors", file=sys.stderr)
+    return {e: results[e] for e in wanted if results.get(e)}, audience
+
+
+def resolve_clone(key: str) -> str:
+    """Clone slug for local cache/checkpoint paths; falls back to a key digest."""
+    try:
+        return aa.clone_slug(key)
+    except Exception as e:
+        fallback = "key-" + hashlib.sha256(key.encode()).hexdigest()[:12]
+        print(f"NOTE: could not identify the clone ({e}); using '{fallback}' for local state.",
+              file=sys.stderr)
+        return fallback
+
+
+def open_history_cache(args, clone: str):
+    """HistoryCache for this clone per --history-ttl-hours / --no-history-cache."""
+    if args.no_history_cache:
+        return None
+    return history_cache.HistoryCache(clone, args.history_ttl_hours)
+
+
+def add_live_pull_args(ap):
+    """Flags shared by every script that pulls per-user history live."""
+    ap.add_argument("--history-ttl-hours", type=float, default=history_cache.DEFAULT_TTL_HOURS,
+                    help="Reuse per-user conversation lists pulled within this many hours, "
+                         "unless the export shows newer activity (out/cache, see history_cache.py).")
+    ap.add_argument("--no-history-cache", action="store_true",
+                    help="Always re-pull every user's conversation list.")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continue an interrupted user sweep / history pull from its checkpoint "
+                         "(out/checkpoints, see checkpoint.py) instead of starting over.")
+    ap.add_argument("--full-user-sweep", action="store_true",
+                    help="Re-walk every /v3/users page instead of refreshing the saved user "
+                         "index incrementally (see user_index.py).")
+    ap.add_argument("--v4", action="store_true",
+                    help="Pull live history from V4 contacts + per-contact threads instead of V3 "
+                         "per-email conversation lists. Needs the contacts:list:pii scope.")
 
 
 # ------------------------------------------------------------- calculation --
@@ -283,7 +448,7 @@ def top_engaged(by_user, n=10):
 
 def main():
     ap = argparse.ArgumentParser(description="Clear, censoring-corrected D30 retention (read-only).")
-    ap.add_argument("--export", help="NDJSON conversation export path.")
+    ap.add_argument("--export", help="NDJSON conversation export path (.gz / .bz2 / .zst read as-is).")
     ap.add_argument("--api-key")
     ap.add_argument("--account", help="Account name in keys.json.")
     ap.add_argument("--window-days", type=int, default=60,
@@ -298,6 +463,7 @@ def main():
     ap.add_argument("--dump-history", help="Write the resolved {email: [ISO timestamps]} history to this "
                                            "path (PII -- keep local). Lets a follow-up analysis reuse an "
                                            "expensive per-user API pull instead of repeating it.")
+    add_live_pull_args(ap)
     args = ap.parse_args()
 
     exclude = DEFAULT_EXCLUDE | {e.lower() for e in args.exclude_email}
@@ -307,25 +473,38 @@ def main():
 
     if not args.export and not key:
         sys.exit("Provide --export, and/or --account/--api-key.")
+    clone = resolve_clone(key) if key else None
+    hcache = open_history_cache(args, clone) if key else None
 
     coverage = None
     export_first_ts = None   # earliest activity the export actually covers
     if args.export and key:
         mode = "combo"
-        export_by_user, total_threads = load_from_export(args.export, exclude)
+        export_by_user, total_threads = load_export_candidates(args.export, exclude)
         _t = [t for ts in export_by_user.values() for t in ts]
         export_first_ts = min(_t) if _t else None
-        # cheap full-audience sweep, for coverage reporting only (no per-user pulls here)
-        print("sweeping live audience for coverage check...", file=sys.stderr)
-        live_users = aa.sweep_users(key)
-        live_real = {u["email"] for u in live_users if is_real(u.get("email", ""), exclude)}
         candidates = list(export_by_user.keys())
-        by_user = load_api_for_emails(candidates, key, style)
+        if args.v4:
+            # the contacts sweep doubles as the live audience for coverage
+            print("pulling V4 contacts + threads for export candidates...", file=sys.stderr)
+            by_user, live_real = load_from_v4(key, exclude, style, emails=candidates,
+                                              ckpt=checkpoint.Checkpoint(clone, "d30-v4-histories", args.resume))
+            index_summary = {"source": "v4 contacts"}
+        else:
+            # cheap full-audience sweep, for coverage reporting only (no per-user pulls here)
+            print("refreshing live audience for coverage check...", file=sys.stderr)
+            live_users, index_summary = user_index.refresh(
+                key, clone, args.full_user_sweep, sweep="d30-users", resume=args.resume)
+            live_real = {u["email"] for u in live_users if is_real(u.get("email", ""), exclude)}
+            by_user = load_api_for_emails(candidates, key, style, cache=hcache,
+                                          active={e: ts[-1] for e, ts in export_by_user.items()},
+                                          ckpt=checkpoint.Checkpoint(clone, "d30-histories", args.resume))
         coverage = {
             "live_real_audience": len(live_real),
             "export_active_users": len(export_by_user),
             "coverage_pct": round(len(export_by_user) / len(live_real) * 100, 1) if live_real else None,
             "registered_but_absent_from_export": len(live_real - set(export_by_user.keys())),
+            "user_index": index_summary,
         }
         reference_time = datetime.datetime.now(datetime.timezone.utc)
     elif args.export:
@@ -334,11 +513,24 @@ def main():
         all_times = [t for times in by_user.values() for t in times]
         export_first_ts = min(all_times) if all_times else None
         reference_time = max(all_times) if all_times else datetime.datetime.now(datetime.timezone.utc)
+    elif args.v4:
+        mode = "api-only"
+        print("sweeping V4 contacts + threads...", file=sys.stderr)
+        by_user, _ = load_from_v4(key, exclude, style,
+                                  ckpt=checkpoint.Checkpoint(clone, "d30-v4-histories", args.resume))
+        reference_time = datetime.datetime.now(datetime.timezone.utc)
     else:
         mode = "api-only"
-        by_user, total_live, total_real = load_from_api_full(key, exclude, style)
+        print("refreshing live audience...", file=sys.stderr)
+        live_users, _ = user_index.refresh(
+            key, clone, args.full_user_sweep, sweep="d30-users", resume=args.resume)
+        by_user, total_live, total_real = load_from_api_full(
+            key, exclude, style, cache=hcache, users=live_users,
+            ckpt=checkpoint.Checkpoint(clone, "d30-histories", args.resume))
         reference_time = datetime.datetime.now(datetime.timezone.utc)
 
+    if hcache is not None:
+        hcache.close()
     if args.dump_history:
         json.dump({e: [t.isoformat() for t in times] for e, times in by_user.items()},
                   open(args.dump_history, "w"))
@@ -365,6 +557,9 @@ def main():
 
     result = compute_d30(by_user, reference_time, args.window_days, args.return_days)
     result["mode"] = mode
+    if key:
+        result["history_source"] = "v4 contacts/threads" if args.v4 else "v3 conversation/list"
+        result["start_time_basis"] = V4_START_BASIS if args.v4 else V3_START_BASIS
     if style:
         result["key_style"] = style
     if coverage:
@@ -387,6 +582,10 @@ def main():
     print(f"  Reference time (window end) ... {result['reference_time']}")
     print(f"  Window ......................... {result['window_days']}d lookback = "
           f"{result['acquisition_span_days']}d acquisition + {result['return_days']}d return horizon")
+    if result.get("start_time_basis") == V4_START_BASIS:
+        print(f"  Conversation time .............. {V4_START_BASIS} (V4 threads carry no start time: each\n"
+              f"                                   is dated by its LAST message, so cohorts shift later --\n"
+              f"                                   not directly comparable with V3 created_at D30)")
     if coverage:
         print(f"\n  COVERAGE (export vs live audience):")
         print(f"    Live real audience (API) ....... {coverage['live_real_audience']}")
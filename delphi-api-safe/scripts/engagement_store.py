@@ -11,13 +11,23 @@ silently replace the period you already had.
 This keeps a small, durable, append-friendly store instead:
 
     out/store/manifest.json           what has been ingested, from which file
+    out/store/<clone>/contacts.jsonl  the clone's contacts; line n is id n
     out/store/<clone>/<YYYY-MM>.jsonl one row per (contact, day)
+    out/store/<clone>/<YYYY-MM>.seg   the same rows as packed columns, for
+                                      fast loading (see store_segments.py)
 
 Each row is the "daily engagement rollup" shape -- deliberately the same shape
 we asked Delphi to expose natively, so this can be swapped for a real endpoint
 later without touching the analysis:
 
-    {"u": "<contact>", "d": "2026-05-14", "in": 6, "out": 7, "ch": ["embed"]}
+    {"u": 1742, "d": "2026-05-14", "in": 6, "out": 7, "ch": ["embed"]}
+
+"u" is the contact's id in contacts.jsonl, not the email: each address is
+written once per clone instead of once per row, and every reader keys its sets
+by small ints. The dictionary is append-only -- ids are never reused or
+renumbered -- and the manifest records how many it holds. Months stored before
+it existed carry the email in "u"; readers accept both, and `segment` rewrites
+them to ids.
 
 Properties that matter:
 
@@ -29,9 +39,17 @@ Properties that matter:
                    be kept indefinitely and re-analysed without the raw file.
   * AUDITABLE      the manifest records source filename, size, sha256 and row
                    counts, so you can tell what a number was built from.
+  * SUMMARISED     each month's manifest entry also carries its aggregates:
+                   who was present and who sent anything (as compressed
+                   bitmaps over contact ids), contact-days per channel, and
+                   first/last day. Reach, engagement and month-over-month
+                   overlap across any span come from these without reading a
+                   row (see month_aggregates).
   * PII-BEARING    contact identifiers are retained (retention needs identity
-                   across months) -- the store lives under out/, which is
-                   gitignored. Do not commit it.
+                   across months), in contacts.jsonl -- the store lives under
+                   out/, which is gitignored. Do not commit it, and never
+                   delete contacts.jsonl on its own: the month files are
+                   meaningless without it.
 
 An export may span several months; rows are filed under the month they belong
 to, so a May-to-August export lands as four month files.
@@ -43,21 +61,33 @@ Usage:
     # replace a month you already have
     python3 scripts/engagement_store.py ingest --clone karamo --export may.ndjson --force
 
+    # a multi-GB export on a laptop: hold at most ~500 MB of rows, spill the rest
+    python3 scripts/engagement_store.py ingest --clone karamo --export year.ndjson.gz --max-memory-mb 500
+
+    # move months ingested before contact ids / segments / aggregates onto them
+    python3 scripts/engagement_store.py segment
+
     # what do we hold?
     python3 scripts/engagement_store.py status
     python3 scripts/engagement_store.py status --clone karamo
 """
-import argparse, collections, datetime, hashlib, json, os, sys
+import argparse, array, base64, collections, datetime, heapq, itertools, json, os, sys, tempfile, zlib
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import d30_retention as d30
+import export_scan
+import store_segments
 
 ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 STORE = os.path.join(ROOT, "out", "store")
 MANIFEST = os.path.join(STORE, "manifest.json")
+CONTACTS = "contacts.jsonl"   # per clone, next to its month files
+SPILL_ROOT = os.path.join(ROOT, "out", "tmp")   # not /tmp: often RAM-backed, which defeats spilling
 
-INBOUND = {"user", "USER"}                 # the human
-OUTBOUND = {"agent", "owner", "CLONE"}     # the AI, or the creator broadcasting
+# Held (contact, day) cells per MB of --max-memory-mb, measured on a
+# cells-only scan (~420 bytes a cell with its key, counts and channel set).
+CELLS_PER_MB = 2500
+MERGE_FANIN = 64   # runs open at once while merging; more are merged in rounds
 
 
 # ------------------------------------------------------------------ manifest --
@@ -73,108 +103,293 @@ def save_manifest(m: dict):
     json.dump(m, open(MANIFEST, "w"), indent=2, sort_keys=True)
 
 
-def sha256(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1 << 20), b""):
-            h.update(chunk)
-    return h.hexdigest()
+# ------------------------------------------------------------------ contacts --
+
+class ContactDict:
+    """A clone's contact dictionary: email <-> dense int id, in the order ids
+    were handed out. Append-only on disk; `id` assigns in memory and `flush`
+    appends what is new."""
+
+    def __init__(self, clone: str):
+        self.path = os.path.join(STORE, clone, CONTACTS)
+        self.emails, self._size = [], 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break   # torn by an interrupted append; cut off on the next flush
+                    self.emails.append(json.loads(line))
+                    self._size += len(line)
+        self.ids = {e: n for n, e in enumerate(self.emails)}
+        self._saved = len(self.emails)
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+    def id(self, email: str) -> int:
+        n = self.ids.get(email)
+        if n is None:
+            n = self.ids[email] = len(self.emails)
+            self.emails.append(email)
+        return n
+
+    def flush(self):
+        if self._saved == len(self.emails):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.truncate(self._size)
+            for e in self.emails[self._saved:]:
+                line = (json.dumps(e) + "\n").encode()
+                f.write(line)
+                self._size += len(line)
+        self._saved = len(self.emails)
+
+
+def load_contacts(clone: str, man: dict = None) -> ContactDict:
+    """The clone's dictionary, checked against the count the manifest recorded."""
+    contacts = ContactDict(clone)
+    want = (man or load_manifest())["clones"].get(clone, {}).get("contact_ids", 0)
+    if len(contacts) < want:
+        sys.exit(f"{contacts.path} holds {len(contacts)} contacts but the manifest recorded "
+                 f"{want} -- restore it from a backup; the month files cannot be read without it")
+    return contacts
+
+
+# ---------------------------------------------------------------- aggregates --
+
+def encode_ids(ids) -> str:
+    """Contact ids -> bitmap (bit n = id n), zlib-compressed, base64."""
+    bits = bytearray((max(ids) >> 3) + 1 if ids else 0)
+    for u in ids:
+        bits[u >> 3] |= 1 << (u & 7)
+    return base64.b64encode(zlib.compress(bytes(bits), 9)).decode()
+
+
+def decode_ids(blob: str) -> int:
+    """encode_ids() -> the bitmap as an int: `|` unions, `&` intersects."""
+    return int.from_bytes(zlib.decompress(base64.b64decode(blob)), "little")
+
+
+def popcount(bits: int) -> int:
+    return bits.bit_count() if hasattr(bits, "bit_count") else bin(bits).count("1")   # 3.10+
+
+
+class MonthStats:
+    """One month's totals and aggregates, accumulated row by row."""
+
+    def __init__(self):
+        self.rows = self.inb = self.outb = 0
+        self.present, self.inbound = set(), set()
+        self.channels = collections.Counter()   # contact-days per channel
+        self.first = self.last = self.first_in = self.last_in = None
+
+    def add(self, u: int, d: str, i: int, o: int, ch: list):
+        self.rows += 1
+        self.inb += i
+        self.outb += o
+        self.present.add(u)
+        if self.first is None or d < self.first:
+            self.first = d
+        if self.last is None or d > self.last:
+            self.last = d
+        if i > 0:
+            self.inbound.add(u)
+            if self.first_in is None or d < self.first_in:
+                self.first_in = d
+            if self.last_in is None or d > self.last_in:
+                self.last_in = d
+        for c in ch:
+            self.channels[c] += 1
+
+    def meta(self) -> dict:
+        """The manifest fields these rows determine."""
+        return {
+            "rows": self.rows, "contacts": len(self.present),
+            "inbound_messages": self.inb, "outbound_messages": self.outb,
+            "aggregates": {
+                "present": encode_ids(self.present),
+                "inbound": encode_ids(self.inbound),
+                "channel_days": dict(sorted(self.channels.items())),
+                "first_day": self.first, "last_day": self.last,
+                "first_inbound_day": self.first_in, "last_inbound_day": self.last_in,
+            },
+        }
+
+
+def month_aggregates(clone: str, months=None) -> dict:
+    """{month: aggregates} for the stored months, with `present` / `inbound`
+    decoded to bitmap ints and the month's inbound/outbound totals alongside.
+    Read from the manifest; a month recorded before aggregates existed is
+    summarised from its rows instead (`segment` records them)."""
+    man = load_manifest()
+    recorded = man["clones"].get(clone, {}).get("months", {})
+    contacts, out = None, {}
+    for month, path in _month_files(clone, months):
+        meta = recorded.get(month, {})
+        if "aggregates" not in meta:
+            if contacts is None:
+                contacts = load_contacts(clone, man)
+            stats = MonthStats()
+            for d, u, i, o, ch in _read_jsonl(path):
+                stats.add(contacts.id(u) if isinstance(u, str) else u, d, i, o, ch)
+            meta = stats.meta()
+        agg = dict(meta["aggregates"])
+        agg["present"], agg["inbound"] = decode_ids(agg["present"]), decode_ids(agg["inbound"])
+        agg["inbound_messages"], agg["outbound_messages"] = meta["inbound_messages"], meta["outbound_messages"]
+        out[month] = agg
+    return out
 
 
 # ------------------------------------------------------------------- ingest --
 
-def parse_export(path: str, exclude: set):
-    """NDJSON -> {(contact, date): {'in':n,'out':n,'ch':set()}} plus a coverage summary."""
-    cells = collections.defaultdict(lambda: {"in": 0, "out": 0, "ch": set()})
-    threads = skipped = malformed = 0
-    seen_days = set()
-    for line in open(path):
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            t = json.loads(line)
-        except Exception:
-            malformed += 1
-            continue
-        threads += 1
-        email = (t.get("user_email") or "").strip()
-        if not email or not d30.is_real(email, exclude):
-            skipped += 1
-            continue
-        ch = t.get("medium") or "unknown"
-        for m in t.get("messages", []):
-            ts = d30.parse_ts(m.get("created_at") or "")
-            if not ts:
-                continue
-            day = ts.date()
-            seen_days.add(day)
-            cell = cells[(email.lower(), day.isoformat())]
-            s = m.get("sender")
-            if s in INBOUND:
-                cell["in"] += 1
-            elif s in OUTBOUND:
-                cell["out"] += 1
-            cell["ch"].add(ch)
-    return cells, {
-        "threads": threads,
-        "threads_skipped_placeholder_or_fake": skipped,
-        "malformed_lines": malformed,
-        "first_day": min(seen_days).isoformat() if seen_days else None,
-        "last_day": max(seen_days).isoformat() if seen_days else None,
-        "active_days": len(seen_days),
-    }
-
-
-def ingest(clone: str, export: str, force: bool, exclude: set) -> int:
+def _run_rows(path: str):
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _combine(runs: list):
+    """k-way merge of sorted runs; a contact-day split across runs is summed."""
+    cur = None
+    for r in heapq.merge(*map(_run_rows, runs), key=lambda r: (r[0], r[1])):
+        if cur is not None and cur[0] == r[0] and cur[1] == r[1]:
+            cur[2] += r[2]
+            cur[3] += r[3]
+            cur[4] = sorted(set(cur[4]) | set(r[4]))
+        else:
+            if cur is not None:
+                yield cur
+            cur = r
+    if cur is not None:
+        yield cur
+
+
+def merge_runs(runs: list, spill_dir: str):
+    """Spilled runs (export_scan.scan_cells_spilled) -> [day, contact, in, out,
+    channels] rows sorted by (day, contact), one per contact-day."""
+    rounds = itertools.count()
+    while len(runs) > MERGE_FANIN:
+        merged = []
+        for k in range(0, len(runs), MERGE_FANIN):
+            out = os.path.join(spill_dir, f"merge-{next(rounds):05d}.jsonl")
+            with open(out, "w") as f:
+                for r in _combine(runs[k:k + MERGE_FANIN]):
+                    f.write(json.dumps(r, separators=(",", ":")) + "\n")
+            for run in runs[k:k + MERGE_FANIN]:
+                os.remove(run)
+            merged.append(out)
+        runs = merged
+    yield from _combine(runs)
+
+
+def ingest(clone: str, export: str, force: bool, exclude: set, use_cache: bool = True,
+           jobs: int = 1, max_memory_mb: float = None, save_scan: bool = False) -> int:
+    """Add an export to the store. With `max_memory_mb`, the (contact, day)
+    table is kept under that size by spilling sorted runs to out/tmp/ and
+    merging them -- slower, same month files. `use_cache` / `save_scan` /
+    `jobs` are export_scan.load_or_scan's."""
     if not os.path.exists(export):
         sys.exit(f"No such export: {export}")
+    if not force and _already_ingested(clone, export):
+        return 0
+    if max_memory_mb:
+        os.makedirs(SPILL_ROOT, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix="ingest-", dir=SPILL_ROOT) as spill_dir:
+            max_cells = max(1000, int(max_memory_mb * CELLS_PER_MB))
+            source, cov, runs = export_scan.scan_cells_spilled(export, exclude, max_cells, spill_dir)
+            print(f"  {clone}: {len(runs)} sorted run(s) of <= {max_cells} cells spilled", file=sys.stderr)
+            return _store(clone, export, force, source, cov, merge_runs(runs, spill_dir))
+
+    # the scan also hashes the file, over the decompressed bytes, so an export
+    # first seen under another name or compression is still caught in _store
+    scan = export_scan.load_or_scan(export, exclude, use_cache, jobs=jobs, products=("cells",), save=save_scan)
+    rows = sorted((d, u, c["in"], c["out"], sorted(c["ch"])) for (u, d), c in scan.cells().items())
+    return _store(clone, export, force, scan.source, scan.coverage, rows)
+
+
+def _ingested_as(entry: dict, digest: str) -> list:
+    return sorted(mo for mo, meta in entry["months"].items() if meta.get("sha256") == digest)
+
+
+def _already_ingested(clone: str, export: str) -> bool:
+    """Whether this exact export is already in the store, checked before any
+    parsing so a repeat ingest costs one hash pass instead of a full scan.
+
+    A plain export only gets hashed when its size matches a stored month's
+    source; a compressed one is hashed as it decompresses (cheap next to a
+    scan), since its decompressed size is not known up front."""
+    entry = load_manifest()["clones"].get(clone)
+    if not entry or not entry["months"]:
+        return False
+    if not export_scan.compression(export):
+        sizes = {meta.get("source_bytes") for meta in entry["months"].values()}
+        if os.path.getsize(export) not in sizes and None not in sizes:   # None: stored before sizes were
+            return False
+    already = _ingested_as(entry, export_scan.fingerprint(export)["sha256"])
+    if already:
+        print(f"  {clone}: this exact file is already ingested as {already} — skipping "
+              f"(use --force to re-ingest)")
+    return bool(already)
+
+
+def _store(clone: str, export: str, force: bool, source: dict, cov: dict, rows) -> int:
+    """Write [day, contact, in, out, channels] rows, sorted by (day, contact),
+    as month files and record them in the manifest."""
     man = load_manifest()
     entry = man["clones"].setdefault(clone, {"months": {}})
-
-    digest = sha256(export)
-    already = [mo for mo, meta in entry["months"].items() if meta.get("sha256") == digest]
+    digest = source["sha256"]
+    already = _ingested_as(entry, digest)
     if already and not force:
-        print(f"  {clone}: this exact file is already ingested as {sorted(already)} — skipping "
+        print(f"  {clone}: this exact file is already ingested as {already} — skipping "
               f"(use --force to re-ingest)")
         return 0
 
-    cells, cov = parse_export(export, exclude)
-    if not cells:
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
         print(f"  {clone}: no real-contact activity found in {os.path.basename(export)}")
         return 0
 
-    by_month = collections.defaultdict(list)
-    for (u, d), c in cells.items():
-        by_month[d[:7]].append({"u": u, "d": d, "in": c["in"], "out": c["out"],
-                                "ch": sorted(c["ch"])})
-
     os.makedirs(os.path.join(STORE, clone), exist_ok=True)
+    contacts = load_contacts(clone, man)
     written = 0
-    for month, rows in sorted(by_month.items()):
+    for month, group in itertools.groupby(itertools.chain([first], rows), key=lambda r: r[0][:7]):
         path = os.path.join(STORE, clone, f"{month}.jsonl")
         if os.path.exists(path) and not force:
             print(f"  {clone} {month}: already stored ({sum(1 for _ in open(path))} rows) — "
                   f"skipping (use --force to replace)")
             continue
-        rows.sort(key=lambda r: (r["d"], r["u"]))
+        stats = MonthStats()
+        seg = store_segments.SegmentWriter()
         with open(path, "w") as f:
-            for r in rows:
-                f.write(json.dumps(r, separators=(",", ":")) + "\n")
-        contacts = len({r["u"] for r in rows})
-        inb = sum(r["in"] for r in rows)
+            for d, u, i, o, ch in group:
+                u = contacts.id(u)
+                f.write(json.dumps({"u": u, "d": d, "in": i, "out": o, "ch": ch},
+                                   separators=(",", ":")) + "\n")
+                stats.add(u, d, i, o, ch)
+                if seg is not None:
+                    try:
+                        seg.add(u, d, i, o, ch)
+                    except ValueError as e:
+                        print(f"  {clone} {month}: {e}", file=sys.stderr)
+                        seg = None
+            contacts.flush()   # ids on disk before any month that uses them
+        _write_segment(path, seg)
         entry["months"][month] = {
-            "rows": len(rows), "contacts": contacts, "inbound_messages": inb,
-            "outbound_messages": sum(r["out"] for r in rows),
+            **stats.meta(),
             "source_file": os.path.basename(export),
-            "source_bytes": os.path.getsize(export),
+            "source_bytes": source["bytes"],        # decompressed, like the sha256
+            "source_compression": source.get("compression"),
             "sha256": digest,
             "ingested_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
             "export_coverage": cov,
         }
-        print(f"  {clone} {month}: {len(rows)} rows · {contacts} contacts · {inb} inbound msgs")
+        print(f"  {clone} {month}: {stats.rows} rows · {len(stats.present)} contacts · "
+              f"{stats.inb} inbound msgs")
         written += 1
 
+    entry["contact_ids"] = len(contacts)
     save_manifest(man)
     return written
 
@@ -201,41 +416,159 @@ def status(clone_filter):
 
 # --------------------------------------------------------------------- read --
 
-def load(clone: str, months=None) -> dict:
-    """Store -> {contact: {date: {'in':n,'out':n,'ch':[...]}}}, all months merged."""
-    out = collections.defaultdict(dict)
+def _write_segment(jsonl_path: str, seg):
+    spath = jsonl_path[:-len(".jsonl")] + ".seg"
+    if seg is not None:
+        seg.write(spath)
+    elif os.path.exists(spath):
+        os.remove(spath)   # never leave one that disagrees with the JSONL
+
+
+def _read_jsonl(path: str):
+    with open(path) as f:
+        for line in f:
+            r = json.loads(line)
+            yield r["d"], r["u"], r["in"], r["out"], r.get("ch", [])
+
+
+def _month_files(clone: str, months=None) -> list:
+    """[(month, jsonl path), ...] in month order."""
     d = os.path.join(STORE, clone)
     if not os.path.isdir(d):
-        return out
-    for fn in sorted(os.listdir(d)):
-        if not fn.endswith(".jsonl"):
-            continue
-        if months and fn[:-6] not in months:
-            continue
-        for line in open(os.path.join(d, fn)):
-            r = json.loads(line)
-            # union across months is idempotent -- a duplicated day just overwrites
-            out[r["u"]][r["d"]] = {"in": r["in"], "out": r["out"], "ch": r.get("ch", [])}
+        return []
+    return [(fn[:-6], os.path.join(d, fn)) for fn in sorted(os.listdir(d))
+            if fn.endswith(".jsonl") and fn != CONTACTS and not (months and fn[:-6] not in months)]
+
+
+def read_month(jsonl_path: str, contacts: ContactDict) -> store_segments.Segment:
+    """One month as columns: from its segment when that is at least as new as
+    the JSONL, else parsed from the JSONL. Emails in a month stored before
+    contact ids are looked up in `contacts` (new ones get ids in memory only)."""
+    spath = jsonl_path[:-len(".jsonl")] + ".seg"
+    try:
+        if os.stat(spath).st_mtime_ns >= os.stat(jsonl_path).st_mtime_ns:
+            return store_segments.read(spath)
+    except (OSError, ValueError):
+        pass
+    w = store_segments.SegmentWriter()
+    for d, u, i, o, ch in _read_jsonl(jsonl_path):
+        w.add(contacts.id(u) if isinstance(u, str) else u, d, i, o, ch)
+    return w.segment()
+
+
+class Columns:
+    """Every row of the selected months as flat columns, in store order (months
+    ascending, then day, then contact). `contact` ids index `contacts.emails`;
+    `ch` bits index `channels`; `day` is days since 1970."""
+
+    def __init__(self, contacts: ContactDict):
+        self.contacts, self.channels = contacts, []
+        self.cols = {c: array.array(store_segments.TYPES[c]) for c in store_segments.COLUMNS}
+        self._names = {}
+
+    def __len__(self) -> int:
+        return len(self.cols["contact"])
+
+    def channel_names(self, mask: int) -> list:
+        """Bitmask -> sorted channel names (the JSONL "ch" list)."""
+        names = self._names.get(mask)
+        if names is None:
+            names = self._names[mask] = sorted(c for b, c in enumerate(self.channels) if mask >> b & 1)
+        return names
+
+
+def load_columns(clone: str, months=None) -> Columns:
+    """Store -> Columns. Segments load with one read each and already use the
+    clone's contact ids; only channel bits are renumbered clone-wide."""
+    out, bits = Columns(load_contacts(clone)), {}
+    cols = out.cols
+    for _, path in _month_files(clone, months):
+        seg = read_month(path, out.contacts)
+        bmap = [bits.setdefault(c, len(bits)) for c in seg.channels]
+        if len(bits) > store_segments.MAX_CHANNELS:
+            raise ValueError(f"{clone}: more than {store_segments.MAX_CHANNELS} channels across months")
+        if bmap == list(range(len(bmap))):
+            cols["ch"].extend(seg.cols["ch"])
+        else:
+            masks = {}
+            for m in set(seg.cols["ch"]):
+                masks[m] = sum(1 << bmap[b] for b in range(len(bmap)) if m >> b & 1)
+            cols["ch"].extend([masks[m] for m in seg.cols["ch"]])
+        for c in ("contact", "day", "in", "out"):
+            cols[c].extend(seg.cols[c])
+    out.channels = list(bits)
     return out
 
 
+def segment(clone_filter=None):
+    """Rewrite months still keyed by email onto contact ids, then (re)write the
+    binary segment and the manifest aggregates of every stored month from its
+    JSONL."""
+    man = load_manifest()
+    for clone in sorted(man["clones"]):
+        if clone_filter and clone != clone_filter:
+            continue
+        contacts = load_contacts(clone, man)
+        for month, path in _month_files(clone):
+            rows = list(_read_jsonl(path))
+            if any(isinstance(r[1], str) for r in rows):
+                rows = [(d, contacts.id(u) if isinstance(u, str) else u, i, o, ch)
+                        for d, u, i, o, ch in rows]
+                contacts.flush()
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    for d, u, i, o, ch in rows:
+                        f.write(json.dumps({"u": u, "d": d, "in": i, "out": o, "ch": ch},
+                                           separators=(",", ":")) + "\n")
+                os.replace(tmp, path)
+                print(f"  {clone} {month}: emails -> contact ids")
+            stats, w = MonthStats(), store_segments.SegmentWriter()
+            for d, u, i, o, ch in rows:
+                stats.add(u, d, i, o, ch)
+                if w is not None:
+                    try:
+                        w.add(u, d, i, o, ch)
+                    except ValueError as e:
+                        print(f"  {clone} {month}: {e}", file=sys.stderr)
+                        w = None
+            if month in man["clones"][clone]["months"]:
+                man["clones"][clone]["months"][month].update(stats.meta())
+            _write_segment(path, w)
+            if w is not None:
+                print(f"  {clone} {month}: {len(w.cols['contact'])} rows -> segment")
+        man["clones"][clone]["contact_ids"] = len(contacts)
+    save_manifest(man)
+
+
 def main():
     ap = argparse.ArgumentParser(description="Durable engagement store for Delphi exports.")
     sub = ap.add_subparsers(dest="cmd", required=True)
 
     i = sub.add_parser("ingest", help="Add an export to the store.")
     i.add_argument("--clone", required=True, help="Clone slug, e.g. karamo.")
-    i.add_argument("--export", required=True)
+    i.add_argument("--export", required=True, help="NDJSON export; .gz / .bz2 / .zst are read as-is.")
     i.add_argument("--force", action="store_true", help="Replace months already stored.")
     i.add_argument("--exclude-email", action="append", default=[])
+    i.add_argument("--max-memory-mb", type=float,
+                   help="Cap the (contact, day) table at about this size: spill sorted runs to "
+                        "out/tmp/ and merge them. For exports too big for RAM; same month files.")
+    export_scan.add_scan_args(i)
 
     s = sub.add_parser("status", help="Show what the store holds.")
     s.add_argument("--clone")
 
+    g = sub.add_parser("segment", help="Move months stored before contact ids onto them and "
+                                       "rebuild the binary month segments and manifest "
+                                       "aggregates from the JSONL.")
+    g.add_argument("--clone")
+
     args = ap.parse_args()
     if args.cmd == "ingest":
         exclude = d30.DEFAULT_EXCLUDE | {e.lower() for e in args.exclude_email}
-        ingest(args.clone, args.export, args.force, exclude)
+        ingest(args.clone, args.export, args.force, exclude, not args.no_scan_cache,
+               export_scan.parse_jobs(args), args.max_memory_mb, args.scan_cache)
+    elif args.cmd == "segment":
+        segment(args.clone)
     else:
         status(args.clone)
 
@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+"""One pass over a Delphi NDJSON export for every script that reads it (PII -- keep local).
+
+WHY
+---
+inbound_engagement, engagement_store ingest and d30_retention --export each
+read the same multi-hundred-MB export and json.loads every line of it, and all
+three run on every new export -- three full parses of one file. This reads it
+once and produces what they need:
+
+    inbound     per user: inbound days, inbound message count, medium mix;
+                plus the sender / medium mix      -> inbound_engagement
+    cells       per (contact, day): in / out / channels, plus the coverage
+                summary and the file's sha256      -> engagement_store ingest
+    starts      per user: each thread's first message time
+                                                   -> d30_retention.load_from_export
+
+A script run on its own builds only its own product and writes nothing:
+parsing for all three and saving the result costs two to three times the
+one-product parse. To parse once for several scripts, run export_scan.py
+itself (or pass --scan-cache to the first script); that saves every product
+
+    out/cache/exports/<key>.json
+    out/cache/exports/<key>.index.json    thread index: byte offset, owner and
+                                          time span of every line (ThreadIndex)
+
+keyed by the export's path, size and mtime and the exclusion list, and the
+others load the saved result in a fraction of the time. Editing or replacing
+the file changes the key; there is nothing to invalidate by hand.
+
+Each product is exactly what that script's own loop used to build, including
+its quirks: cells key contacts lower-cased, inbound and d30 keep the address
+as written. A malformed line is counted and skipped everywhere; it used to
+abort two of the three scripts.
+
+All three need only user_email, medium and each message's sender and
+created_at. project() cuts every line down to exactly that as it is decoded;
+message text and citations never reach the accumulator, and any string over
+BODY_SKIP_BYTES is blanked before json.loads even sees it.
+
+Usage:
+    python3 scripts/export_scan.py --export conv.ndjson   # parse once for all, print coverage
+    python3 scripts/export_scan.py --export conv.ndjson.gz   # or .bz2 / .zst (zstandard)
+    python3 scripts/export_scan.py --export conv.ndjson --contact someone@example.com
+    python3 scripts/export_scan.py --export conv.ndjson --since 2026-05-01 --until 2026-05-07
+    python3 scripts/inbound_engagement.py --export conv.ndjson
+    python3 scripts/engagement_store.py ingest --clone karamo --export conv.ndjson
+    python3 scripts/d30_retention.py --export conv.ndjson
+"""
+import argparse, bz2, collections, concurrent.futures, datetime, gzip, hashlib, io, json, os, re, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import d30_retention as d30
+import history_cache
+import timestamps
+
+SCAN_ROOT = os.path.join(history_cache.CACHE_ROOT, "exports")
+SCAN_VERSION = 3
+PARALLEL_MIN_BYTES = 8 << 20     # below this a process pool costs more than it saves
+MAX_CHUNK_BYTES = 64 << 20       # per-worker read; keeps memory flat on multi-GB files
+
+# Recognised by content, not by name: conv.ndjson.gz renamed to conv.ndjson still works.
+MAGIC = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\x28\xb5\x2f\xfd": "zstd"}
+
+INBOUND = {"user", "USER"}                 # the human
+OUTBOUND = {"agent", "owner", "CLONE"}     # the AI, or the creator broadcasting
+
+# JSON strings longer than this (message text, citations, transcripts) are
+# emptied before a line is decoded, so no body is ever built as a str -- on a
+# 50 MB thread that is 50-200 MB not allocated. No field the scan reads comes
+# near it.
+BODY_SKIP_BYTES = 256
+# Lines over this are blanked without the escape swap in _blank, which would
+# hold a second copy of the line.
+SWAP_MAX_BYTES = 1 << 20
+# Every JSON string on the line, in order (outside strings JSON has no quotes,
+# so consecutive matches stay aligned). Possessive quantifiers (3.11+) keep the
+# regex engine from stacking a backtrack mark per escape inside a long body.
+try:
+    _STRING = re.compile(rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"')
+except re.error:
+    _STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+# A long string body once no quote inside one is escaped. Between two strings
+# it can only match structure, and emptying that leaves two strings side by
+# side -- invalid JSON, so project() falls back to a full decode.
+_LONG = re.compile(rb'"[^"]{%d,}"' % (BODY_SKIP_BYTES + 1))
+
+
+def _blank_long(m):
+    return b'""' if m.end() - m.start() > BODY_SKIP_BYTES + 2 else m.group()
+
+
+def _blank(line: bytes) -> bytes:
+    """`line` with every string body over BODY_SKIP_BYTES emptied.
+
+    When a quote is escaped somewhere, escaped backslashes and quotes are
+    first swapped for two-byte placeholders (control bytes, which valid JSON
+    never holds raw) so every remaining quote delimits a string; then one
+    regex with a constant replacement empties the long ones. It all runs in
+    C -- a Python callback per string cost more than the decode it saved."""
+    if len(line) > SWAP_MAX_BYTES:
+        return _STRING.sub(_blank_long, line)
+    escaped = b'\\"' in line
+    if escaped:
+        if b"\0" in line or b"\1" in line:
+            return line   # not valid JSON; let json.loads say so
+        line = line.replace(b"\\\\", b"\0\0").replace(b'\\"', b"\1\1")
+    line = _LONG.sub(b'""', line)
+    if escaped:
+        line = line.replace(b"\1\1", b'\\"').replace(b"\0\0", b"\\\\")
+    return line
+
+
+def project(line: bytes) -> tuple:
+    """One export line -> (user_email as written, medium, [(sender, created_at), ...]).
+
+    Everything else in the thread -- text, citations, ids -- is dropped here,
+    so nothing downstream holds a message body, and long bodies are blanked
+    (see _blank) before they are decoded at all. Raises ValueError on a
+    malformed line."""
+    try:
+        t = json.loads(_blank(line))
+    except ValueError:
+        t = json.loads(line)   # the blanking met something unusual -- decode it in full
+    return (t.get("user_email", ""), t.get("medium"),
+            [(m.get("sender"), m.get("created_at")) for m in t.get("messages", [])])
+
+
+PRODUCTS = ("cells", "starts", "inbound")
+
+
+class Accumulator:
+    """Folds parsed threads into coverage plus the requested `products` (see
+    PRODUCTS) and, with `index`, the thread index rows. Nothing is computed
+    for a product nobody asked for -- not even the timestamp parses."""
+
+    def __init__(self, exclude: set, products=PRODUCTS, index: bool = False):
+        unknown = set(products) - set(PRODUCTS)
+        if unknown:
+            raise ValueError(f"unknown scan product(s): {sorted(unknown)}")
+        self.exclude = exclude
+        self.products = tuple(p for p in PRODUCTS if p in products)
+        self.index = index
+        self._cells, self._starts, self._inbound = (p in products for p in PRODUCTS)
+        self.threads = self.skipped = self.malformed = 0
+        self.seen_days = set()
+        self.cells = {}                                   # (contact, day) -> [in, out, {channels}]
+        self.starts = {}                                  # email -> [first message datetime per thread]
+        self.inbound_threads = 0
+        self.reached = set()
+        self.inbound_days = collections.defaultdict(set)  # email -> {date}
+        self.inbound_msgs = collections.Counter()
+        self.sender_counts = collections.Counter()
+        self.medium_counts = collections.Counter()
+        self.medium_by_user = collections.defaultdict(collections.Counter)
+        self._real = {}                                   # address -> is_real, memoised
+        self.lines = []                                   # per line: (offset, length, email, first, last)
+
+    def _is_real(self, email: str) -> bool:
+        # The same few thousand addresses recur on every thread; check each once.
+        real = self._real.get(email)
+        if real is None:
+            real = self._real[email] = bool(email) and d30.is_real(email, self.exclude)
+        return real
+
+    def add(self, rec: tuple, at: tuple = None):
+        """Fold one projected thread (see project()); `at` = (offset, length)
+        of its line when the file is seekable, for the thread index."""
+        self.threads += 1
+        raw, medium, msgs = rec
+        email = (raw or "").strip()
+        real = self._is_real(email)
+        indexed = at is not None and self.index
+        # d30_retention.load_from_export keys the address as written
+        starts = self._starts and (real if raw == email else self._is_real(raw))
+        if not (real or indexed or starts):
+            self.skipped += 1
+            return
+        if not (indexed or starts or self._cells):
+            if self._inbound:   # real, or the check above returned
+                self._add_inbound(email, medium or "unknown", msgs)
+            return
+        times = [timestamps.parse(c) for _, c in msgs]
+
+        if indexed or starts:
+            parsed = [x for x in times if x]
+            if indexed:
+                first = last = None
+                if parsed:
+                    try:
+                        first, last = timestamps.epoch(min(parsed)), timestamps.epoch(max(parsed))
+                    except TypeError:   # naive and aware mixed -- compare as UTC seconds
+                        secs = [timestamps.epoch(x) for x in parsed]
+                        first, last = min(secs), max(secs)
+                self.lines.append((at[0], at[1], raw if isinstance(raw, str) else "", first, last))
+            if starts and parsed:
+                self.starts.setdefault(raw, []).append(min(parsed))
+
+        if not real:
+            self.skipped += 1
+            return
+        ch = medium or "unknown"
+
+        # engagement_store ingest: (contact, day) rollup cells
+        if self._cells:
+            key = email.lower()
+            for (s, c), ts in zip(msgs, times):
+                b = ts and timestamps.bucket(c, ts)
+                if not b:
+                    continue
+                self.seen_days.add(b[0])
+                cell = self.cells.get((key, b[1]))
+                if cell is None:
+                    cell = self.cells[(key, b[1])] = [0, 0, set()]
+                if s in INBOUND:
+                    cell[0] += 1
+                elif s in OUTBOUND:
+                    cell[1] += 1
+                cell[2].add(ch)
+
+        if self._inbound:
+            self._add_inbound(email, ch, msgs)
+
+    def _add_inbound(self, email: str, ch: str, msgs: list):
+        """inbound_engagement: what the human sent, by day. Only the inbound
+        messages' timestamps are parsed."""
+        self.inbound_threads += 1
+        self.reached.add(email)
+        self.medium_counts[ch] += 1
+        self.medium_by_user[email][ch] += 1
+        for s, c in msgs:
+            self.sender_counts[s] += 1
+            if s in INBOUND:
+                b = timestamps.bucket(c)
+                if b:
+                    self.inbound_days[email].add(b[0])
+                    self.inbound_msgs[email] += 1
+
+    def merge(self, other: "Accumulator"):
+        """Fold in the accumulator of the chunk that FOLLOWS this one in the file.
+
+        Dicts keep first-seen order and lists keep file order, so merging the
+        chunks in file order reproduces the serial pass exactly."""
+        self.threads += other.threads
+        self.skipped += other.skipped
+        self.malformed += other.malformed
+        self.inbound_threads += other.inbound_threads
+        self.seen_days |= other.seen_days
+        for key, (i, o, ch) in other.cells.items():
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [i, o, ch]
+            else:
+                cell[0] += i
+                cell[1] += o
+                cell[2] |= ch
+        for e, ts in other.starts.items():
+            self.starts.setdefault(e, []).extend(ts)
+        self.reached |= other.reached
+        for e, ds in other.inbound_days.items():
+            self.inbound_days[e] |= ds
+        for counter, more in ((self.inbound_msgs, other.inbound_msgs),
+                              (self.sender_counts, other.sender_counts),
+                              (self.medium_counts, other.medium_counts)):
+            for k, n in more.items():
+                counter[k] += n
+        for e, c in other.medium_by_user.items():
+            mine = self.medium_by_user[e]
+            for k, n in c.items():
+                mine[k] += n
+        self.lines.extend(other.lines)
+
+    def thread_index(self, source: dict) -> dict:
+        """The thread index sidecar (see ThreadIndex): one row per thread line,
+        addresses stored once and referenced by position."""
+        emails, rows = {}, []
+        for off, n, raw, first, last in self.lines:
+            rows.append([off, n, emails.setdefault(raw, len(emails)), first, last])
+        return {"version": SCAN_VERSION, "source": source, "emails": list(emails), "lines": rows}
+
+    def coverage(self) -> dict:
+        """Counts, and the span of message days -- bucketed only for the cells
+        product, so None in a scan that did not build it."""
+        days = self.seen_days
+        dated = self._cells
+        return {
+            "threads": self.threads,
+            "threads_skipped_placeholder_or_fake": self.skipped,
+            "malformed_lines": self.malformed,
+            "first_day": min(days).isoformat() if days else None,
+            "last_day": max(days).isoformat() if days else None,
+            "active_days": len(days) if dated else None,
+        }
+
+    def product(self, source: dict) -> dict:
+        """The saved (JSON) form: version, source, coverage and each product built."""
+        out = {"version": SCAN_VERSION, "source": source, "coverage": self.coverage()}
+        if self._cells:
+            out["cells"] = [[u, d, c[0], c[1], sorted(c[2])] for (u, d), c in self.cells.items()]
+        if self._starts:
+            out["starts"] = {e: [x.isoformat() for x in sorted(ts)] for e, ts in self.starts.items()}
+        if self._inbound:
+            out["inbound"] = {
+                "threads": self.inbound_threads,
+                "reached": sorted(self.reached),
+                "days": {e: sorted(d.isoformat() for d in ds) for e, ds in self.inbound_days.items()},
+                "messages": dict(self.inbound_msgs),
+                # [value, count] pairs: a sender can be null, which a JSON key cannot
+                "sender_mix": [[s, n] for s, n in self.sender_counts.items()],
+                "medium_mix": [[m, n] for m, n in self.medium_counts.items()],
+                "medium_by_user": {e: [[m, n] for m, n in c.items()] for e, c in self.medium_by_user.items()},
+            }
+        return out
+
+
+def _feed(acc: Accumulator, lines):
+    """`lines`: (offset, line) pairs; offset is None when the input is not seekable.
+    A line keeps its newline; the index records its length without it."""
+    for off, line in lines:
+        if not line or line.isspace():   # no strip(): on a huge line that is a full copy
+            continue
+        try:
+            rec = project(line)
+        except ValueError:
+            acc.malformed += 1
+            continue
+        acc.add(rec, None if off is None else (off, len(line) - line.endswith(b"\n")))
+
+
+def compression(path: str):
+    """'gzip' / 'bz2' / 'zstd', or None for a plain export."""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    for magic, kind in MAGIC.items():
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def open_export(path: str, kind: str = None):
+    """Binary stream of the export's canonical (decompressed) bytes.
+
+    zstd is not in the stdlib before 3.14; elsewhere it needs the optional
+    `zstandard` package, and without it this exits with what to do instead."""
+    kind = kind or compression(path)
+    if kind == "gzip":
+        return gzip.open(path, "rb")
+    if kind == "bz2":
+        return bz2.open(path, "rb")
+    if kind == "zstd":
+        try:
+            from compression import zstd   # 3.14+
+            return zstd.open(path, "rb")
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit(f"{path} is zstd-compressed: `pip install zstandard`, or decompress it first "
+                     f"(zstd -d {os.path.basename(path)}).")
+        return io.BufferedReader(zstandard.open(path, "rb"))   # its reader has no readline
+    return open(path, "rb")
+
+
+def _lines(f, start: int = 0, end: int = None):
+    """(offset, line) for each line of binary file `f` from `start` (a line
+    start) up to `end`, read through the file's own buffer."""
+    f.seek(start)
+    for line in f:
+        if end is not None and start >= end:
+            return
+        yield start, line
+        start += len(line)
+
+
+def _chunk_bounds(path: str, size: int, jobs: int) -> list:
+    """[(start, end), ...] covering the file, every boundary just after a newline."""
+    n = max(jobs * 4, -(-size // MAX_CHUNK_BYTES))
+    cuts = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n):
+            at = max(size * i // n, cuts[-1])
+            f.seek(at - 1 if at else 0)
+            f.readline()                 # finish the line the cut landed in
+            cut = f.tell()
+            if cut >= size:
+                break
+            if cut > cuts[-1]:
+                cuts.append(cut)
+    cuts.append(size)
+    return list(zip(cuts, cuts[1:]))
+
+
+def _scan_chunk(path: str, start: int, end: int, exclude: set, products, index: bool) -> Accumulator:
+    acc = Accumulator(exclude, products, index)
+    with open(path, "rb") as f:
+        _feed(acc, _lines(f, start, end))
+    return acc
+
+
+class _Digest:
+    """sha256 and length of the canonical bytes, fed as they are read."""
+
+    def __init__(self):
+        self.h = hashlib.sha256()
+        self.bytes = 0
+
+    def update(self, data):
+        self.h.update(data)
+        self.bytes += len(data)
+
+    def source(self, path: str, kind: str) -> dict:
+        return {"file": os.path.basename(path), "bytes": self.bytes, "sha256": self.h.hexdigest(),
+                "compression": kind}
+
+
+def fingerprint(path: str) -> dict:
+    """The scan's `source` dict (sha256 and size of the canonical bytes)
+    without parsing anything -- one streaming read."""
+    kind = compression(path)
+    digest = _Digest()
+    with open_export(path, kind) as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.source(path, kind)
+
+
+def _read(path: str, kind: str, digest: _Digest):
+    """(offset, line) over the whole export, hashing it on the way."""
+    if kind:
+        with open_export(path, kind) as f:
+            for raw in f:
+                digest.update(raw)
+                yield None, raw
+    else:
+        with open(path, "rb") as f:
+            for off, line in _lines(f):
+                digest.update(line)
+                yield off, line
+
+
+def scan(path: str, exclude: set, jobs: int = 1, products=PRODUCTS, index: bool = False) -> tuple:
+    """Parse the export once -> (Accumulator, source dict).
+
+    Builds coverage plus only the `products` asked for (see the module
+    docstring), and with `index` the thread index rows -- which only a plain
+    (seekable) export gets; see ThreadIndex.
+
+    A .gz / .bz2 / .zst export is decompressed as a stream, never to disk;
+    sha256 and byte count are over the decompressed bytes, so a compressed
+    copy of an export is recognised as the same export. A plain file is read
+    line by line through an ordinary buffered file: mapping it instead grew
+    peak RSS by the mapped pages with no measurable speedup.
+
+    jobs > 1 parses newline-aligned chunks of a plain export in a process
+    pool and merges them in file order -- the product is identical to the
+    serial one. A compressed stream cannot be split, so it is read serially."""
+    kind = compression(path)
+    digest = _Digest()
+    size = os.path.getsize(path)
+    if not kind and jobs > 1 and size >= PARALLEL_MIN_BYTES:
+        bounds = _chunk_bounds(path, size, jobs)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as ex:
+            futures = [ex.submit(_scan_chunk, path, a, b, exclude, products, index) for a, b in bounds]
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            acc = futures[0].result()
+            for fut in futures[1:]:
+                acc.merge(fut.result())
+    else:
+        acc = Accumulator(exclude, products, index and not kind)
+        _feed(acc, _read(path, kind, digest))
+    return acc, digest.source(path, kind)
+
+
+def scan_cells_spilled(path: str, exclude: set, max_cells: int, spill_dir: str) -> tuple:
+    """The cells product alone, in bounded memory -> (source, coverage, runs).
+
+    For exports whose (contact, day) table will not fit in RAM: whenever
+    `max_cells` cells are held they are written to `spill_dir` as a run --
+    [day, contact, in, out, [channels]] JSON lines sorted by (day, contact) --
+    and dropped. The same contact-day can appear in several runs; the caller
+    k-way merges them (engagement_store.merge_runs). Serial, uncached, and
+    builds nothing but cells and coverage."""
+    kind = compression(path)
+    digest = _Digest()
+    acc = Accumulator(exclude, ("cells",))
+    runs = []
+
+    def spill():
+        if not acc.cells:
+            return
+        run = os.path.join(spill_dir, f"run-{len(runs):05d}.jsonl")
+        with open(run, "w") as f:
+            for (u, d), (i, o, ch) in sorted(acc.cells.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+                f.write(json.dumps([d, u, i, o, sorted(ch)], separators=(",", ":")) + "\n")
+        runs.append(run)
+        acc.cells = {}
+        acc._real = {}
+
+    def lines():
+        for item in _read(path, kind, digest):
+            yield item
+            if len(acc.cells) >= max_cells:
+                spill()
+
+    _feed(acc, lines())
+    spill()
+    source = digest.source(path, kind)
+    return source, acc.coverage(), runs
+
+
+def _cache_path(path: str, exclude: set) -> str:
+    st = os.stat(path)
+    ident = json.dumps([os.path.abspath(path), st.st_size, st.st_mtime_ns, sorted(exclude), SCAN_VERSION])
+    return os.path.join(SCAN_ROOT, hashlib.sha256(ident.encode()).hexdigest()[:24] + ".json")
+
+
+def _index_path(path: str) -> str:
+    # The index does not depend on the exclusion list; one per file.
+    st = os.stat(path)
+    ident = json.dumps([os.path.abspath(path), st.st_size, st.st_mtime_ns, SCAN_VERSION])
+    return os.path.join(SCAN_ROOT, hashlib.sha256(ident.encode()).hexdigest()[:24] + ".index.json")
+
+
+def _save(path: str, obj: dict):
+    os.makedirs(SCAN_ROOT, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _fresh(path: str, exclude: set, jobs: int, products, index: bool, save: bool, verbose: bool) -> tuple:
+    """Scan now -> (Accumulator, source). With `save`, every product and the
+    thread index are built whatever was asked for, and written for the next
+    script to load."""
+    t0 = time.monotonic()
+    acc, source = scan(path, exclude, jobs, PRODUCTS if save else products, index or save)
+    if verbose:
+        print(f"scanned {os.path.basename(path)} ({source['bytes'] / 1e6:.1f} MB, "
+              f"{acc.threads} threads) in {time.monotonic() - t0:.1f}s", file=sys.stderr)
+    if save:
+        _save(_cache_path(path, exclude), acc.product(source))
+        if not source["compression"]:
+            _save(_index_path(path), acc.thread_index(source))
+    return acc, source
+
+
+def load_or_scan(path: str, exclude: set, use_cache: bool = True, verbose: bool = True,
+                 jobs: int = 1, products=PRODUCTS, save: bool = False) -> "ExportScan":
+    """The saved scan of this exact file if there is one (and `use_cache`),
+    else a fresh scan building only `products`.
+
+    A fresh scan is written out only with `save` -- then with every product
+    and the thread index, so the other scripts can load it. `jobs` only
+    changes how fast a fresh scan runs, never its result."""
+    cpath = _cache_path(path, exclude)
+    if use_cache and os.path.exists(cpath):
+        try:
+            product = json.load(open(cpath))
+            if product.get("version") == SCAN_VERSION:
+                return ExportScan(product)
+        except ValueError:
+            pass  # torn write -- rescan
+    acc, source = _fresh(path, exclude, jobs, products, False, save, verbose)
+    return ExportScan({"version": SCAN_VERSION, "source": source, "coverage": acc.coverage()}, acc)
+
+
+class ExportScan:
+    """Read-side view of a scan, in each consumer's native shape: taken
+    straight from a fresh scan's Accumulator, or decoded from a saved product."""
+
+    def __init__(self, product: dict, acc: Accumulator = None):
+        self.product = product   # the saved form; only version / source / coverage with `acc`
+        self.source = product["source"]
+        self.coverage = product["coverage"]
+        self.products = acc.products if acc is not None else tuple(p for p in PRODUCTS if p in product)
+        self._acc = acc
+
+    def _need(self, name: str):
+        if name not in self.products:
+            raise ValueError(f"this scan did not build {name!r} (it has {', '.join(self.products) or 'none'})")
+
+    def cells(self) -> dict:
+        """engagement_store shape: {(contact, date): {'in', 'out', 'ch': set}}."""
+        self._need("cells")
+        if self._acc is not None:
+            return {k: {"in": i, "out": o, "ch": ch} for k, (i, o, ch) in self._acc.cells.items()}
+        return {(u, d): {"in": i, "out": o, "ch": set(ch)} for u, d, i, o, ch in self.product["cells"]}
+
+    def starts(self) -> dict:
+        """d30 shape: {email: sorted [thread start datetimes]}."""
+        self._need("starts")
+        if self._acc is not None:
+            return {e: sorted(ts) for e, ts in self._acc.starts.items()}
+        return {e: [timestamps.parse(x) for x in ts] for e, ts in self.product["starts"].items()}
+
+    def inbound(self) -> dict:
+        """inbound_engagement's tallies, as sets / Counters."""
+        self._need("inbound")
+        a = self._acc
+        if a is not None:
+            return {
+                "threads": a.inbound_threads,
+                "reached": a.reached,
+                "inbound_days": a.inbound_days,
+                "inbound_msgs": a.inbound_msgs,
+                "sender_counts": a.sender_counts,
+                "medium_counts": a.medium_counts,
+                "medium_by_user": a.medium_by_user,
+            }
+        p = self.product["inbound"]
+        days = collections.defaultdict(set)
+        for e, ds in p["days"].items():
+            days[e] = {datetime.date.fromisoformat(d) for d in ds}
+        by_user = collections.defaultdict(collections.Counter)
+        for e, pairs in p["medium_by_user"].items():
+            by_user[e] = collections.Counter(dict(pairs))
+        return {
+            "threads": p["threads"],
+            "reached": set(p["reached"]),
+            "inbound_days": days,
+            "inbound_msgs": collections.Counter(p["messages"]),
+            "sender_counts": collections.Counter(dict(p["sender_mix"])),
+            "medium_counts": collections.Counter(dict(p["medium_mix"])),
+            "medium_by_user": by_user,
+        }
+
+
+class ThreadIndex:
+    """Where each thread of a plain export sits, whose it is, and when it ran.
+
+    Built in the same pass as a scan and saved next to it when the scan is
+    (out/cache/exports/<key>.index.json), so tools can seek straight to one
+    contact's threads, or to the threads overlapping a date range, instead
+    of grepping or re-parsing the whole file:
+
+        emails   every user_email as written, once
+        lines    [offset, length, email #, first, last] per thread line;
+                 first / last are the earliest / latest message times in
+                 epoch seconds, null when no message had a usable time
+
+    Compressed exports are not seekable and get no index."""
+
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.source = data["source"]
+        self.emails = data["emails"]
+        self.lines = data["lines"]
+        self._by_contact = collections.defaultdict(list)
+        for row in self.lines:
+            self._by_contact[self.emails[row[2]].strip().lower()].append(row)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def for_contact(self, email: str) -> list:
+        """Rows of every thread whose user_email matches, ignoring case and padding."""
+        return self._by_contact.get(email.strip().lower(), [])
+
+    def overlapping(self, since=None, until=None) -> list:
+        """Rows of threads with any message in [since, until] (epoch seconds,
+        datetimes or ISO strings; either end may be open)."""
+        secs = lambda x: x if isinstance(x, int) else timestamps.epoch(x)
+        lo = -float("inf") if since is None else secs(since)
+        hi = float("inf") if until is None else secs(until)
+        return [r for r in self.lines if r[3] is not None and r[3] <= hi and r[4] >= lo]
+
+    def raw(self, rows):
+        """The exact bytes of each row's line, read by seeking -- nothing else is read."""
+        with open(self.path, "rb") as f:
+            for off, n, *_ in rows:
+                f.seek(off)
+                yield f.read(n)
+
+    def threads(self, rows):
+        """The full thread dicts for `rows`."""
+        for line in self.raw(rows):
+            yield json.loads(line)
+
+    def starts(self, exclude: set) -> dict:
+        """{email as written: sorted [thread start datetimes, UTC]} for real
+        contacts -- ExportScan.starts() without loading the scan product."""
+        out = {}
+        for i, email in enumerate(self.emails):
+            if d30.is_real(email, exclude):
+                out[i] = []
+        for _, _, e, first, _ in self.lines:
+            if first is not None and e in out:
+                out[e].append(first)
+        return {self.emails[i]: [datetime.datetime.fromtimestamp(t, timestamps.UTC) for t in sorted(ts)]
+                for i, ts in out.items() if ts}
+
+
+def load_index(path: str, exclude: set = None, verbose: bool = True, jobs: int = 1, save: bool = False):
+    """The ThreadIndex of a plain export, or None for a compressed one.
+
+    Without a saved index the export is scanned for the index alone; with
+    `save` that scan builds and writes everything, as load_or_scan's does."""
+    if compression(path):
+        return None
+    ipath = _index_path(path)
+    try:
+        data = json.load(open(ipath))
+        if data.get("version") == SCAN_VERSION:
+            return ThreadIndex(path, data)
+    except (OSError, ValueError):
+        pass  # none yet, or a torn write
+    acc, source = _fresh(path, d30.DEFAULT_EXCLUDE if exclude is None else exclude, jobs, (), True,
+                         save, verbose)
+    return ThreadIndex(path, acc.thread_index(source))
+
+
+def add_scan_args(ap):
+    ap.add_argument("--no-scan-cache", action="store_true",
+                    help="Re-parse the export instead of reusing a saved scan (out/cache/exports, "
+                         "see export_scan.py).")
+    ap.add_argument("--scan-cache", action="store_true",
+                    help="Save this parse -- every product plus the thread index -- for the other "
+                         "export scripts to reuse. Off by default: a one-shot run builds only what "
+                         "it needs and writes nothing.")
+    ap.add_argument("--parse-jobs", type=int, default=1,
+                    help="Parse the export on this many processes (0 = one per CPU). "
+                         "Same result as 1, faster on big files.")
+
+
+def parse_jobs(args) -> int:
+    return args.parse_jobs if args.parse_jobs > 0 else (os.cpu_count() or 1)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Parse an NDJSON export once for every analysis script.")
+    ap.add_argument("--export", required=True, help="NDJSON export; .gz / .bz2 / .zst are read as-is.")
+    ap.add_argument("--exclude-email", action="append", default=[])
+    ap.add_argument("--contact", action="append", default=[],
+                    help="Print this contact's thread lines (NDJSON, as in the export) via the index.")
+    ap.add_argument("--since", help="Print threads with a message on or after this ISO time / YYYY-MM-DD "
+                                    "(with --contact: only theirs).")
+    ap.add_argument("--until", help="... on or before this one (a bare date means through that day).")
+    add_scan_args(ap)
+    args = ap.parse_args()
+    exclude = d30.DEFAULT_EXCLUDE | {e.lower() for e in args.exclude_email}
+    if args.contact or args.since or args.until:
+        idx = load_index(args.export, exclude, jobs=parse_jobs(args), save=not args.no_scan_cache)
+        if idx is None:
+            sys.exit("Compressed exports have no thread index -- decompress it to seek by contact or date.")
+        until = args.until
+        if until and len(until) == 10:
+            until = timestamps.epoch(until) + 86399
+        rows = [r for c in args.contact for r in idx.for_contact(c)]
+        if args.since or args.until:
+            window = idx.overlapping(args.since, until)
+            if args.contact:
+                keep = {id(r) for r in window}
+                rows = [r for r in rows if id(r) in keep]
+            else:
+                rows = window
+        rows = sorted({r[0]: r for r in rows}.values())   # file order, each thread once
+        for line in idx.raw(rows):
+            sys.stdout.buffer.write(line + b"\n")
+        print(f"{len(rows)} of {len(idx)} threads", file=sys.stderr)
+        return 0
+    # this script's own run is the one that saves the scan for the others
+    s = load_or_scan(args.export, exclude, use_cache=not args.no_scan_cache, jobs=parse_jobs(args),
+                     save=not args.no_scan_cache)
+    print(json.dumps({"source": s.source, "coverage": s.coverage,
+                      "contact_days": len(s.cells()), "users": len(s.starts())}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
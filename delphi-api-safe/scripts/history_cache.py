@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Local cache of per-user /v3/conversation/list results (PII -- keep local).
+
+WHY
+---
+d30_retention, retention_trend and audience_audit each pull the full
+conversation list for every candidate on every run -- one API call per user --
+even when the same clone was analysed an hour ago. This keeps what each pull
+returned, per (clone, email), so a repeat run only asks the API about users
+whose answer could have changed:
+
+    out/cache/<clone>/conversations.jsonl   one line per pull, last line wins
+
+    {"e": "<email>", "f": "<fetched-at ISO>", "c": [["<created_at>", "<medium>"], ...]}
+
+An entry is served as-is unless
+
+  * it is older than the TTL (default 24h), or
+  * the caller knows the user was active AFTER it was fetched -- e.g. the
+    export being analysed shows a message newer than the cached pull.
+
+That second rule is what makes an export-driven run (combo mode) safe with a
+long TTL: anyone who talked since we last looked is re-pulled, everyone else
+cannot have new conversations. Users with zero conversations are cached too
+(an empty list is an answer); failed pulls are not.
+
+This also makes the old `--dump-history` hand-off unnecessary in the common
+case: a follow-up run against the same clone is served from here.
+
+The file is append-only and rewritten compactly when superseded lines pile up.
+It lives under out/, alongside the engagement store. Do not commit it.
+"""
+import datetime, json, os, re, threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_ROOT = os.path.join(ROOT, "out", "cache")
+DEFAULT_TTL_HOURS = 24.0
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def clone_dir(clone: str, root: str = CACHE_ROOT) -> str:
+    """Per-clone cache directory; the slug is sanitised for use as a path."""
+    return os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]+", "_", clone) or "unknown")
+
+
+class HistoryCache:
+    """Thread-safe (clone, email) -> [(created_at, medium)] cache with TTL."""
+
+    def __init__(self, clone: str, ttl_hours: float = DEFAULT_TTL_HOURS, root: str = CACHE_ROOT):
+        self.clone = clone
+        self.ttl = datetime.timedelta(hours=ttl_hours)
+        self.path = os.path.join(clone_dir(clone, root), "conversations.jsonl")
+        self.hits = self.misses = self.stale = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        lines = 0
+        if os.path.exists(self.path):
+            for line in open(self.path):
+                try:
+                    r = json.loads(line)
+                    self._entries[r["e"]] = (datetime.datetime.fromisoformat(r["f"]), r["c"])
+                    lines += 1
+                except Exception:
+                    continue  # a torn last line from an interrupted run
+        if lines > 2 * len(self._entries) + 100:
+            self._compact()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fh = open(self.path, "a")
+
+    def _compact(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            for email, (fetched, convos) in self._entries.items():
+                f.write(json.dumps({"e": email, "f": fetched.isoformat(), "c": convos},
+                                   separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+
+    def get(self, email: str, active_since: datetime.datetime = None):
+        """Cached [{'created_at','medium'}] or None when missing or stale.
+
+        A naive `active_since` is read as UTC, as timestamps.epoch does."""
+        if active_since is not None and active_since.tzinfo is None:
+            active_since = active_since.replace(tzinfo=datetime.timezone.utc)
+        with self._lock:
+            hit = self._entries.get(email)
+            if hit is None:
+                self.misses += 1
+                return None
+            fetched, convos = hit
+            if _now() - fetched > self.ttl or (active_since is not None and active_since > fetched):
+                self.stale += 1
+                return None
+            self.hits += 1
+        return [{"created_at": c, "medium": m} for c, m in convos]
+
+    def put(self, email: str, convos: list):
+        fetched = _now()
+        compact = [[c.get("created_at"), c.get("medium")] for c in convos]
+        line = json.dumps({"e": email, "f": fetched.isoformat(), "c": compact},
+                          separators=(",", ":")) + "\n"
+        with self._lock:
+            self._entries[email] = (fetched, compact)
+            self._fh.write(line)
+            self._fh.flush()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "refreshed_stale": self.stale, "misses": self.misses,
+                "entries": len(self._entries), "path": self.path}
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Pooled keep-alive HTTP client shared by the testers, audits and docs proxy.
+
+WHY
+---
+The V3/V4 testers used to fork a shell and a fresh `curl` per call, and the
+audits opened a fresh urllib connection per call -- so every request paid a
+process spawn and/or a new TCP + TLS handshake to api.delphi.ai. On a full-mode
+smoke run that setup cost, not the API, dominated the wall clock.
+
+This keeps a small pool of persistent HTTP/1.1 connections per
+(scheme, host, port) and hands them out thread-safely:
+
+    r = http_client.request("GET", url, headers={"x-api-key": key})
+    r.status, r.headers, r.body, r.text, r.json()
+
+    with http_client.stream("POST", url, payload={...}, timeout=120) as r:
+        for chunk in r.iter_chunks(8192):
+            ...
+
+Properties that matter:
+
+  * KEEP-ALIVE     a connection goes back to the pool only once its response
+                   was fully read and the server did not ask to close it. A
+                   stream abandoned half-way is closed, never reused.
+  * STALE RETRY    a pooled connection the server quietly dropped fails on
+                   first reuse; that one request is replayed once on a fresh
+                   connection. Failures on a fresh connection are raised --
+                   retry policy (429s, 5xx) belongs to the caller.
+  * BOUNDED        at most `pool_size` idle connections are kept per host.
+                   Extra concurrent callers get a connection that is closed
+                   when they are done rather than hoarded.
+  * TIMEOUTS       `timeout` applies to the connect and to each socket read,
+                   like urllib -- it is not a whole-request deadline, so a
+                   long-but-alive stream is not cut off.
+
+Pure stdlib (http.client); nothing to install.
+"""
+import http.client, json, ssl, threading, urllib.parse
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_TIMEOUT = 45
+UA = "delphi-api-safe/1.0"  # default python UA is 403'd by Cloudflare
+
+# Raised on first use of a pooled connection the server has already closed.
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+          ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+
+class HTTPStatusError(Exception):
+    """A 4xx/5xx response, raised by Response.raise_for_status()."""
+
+    def __init__(self, code: int, reason: str, headers, body: bytes, url: str):
+        super().__init__(f"HTTP {code} {reason} for {url}")
+        self.code, self.reason, self.headers, self.body, self.url = code, reason, headers, body, url
+
+
+class Response:
+    """A fully-read response. `headers` is an http.client.HTTPMessage."""
+
+    def __init__(self, status: int, reason: str, headers, body: bytes, url: str):
+        self.status, self.reason, self.headers, self.body, self.url = status, reason, headers, body, url
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise HTTPStatusError(self.status, self.reason, self.headers, self.body, self.url)
+
+
+class StreamResponse:
+    """A response whose body is consumed incrementally. Use as a context manager."""
+
+    def __init__(self, pool, key, conn, resp, url: str):
+        self._pool, self._key, self._conn, self._resp = pool, key, conn, resp
+        self.status, self.reason, self.headers, self.url = resp.status, resp.reason, resp.headers, url
+
+    def read(self, n: int = -1) -> bytes:
+        return self._resp.read() if n is None or n < 0 else self._resp.read(n)
+
+    def read1(self, n: int = 8192) -> bytes:
+        """Whatever is available now (up to n bytes) -- no waiting to fill n."""
+        return self._resp.read1(n)
+
+    def iter_chunks(self, size: int = 8192):
+        while True:
+            chunk = self._resp.read1(size)
+            if not chunk:
+                return
+            yield chunk
+
+    def iter_lines(self):
+        """Raw lines including their terminator -- what an SSE proxy forwards."""
+        while True:
+            line = self._resp.readline()
+            if not line:
+                return
+            yield line
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if self._resp.isclosed() and not self._resp.will_close:
+            self._pool._checkin(self._key, conn)
+        else:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Pool:
+    """Idle keep-alive connections, per (scheme, host, port)."""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl = ssl.create_default_context()
+
+    def _split(self, url: str):
+        u = urllib.parse.urlsplit(url)
+        if u.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {url}")
+        port = u.port or (443 if u.scheme == "https" else 80)
+        target = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        return (u.scheme, u.hostname, port), target
+
+    def _checkout(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _open(self, method, url, headers, body, payload, timeout):
+        key, target = self._split(url)
+        hdrs = {"User-Agent": UA}
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            hdrs["Content-Type"] = "application/json"
+        hdrs.update(headers or {})
+        timeout = self.timeout if timeout is None else timeout
+        for attempt in (0, 1):
+            conn, reused = self._checkout(key, timeout)
+            try:
+                conn.request(method, target, body=body, headers=hdrs)
+                return key, conn, conn.getresponse()
+            except _STALE:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+    def request(self, method: str, url: str, *, headers=None, body: bytes = None,
+                payload=None, timeout: float = None) -> Response:
+        """Send and read the whole body. `payload` is JSON-encoded for you."""
+        key, conn, resp = self._open(method, url, headers, body, payload, timeout)
+        try:
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        out = Response(resp.status, resp.reason, resp.headers, data, url)
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        return out
+
+    def stream(self, method: str, url: str, *, headers=None, body: bytes = None,
+               payload=None, timeout: float = None) -> StreamResponse:
+        """Send and return once headers arrive; the caller reads the body."""
+        key, conn, resp = self._open(method, url, headers, body, payload, timeout)
+        return StreamResponse(self, key, conn, resp, url)
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+
+
+_default = Pool()
+
+
+def configure(pool_size: int = None, timeout: float = None) -> Pool:
+    """Tune the process-wide pool (idle connections kept per host, default timeout)."""
+    if pool_size is not None:
+        _default.pool_size = pool_size
+    if timeout is not None:
+        _default.timeout = timeout
+    return _default
+
+
+def request(method: str, url: str, **kw) -> Response:
+    return _default.request(method, url, **kw)
+
+
+def stream(method: str, url: str, **kw) -> StreamResponse:
+    return _default.stream(method, url, **kw)
@@ -38,50 +38,30 @@ import argparse, collections, json, os, sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import audience_audit as aa
 import d30_retention as d30
-
-INBOUND = {"user"}          # the human. 'agent' = AI, 'owner' = creator broadcasting
-LEGACY_INBOUND = {"USER"}   # older exports used CLONE/USER
+import export_scan   # one shared pass over the export; 'user'/'USER' are inbound there
 
 
 def main():
     ap = argparse.ArgumentParser(description="Inbound-only engagement from an NDJSON export.")
-    ap.add_argument("--export", required=True)
+    ap.add_argument("--export", required=True, help="NDJSON export; .gz / .bz2 / .zst are read as-is.")
     ap.add_argument("--label", default="")
     ap.add_argument("--exclude-email", action="append", default=[])
     ap.add_argument("--json", action="store_true")
+    export_scan.add_scan_args(ap)
     args = ap.parse_args()
 
     exclude = d30.DEFAULT_EXCLUDE | {e.lower() for e in args.exclude_email}
 
-    reached = set()
-    inbound_days = collections.defaultdict(set)   # email -> {date}
-    inbound_msgs = collections.Counter()
-    sender_counts = collections.Counter()
-    medium_counts = collections.Counter()
-    medium_by_user = collections.defaultdict(collections.Counter)
-    threads = 0
-
-    for line in open(args.export):
-        line = line.strip()
-        if not line:
-            continue
-        t = json.loads(line)
-        email = (t.get("user_email") or "").strip()
-        if not email or not d30.is_real(email, exclude):
-            continue
-        threads += 1
-        reached.add(email)
-        med = t.get("medium") or "unknown"
-        medium_counts[med] += 1
-        medium_by_user[email][med] += 1
-        for m in t.get("messages", []):
-            s = m.get("sender")
-            sender_counts[s] += 1
-            if s in INBOUND or s in LEGACY_INBOUND:
-                ts = d30.parse_ts(m.get("created_at") or "")
-                if ts:
-                    inbound_days[email].add(ts.date())
-                    inbound_msgs[email] += 1
+    tallies = export_scan.load_or_scan(args.export, exclude, not args.no_scan_cache,
+                                       jobs=export_scan.parse_jobs(args), products=("inbound",),
+                                       save=args.scan_cache).inbound()
+    reached = tallies["reached"]
+    inbound_days = tallies["inbound_days"]         # email -> {date}
+    inbound_msgs = tallies["inbound_msgs"]
+    sender_counts = tallies["sender_counts"]
+    medium_counts = tallies["medium_counts"]
+    medium_by_user = tallies["medium_by_user"]
+    threads = tallies["threads"]
 
     responded = {e for e, d in inbound_days.items() if d}
     multi = {e for e, d in inbound_days.items() if len(d) >= 2}
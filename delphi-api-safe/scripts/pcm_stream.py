@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""In-memory capture and playback analysis for /v3/voice/stream PCM audio.
+
+WHY
+---
+The voice check used to write the body to a fixed /tmp file and report only a
+byte count -- concurrent runs clobbered each other's file, and "N bytes" says
+nothing about whether a listener would hear smooth speech. What matters for
+shipping voice is:
+
+    ttfa_s            request sent -> first audio byte (time to first audio)
+    realtime_factor   audio seconds delivered per wall second, first byte to
+                      end. Below 1.0 the stream cannot keep up with playback.
+    underruns         how often a client that waits for `buffer_ms` of audio
+                      before starting (and again after each stall) would run
+                      dry, and for how long it would sit silent
+
+The stream is raw PCM, 24 kHz s16le mono, 48,000 bytes per audio second, no
+header (docs/VOICE-STREAMING.md). Chunks need not end on a sample boundary; a
+trailing odd byte is carried into the next chunk, exactly as a player must.
+Nothing is written to disk and no audio is kept: each chunk is timestamped,
+checked for non-silence, and dropped.
+
+Usage:
+    m = pcm_stream.stream_voice("https://api.delphi.ai/v3/voice/stream", key,
+                                {"message": "hi", "conversation_id": cid})
+    m["status"], m["ttfa_s"], m["realtime_factor"], m["playback"]["250"]["underruns"]
+"""
+import array, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import http_client
+
+SAMPLE_RATE = 24000
+BYTES_PER_SAMPLE = 2
+BYTE_RATE = SAMPLE_RATE * BYTES_PER_SAMPLE   # 48,000 bytes per audio second
+DEFAULT_BUFFERS_MS = (0, 100, 250, 500)
+
+
+def simulate_playback(arrivals: list, buffer_s: float, t_end: float) -> dict:
+    """Play `arrivals` [(wall_t, audio_s), ...] through a jitter buffer.
+
+    Playback starts once `buffer_s` of audio is queued (or the stream ends) and
+    runs in real time. Running dry before the stream ends is an underrun: the
+    player stops and waits for `buffer_s` to queue up again. Times are on the
+    same clock as `arrivals`; start_s is returned on that clock too.
+    """
+    queued = played = 0.0
+    playing, t_play, start, dry_at = False, None, None, None
+    underruns, stall = 0, 0.0
+    for t, audio_s in arrivals:
+        if playing:
+            pos = played + (t - t_play)
+            if pos > queued:
+                underruns += 1
+                playing, dry_at = False, t_play + (queued - played)
+                played = queued
+            else:
+                played, t_play = pos, t
+        queued += audio_s
+        if not playing and queued - played >= buffer_s and queued > played:
+            playing, t_play = True, t
+            if start is None:
+                start = t
+            else:
+                stall += t - dry_at
+    if not playing and queued > played:   # stream ended before the buffer filled
+        if start is None:
+            start = t_end
+        else:
+            stall += t_end - dry_at
+    return {"start_s": start, "underruns": underruns, "stall_s": round(stall, 3)}
+
+
+class PCMMeter:
+    """Timestamps the chunks of one PCM stream; summary() gives the metrics dict."""
+
+    def __init__(self, t0: float = None, buffers_ms=DEFAULT_BUFFERS_MS):
+        self.t0 = time.monotonic() if t0 is None else t0
+        self.buffers_ms = tuple(buffers_ms)
+        self.t_headers = self.t_end = None
+        self.arrivals = []   # (monotonic t, audio seconds completed by this chunk)
+        self.bytes = 0
+        self.odd_chunks = 0   # chunks that split a sample across the boundary
+        self.peak = 0         # max |sample|; 0 means the whole stream was silence
+        self._carry = b""
+
+    def headers(self):
+        self.t_headers = time.monotonic()
+
+    def chunk(self, data: bytes):
+        now = time.monotonic()
+        if not data:
+            return
+        self.bytes += len(data)
+        data = self._carry + data
+        whole = len(data) - len(data) % BYTES_PER_SAMPLE
+        self._carry = data[whole:]
+        if self._carry:
+            self.odd_chunks += 1
+        if whole:
+            samples = array.array("h", data[:whole])
+            if sys.byteorder == "big":
+                samples.byteswap()
+            self.peak = max(self.peak, max(samples), -min(samples))
+        self.arrivals.append((now, whole / BYTE_RATE))
+
+    def end(self):
+        self.t_end = time.monotonic()
+
+    def summary(self) -> dict:
+        rel = lambda t: round(t - self.t0, 3) if t is not None else None
+        end = self.t_end if self.t_end is not None else time.monotonic()
+        audio_s = (self.bytes // BYTES_PER_SAMPLE) / SAMPLE_RATE
+        first = self.arrivals[0][0] if self.arrivals else None
+        span = end - first if first is not None else 0
+        playback = {}
+        for ms in self.buffers_ms:
+            p = simulate_playback(self.arrivals, ms / 1000, end)
+            p["start_s"] = rel(p["start_s"])
+            playback[str(ms)] = p
+        smooth = [ms for ms in self.buffers_ms if playback[str(ms)]["underruns"] == 0]
+        return {
+            "ttfb_s": rel(self.t_headers),
+            "ttfa_s": rel(first),
+            "total_s": rel(end),
+            "bytes": self.bytes,
+            "audio_s": round(audio_s, 2),
+            "chunks": len(self.arrivals),
+            "realtime_factor": round(audio_s / span, 2) if span > 0 else None,
+            "odd_chunks": self.odd_chunks,
+            "silent": self.bytes > 0 and self.peak == 0,
+            "playback": playback,
+            "smooth_buffer_ms": min(smooth) if smooth else None,
+        }
+
+
+def stream_voice(url: str, api_key: str, payload: dict, timeout: float = 30,
+                 buffers_ms=DEFAULT_BUFFERS_MS) -> dict:
+    """POST one voice request, consume the PCM body in memory, and measure it.
+
+    Returns summary() plus "status" (str, "000" on a transport error) and
+    "error" (transport error, or the start of a non-200 body).
+    """
+    headers = {"x-api-key": api_key, "Content-Type": "application/json"}
+    meter = PCMMeter(buffers_ms=buffers_ms)
+    status, error = "000", None
+    try:
+        with http_client.stream("POST", url, headers=headers, payload=payload, timeout=timeout) as r:
+            meter.headers()
+            status = str(r.status)
+            if r.status != 200:
+                error = r.read(200).decode("utf-8", errors="replace")
+            else:
+                for chunk in r.iter_chunks(8192):
+                    meter.chunk(chunk)
+    except Exception as e:
+        error = str(e)[:200]
+    meter.end()
+    out = meter.summary()
+    out.update({"status": status, "error": error})
+    return out
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Portfolio run: audience audit + D30 retention for every clone in keys.json (READ-ONLY).
+
+WHY
+---
+The nightly numbers used to come from a shell loop --
+
+    for a in ...; do audience_audit.py --account $a; d30_retention.py --account $a; done
+
+-- one clone at a time, so 30 clones took the SUM of 30 runs even though each
+key has its own rate budget and sat idle while the others ran.
+
+This runs every account at once (up to --jobs), each in its own process with
+its own key, so each clone is paced only by its own key's adaptive limiter
+(rate_limit.py) and a slow or failing clone never holds up the rest. Wall clock
+is roughly the slowest clone, not the sum.
+
+Per account, in order (same key, so they would only split its budget if run
+side by side -- and the second is served mostly from the first's history cache):
+
+    audience_audit.py --json          audience sizing + all-time retention
+    d30_retention.py  --json          D30 (API-only, or combo with --export-dir)
+
+KEYS
+----
+Accounts are read from keys.json. A legacy dsk- account with an
+`<account>_applaunch` dlph_ sibling runs on the sibling (same rule as
+d30_retention.resolve_key_preferring_applaunch), and the sibling is not run a
+second time on its own. Children get the account NAME, never the key, on their
+command line; $DELPHI_API_KEY is removed from their environment so it cannot
+override the per-account key.
+
+Each account's stderr goes to out/portfolio/<run>/<account>.log (PII -- keep
+local); the merged report goes to stdout and out/portfolio/<run>/report.json.
+
+Usage:
+    python3 scripts/portfolio.py                          # every account, table
+    python3 scripts/portfolio.py --json                   # merged JSON
+    python3 scripts/portfolio.py --accounts karamo,jim_carter --jobs 4
+    python3 scripts/portfolio.py --export-dir exports/    # combo D30 where exports/<account>.ndjson exists
+    python3 scripts/portfolio.py --skip-audit --window-days 90
+    python3 scripts/portfolio.py --resume                 # continue interrupted sweeps
+"""
+import argparse, concurrent.futures, datetime, json, os, subprocess, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import d30_retention as d30
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+OUT_ROOT = os.path.join(ROOT, "out", "portfolio")
+
+
+def plan_accounts(accounts: dict, only: list = None) -> list:
+    """[(account, handle_to_run, style)] -- one entry per clone, siblings folded in."""
+    names = only or sorted(accounts)
+    plan, seen_keys = [], set()
+    for name in names:
+        if name not in accounts:
+            sys.exit(f"Account '{name}' not found in keys.json.")
+        base = name[:-len("_applaunch")] if name.endswith("_applaunch") else None
+        if not only and base in accounts:
+            continue  # reached through its legacy base account
+        key, style, handle = d30.account_key(accounts, name, verbose=False)
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        plan.append((name, handle, style))
+    return plan
+
+
+def _run_json(cmd: list, log, env: dict):
+    """Run one child script, stderr -> log; (parsed stdout JSON or None, exit code)."""
+    log.write(f"$ {' '.join(cmd[1:])}\n")
+    log.flush()
+    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=log, env=env, text=True)
+    try:
+        return json.loads(p.stdout), p.returncode
+    except ValueError:
+        return None, p.returncode or 1
+
+
+def run_account(name: str, handle: str, style: str, args, run_dir: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if k != "DELPHI_API_KEY"}
+    common = ["--account", handle] + (["--resume"] if args.resume else [])
+    out = {"account": name, "key_account": handle, "key_style": style, "errors": []}
+    t0 = time.monotonic()
+    with open(os.path.join(run_dir, f"{name}.log"), "w") as log:
+        if not args.skip_audit:
+            cmd = [sys.executable, os.path.join(HERE, "audience_audit.py"), "--json"] + common
+            if args.no_retention:
+                cmd.append("--no-retention")
+            out["audit"], rc = _run_json(cmd, log, env)
+            if rc or out["audit"] is None:
+                out["errors"].append(f"audience_audit exited {rc}")
+        if not args.skip_d30:
+            cmd = [sys.executable, os.path.join(HERE, "d30_retention.py"), "--json",
+                   "--window-days", str(args.window_days)] + common
+            export = _find_export(args.export_dir, name) if args.export_dir else None
+            if export:
+                cmd += ["--export", export]
+            out["d30"], rc = _run_json(cmd, log, env)
+            if rc or out["d30"] is None:
+                out["errors"].append(f"d30_retention exited {rc}")
+    out["elapsed_s"] = round(time.monotonic() - t0, 1)
+    out["status"] = "FAIL" if out["errors"] else "PASS"
+    print(f"  {name}: {out['status']} in {out['elapsed_s']}s", file=sys.stderr)
+    return out
+
+
+def _find_export(export_dir: str, name: str):
+    for ext in ("", ".gz", ".zst", ".bz2"):
+        path = os.path.join(export_dir, f"{name}.ndjson{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _pct(x):
+    return f"{100 * x:.1f}%" if isinstance(x, (int, float)) else "n/a"
+
+
+def print_table(report: dict):
+    rows = [("ACCOUNT", "KEY", "USERS", "REAL", "CONVERSERS", "MULTI-DAY", "D30", "COHORT", "TIME", "STATUS")]
+    for r in report["accounts"]:
+        a = r.get("audit") or {}
+        aud, ret = a.get("audience", {}), a.get("retention", {})
+        d = r.get("d30") or {}
+        rows.append((r["account"], r["key_style"], aud.get("total_users", "-"), aud.get("real_users", "-"),
+                     ret.get("conversers", "-"), _pct(ret.get("multi_day_rate")),
+                     f"{d['d30_rate_pct']}%" if d.get("d30_rate_pct") is not None else "n/a",
+                     d.get("cohort_size", "-"), f"{r['elapsed_s']}s", r["status"]))
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))]
+    print("\n" + "=" * 72)
+    print(f"PORTFOLIO  ({len(report['accounts'])} clones, run {report['generated_at'][:19]}Z)")
+    print("=" * 72)
+    for row in rows:
+        print("  " + "  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+    print(f"\n  Wall clock {report['elapsed_s']}s  (one clone at a time would be ~{report['serial_s']}s)")
+    print(f"  Logs + report.json: {report['run_dir']}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Audit + D30 across every keys.json account, in parallel (read-only).")
+    ap.add_argument("--accounts", help="Comma-separated subset of keys.json accounts (default: all).")
+    ap.add_argument("--jobs", type=int, default=0, help="Clones run at once (default: all of them).")
+    ap.add_argument("--json", action="store_true", help="Emit the merged report as JSON.")
+    ap.add_argument("--skip-audit", action="store_true", help="Only run d30_retention.")
+    ap.add_argument("--skip-d30", action="store_true", help="Only run audience_audit.")
+    ap.add_argument("--no-retention", action="store_true", help="audience_audit sizing only.")
+    ap.add_argument("--window-days", type=int, default=60, help="Passed to d30_retention.")
+    ap.add_argument("--export-dir", help="Use <dir>/<account>.ndjson (or .ndjson.gz / .bz2 / .zst) "
+                                          "for combo-mode D30 where present.")
+    ap.add_argument("--resume", action="store_true", help="Passed to every child run.")
+    args = ap.parse_args()
+
+    accounts, keys_path = d30.load_accounts()
+    if not accounts:
+        sys.exit(f"No accounts in {keys_path}.")
+    only = [a.strip() for a in args.accounts.split(",") if a.strip()] if args.accounts else None
+    plan = plan_accounts(accounts, only)
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    run_dir = os.path.join(OUT_ROOT, now.strftime("%Y%m%dT%H%M%SZ"))
+    os.makedirs(run_dir, exist_ok=True)
+    jobs = args.jobs if args.jobs > 0 else len(plan)
+    print(f"portfolio: {len(plan)} clone(s), {jobs} at a time -> {run_dir}", file=sys.stderr)
+
+    t0 = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        results = list(ex.map(lambda p: run_account(*p, args, run_dir), plan))
+    report = {
+        "generated_at": now.isoformat(),
+        "run_dir": run_dir,
+        "elapsed_s": round(time.monotonic() - t0, 1),
+        "serial_s": round(sum(r["elapsed_s"] for r in results), 1),
+        "failed": [r["account"] for r in results if r["errors"]],
+        "accounts": results,
+    }
+    json.dump(report, open(os.path.join(run_dir, "report.json"), "w"), indent=2, default=str)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_table(report)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
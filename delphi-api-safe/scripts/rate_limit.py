@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Client-side rate limiting and bounded fan-out for bulk Delphi pulls.
+
+PUBLISHED LIMITS
+----------------
+    legacy dsk- keys        120 req / 60s per key   (~2 req/s)
+    App-Launch dlph_ keys   10k req / min per key   (~166 req/s)
+
+Bulk jobs (one /v3/conversation/list per user) used to walk users one at a time
+with a fixed sleep between calls, so a 20k-user App-Launch clone took hours
+while using a few percent of its budget -- and legacy runs spent most of their
+wall clock asleep even when the API would have taken more.
+
+ADAPTIVE, PER KEY
+-----------------
+Every key gets one AdaptiveLimiter for the life of the process: a token bucket
+whose refill rate is steered by what the API says (AIMD, as in TCP):
+
+  * starts at HEADROOM x the published rate
+  * ADDITIVE INCREASE   each healthy response nudges the rate up, ~INCREASE
+                        req/s per second of healthy traffic, to CEILING
+                        (the published rate; never past it)
+  * MULTIPLICATIVE DECREASE   a 429 or 5xx halves it (at most once per
+                        DECREASE_COOLDOWN, so a volley of concurrent 429s from
+                        one overshoot counts once), down to FLOOR
+  * Retry-After on a 429/503 stops EVERY caller on that key until it passes
+  * RateLimit-Remaining: 0 (or X-RateLimit-*) does the same until the Reset
+
+Why a bucket and not just "N workers": latency varies, so worker count alone
+either under-uses the limit (slow responses) or overshoots it (fast ones). The
+bucket caps the rate; the workers only have to be enough to reach it.
+
+Bursts stay small on purpose: a rapid burst has been observed to draw a 429
+even on a dlph_ key, so this is "safely fast," not "unlimited."
+"""
+import concurrent.futures, email.utils, os, random, sys, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import http_client
+
+PUBLISHED_RPS = {"applaunch": 10000 / 60, "legacy": 120 / 60}
+HEADROOM = 0.9                              # start this fraction under the published rate
+CEILING_RPS = dict(PUBLISHED_RPS)          # never probe past the documented cap
+FLOOR_RPS = {"applaunch": 2.0, "legacy": 0.2}
+INCREASE = {"applaunch": 5.0, "legacy": 0.1}  # req/s gained per second of healthy traffic
+DECREASE_COOLDOWN = 1.0                     # seconds between halvings
+BURST = {"applaunch": 20, "legacy": 2}      # tokens a key may bank while idle
+WORKERS = {"applaunch": 32, "legacy": 4}    # in-flight calls needed to reach the rate
+RETRYABLE = (429, 500, 502, 503, 504)
+
+
+def key_style(key: str) -> str:
+    return "applaunch" if key.startswith("dlph_") else "legacy"
+
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a request may go out."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _header_seconds(value, now_wall: float):
+    """Retry-After / RateLimit-Reset -> seconds to wait. Accepts delta-seconds,
+    an epoch timestamp, or an HTTP-date. None when absent or unparseable."""
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        n = float(value)
+        return max(0.0, n - now_wall) if n > 1e9 else max(0.0, n)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now_wall)
+    except Exception:
+        return None
+
+
+class AdaptiveLimiter(TokenBucket):
+    """Token bucket whose rate follows the API's own signals (AIMD)."""
+
+    def __init__(self, style: str):
+        super().__init__(PUBLISHED_RPS[style] * HEADROOM, BURST[style])
+        self.style = style
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self.requests = 0        # responses observed -- real network calls
+        self.throttled = 0       # 429s seen
+        self.server_errors = 0   # 5xx seen
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                wait = self._blocked_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        super().acquire()
+
+    def _block(self, seconds: float):
+        # Caller holds the lock.
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def observe(self, status: int, headers=None):
+        """Feed back one response's status and headers."""
+        now, wall = time.monotonic(), time.time()
+        headers = headers or {}
+        with self._lock:
+            self.requests += 1
+            if status == 429 or status >= 500:
+                if status == 429:
+                    self.throttled += 1
+                else:
+                    self.server_errors += 1
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self.rate = max(FLOOR_RPS[self.style], self.rate / 2)
+                    self._last_decrease = now
+                    self._tokens = min(self._tokens, 0)
+                if status in (429, 503):
+                    ra = _header_seconds(headers.get("Retry-After"), wall)
+                    if ra is not None:
+                        self._block(ra)
+            elif status < 400:
+                self.rate = min(CEILING_RPS[self.style], self.rate + INCREASE[self.style] / self.rate)
+            remaining = headers.get("RateLimit-Remaining") or headers.get("X-RateLimit-Remaining")
+            if remaining is not None and remaining.strip() == "0":
+                reset = _header_seconds(headers.get("RateLimit-Reset")
+                                        or headers.get("X-RateLimit-Reset"), wall)
+                if reset is not None:
+                    self._block(reset)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"rate_rps": round(self.rate, 2), "requests": self.requests,
+                    "throttled_429": self.throttled,
+                    "server_errors_5xx": self.server_errors}
+
+
+def retry_delay(attempt: int, headers=None) -> float:
+    """Wait before retry `attempt` (0-based): the server's Retry-After when it
+    gave one, otherwise exponential backoff with jitter (capped at 30s)."""
+    ra = _header_seconds((headers or {}).get("Retry-After"), time.time())
+    if ra is not None:
+        return ra
+    return min(30.0, 1.0 * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def paced_request(method: str, url: str, api_key: str, *, headers: dict = None,
+                  payload=None, timeout: float = 45, retries: int = 5) -> http_client.Response:
+    """One call through the key's limiter, retried on 429/5xx and transport
+    errors (Retry-After when the server sent one, else backoff). Returns the
+    2xx response; a non-retryable status, or the last failure, is raised --
+    statuses as http_client.HTTPStatusError."""
+    limiter = limiter_for(api_key)
+    for attempt in range(retries):
+        limiter.acquire()
+        try:
+            r = http_client.request(method, url, headers=headers, payload=payload, timeout=timeout)
+            limiter.observe(r.status, r.headers)
+            r.raise_for_status()
+            return r
+        except http_client.HTTPStatusError as e:
+            if e.code not in RETRYABLE or attempt == retries - 1:
+                raise
+            time.sleep(retry_delay(attempt, e.headers))
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            time.sleep(retry_delay(attempt))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(key: str) -> AdaptiveLimiter:
+    """One limiter per API key for the life of the process, sized by key style."""
+    with _limiters_lock:
+        lim = _limiters.get(key)
+        if lim is None:
+            lim = _limiters[key] = AdaptiveLimiter(key_style(key))
+        return lim
+
+
+def fan_out(items: list, fn, *, workers: int, bucket: TokenBucket = None,
+            progress_every: int = 100, verbose: bool = True):
+    """Run fn(item) for every item on `workers` threads, each call gated by `bucket`.
+
+    Returns ({item: result}, stats). An item whose call raised is left out of
+    the results and counted in stats["errors"] -- same as the old serial loops,
+    which skipped a user on error rather than aborting the run. Stats count
+    items, not HTTP requests: an item may be served from a cache or take
+    several pages (the key's limiter counts the requests).
+    """
+    results, errors, done = {}, 0, 0
+    lock = threading.Lock()
+
+    def call(item):
+        if bucket is not None:
+            bucket.acquire()
+        return fn(item)
+
+    t0 = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        futures = {ex.submit(call, it): it for it in items}
+        for fut in concurrent.futures.as_completed(futures):
+            with lock:
+                done += 1
+                try:
+                    results[futures[fut]] = fut.result()
+                except Exception:
+                    errors += 1
+                if verbose and done % progress_every == 0:
+                    rps = done / max(time.monotonic() - t0, 1e-9)
+                    print(f"  {done}/{len(items)}  ({rps:.1f}/s, errors {errors})", file=sys.stderr)
+    elapsed = time.monotonic() - t0
+    return results, {
+        "items": done,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "items_per_s": round(done / elapsed, 2) if elapsed > 0 else None,
+        "target_rps": round(bucket.rate, 2) if bucket is not None else None,
+        "workers": workers,
+    }
@@ -38,105 +38,150 @@ sent something in B. Cohorts are compared only at matched elapsed horizons
 elsewhere; this one is naturally matched because both months are complete.
 A partial trailing month is flagged rather than shown as a decline.
 
+WHAT IS READ
+------------
+Reach, engagement, totals and the month-over-month steps come from the
+per-month aggregates ingest records in the store manifest -- no rows. The
+30-day return, multi-day and dominant-channel measures follow each person
+across days and load the month rows; --summary skips them.
+
 Usage:
     python3 scripts/retention_report.py
     python3 scripts/retention_report.py --clone karamo --json
     python3 scripts/retention_report.py --months 2026-06,2026-07
+    python3 scripts/retention_report.py --summary     # aggregates only, no rows
 """
-import argparse, collections, datetime, json, os, sys
+import argparse, collections, json, os, sys
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import engagement_store as es
-
-D = datetime.timedelta
+import store_segments
 
 
-def inbound_days(clone, months=None):
-    """{contact: sorted[date]} using only days the human sent something."""
-    data = es.load(clone, months)
+def inbound_days(cols, present):
+    """{contact id: ascending [day number]} using only days the human sent
+    something, in the order of `present` (contact ids by first row)."""
+    c = cols.cols
     out = {}
-    for u, days in data.items():
-        ds = sorted(datetime.date.fromisoformat(d) for d, c in days.items() if c["in"] > 0)
-        if ds:
-            out[u] = ds
-    return out, data
-
-
-def analyse(clone, months=None):
-    days, raw = inbound_days(clone, months)
-    if not days:
+    for u, d, i in zip(c["contact"], c["day"], c["in"]):
+        if i > 0:
+            v = out.get(u)
+            if v is None:
+                out[u] = [d]
+            elif v[-1] != d:
+                v.append(d)
+    return {u: out[u] for u in present if u in out}
+
+
+def analyse(clone, months=None, rows=True):
+    """One clone's report. Reach, engagement, message totals and the
+    month-over-month steps come from the per-month aggregates in the store
+    manifest; 30-day return, multi-day and dominant channel follow individual
+    people across days, so they read the rows -- or are None when `rows` is
+    False."""
+    aggs = es.month_aggregates(clone, months)
+    present = engaged_bits = 0
+    for a in aggs.values():
+        present |= a["present"]
+        engaged_bits |= a["inbound"]
+    if not engaged_bits:
         return None
-    reached = len(raw)
-    engaged = len(days)
-    end = max(v[-1] for v in days.values())
-    start = min(v[0] for v in days.values())
-    cutoff = end - D(days=30)
-
-    cohort = ret = 0
-    for v in days.values():
-        first = v[0]
-        if first > cutoff:
-            continue
-        cohort += 1
-        if any(x != first and x <= first + D(days=30) for x in v[1:]):
-            ret += 1
-
-    multi = sum(1 for v in days.values() if len(v) >= 2)
+    reached = es.popcount(present)
+    engaged = es.popcount(engaged_bits)
+    mlist = sorted(m for m, a in aggs.items() if a["inbound"])
+    start = min(aggs[m]["first_inbound_day"] for m in mlist)
+    end = max(aggs[m]["last_inbound_day"] for m in mlist)
 
     # month-over-month: who sent in month A and again in month B
-    by_month = collections.defaultdict(set)
-    for u, v in days.items():
-        for d in v:
-            by_month[f"{d.year}-{d.month:02d}"].add(u)
-    mlist = sorted(by_month)
     steps = []
     for a, b in zip(mlist, mlist[1:]):
-        A, B = by_month[a], by_month[b]
-        steps.append({"from": a, "to": b, "engaged_from": len(A), "engaged_to": len(B),
-                      "returned": len(A & B),
-                      "rate_pct": round(len(A & B) / len(A) * 100, 1) if A else None})
-
-    inb = sum(c["in"] for v in raw.values() for c in v.values())
-    outb = sum(c["out"] for v in raw.values() for c in v.values())
-    chan = collections.Counter()
-    for u in days:
-        cs = collections.Counter()
-        for c in raw[u].values():
-            for x in c.get("ch", []):
-                cs[x] += 1
-        if cs:
-            chan[cs.most_common(1)[0][0]] += 1
+        A, B = aggs[a]["inbound"], aggs[b]["inbound"]
+        na, both = es.popcount(A), es.popcount(A & B)
+        steps.append({"from": a, "to": b, "engaged_from": na, "engaged_to": es.popcount(B),
+                      "returned": both,
+                      "rate_pct": round(both / na * 100, 1) if na else None})
+
+    inb = sum(a["inbound_messages"] for a in aggs.values())
+    outb = sum(a["outbound_messages"] for a in aggs.values())
+    channel_days = collections.Counter()
+    for a in aggs.values():
+        channel_days.update(a["channel_days"])
+
+    cohort = ret = multi = dominant = None
+    if rows:
+        cohort, ret, multi, dominant = _per_person(es.load_columns(clone, months),
+                                                   store_segments.day_number(end))
 
     return {
         "clone": clone,
         "months": mlist,
-        "data_start": start.isoformat(), "data_end": end.isoformat(),
+        "data_start": start, "data_end": end,
         "reached": reached, "engaged": engaged,
         "reply_rate_pct": round(engaged / reached * 100, 1) if reached else None,
         "cohort_30d": cohort, "returned_30d": ret,
         "return_30d_pct": round(ret / cohort * 100, 1) if cohort else None,
-        "observable_pct": round(cohort / engaged * 100, 1) if engaged else None,
+        "observable_pct": round(cohort / engaged * 100, 1) if cohort is not None else None,
         "multi_day": multi,
-        "multi_day_pct": round(multi / engaged * 100, 1) if engaged else None,
+        "multi_day_pct": round(multi / engaged * 100, 1) if multi is not None else None,
         "inbound_messages": inb, "outbound_messages": outb,
         "outbound_ratio": round(outb / inb, 1) if inb else None,
         "monthly_steps": steps,
-        "engaged_by_month": {m: len(s) for m, s in sorted(by_month.items())},
-        "dominant_channel": chan.most_common(1)[0][0] if chan else None,
+        "engaged_by_month": {m: es.popcount(aggs[m]["inbound"]) for m in mlist},
+        "dominant_channel": dominant,
+        "channel_days": dict(channel_days.most_common()),
     }
 
 
+def _per_person(cols, end):
+    """(cohort_30d, returned_30d, multi_day, dominant_channel) from the rows;
+    `end` is the last inbound day number."""
+    present = dict.fromkeys(cols.cols["contact"])
+    days = inbound_days(cols, present)
+    cutoff = end - 30
+
+    cohort = ret = 0
+    for v in days.values():
+        first = v[0]
+        if first > cutoff:
+            continue
+        cohort += 1
+        if any(x != first and x <= first + 30 for x in v[1:]):
+            ret += 1
+
+    multi = sum(1 for v in days.values() if len(v) >= 2)
+
+    # each engaged contact's most-used channel, ties to the first seen; counted
+    # per distinct (contact, channel mask) rather than per row
+    per_user = {}
+    for (u, m), n in collections.Counter(zip(cols.cols["contact"], cols.cols["ch"])).items():
+        if m and u in days:
+            cs = per_user.get(u)
+            if cs is None:
+                cs = per_user[u] = {}
+            for x in cols.channel_names(m):
+                cs[x] = cs.get(x, 0) + n
+    chan = collections.Counter()
+    for u in days:
+        cs = per_user.get(u)
+        if cs:
+            chan[max(cs, key=cs.get)] += 1
+    return cohort, ret, multi, chan.most_common(1)[0][0] if chan else None
+
+
 def main():
     ap = argparse.ArgumentParser(description="Retention across the engagement store.")
     ap.add_argument("--clone")
     ap.add_argument("--months", help="Comma-separated YYYY-MM to restrict to.")
+    ap.add_argument("--summary", action="store_true",
+                    help="Aggregates only: skip 30-day return, multi-day and dominant channel, "
+                         "which need the rows.")
     ap.add_argument("--json", action="store_true")
     args = ap.parse_args()
     months = set(args.months.split(",")) if args.months else None
 
     clones = [args.clone] if args.clone else sorted(
         d for d in os.listdir(es.STORE) if os.path.isdir(os.path.join(es.STORE, d)))
-    results = [r for r in (analyse(c, months) for c in clones) if r]
+    results = [r for r in (analyse(c, months, not args.summary) for c in clones) if r]
     if not results:
         sys.exit("Nothing in the store for that selection.")
 
@@ -153,10 +198,12 @@ def main():
     for r in results:
         span = f"{r['months'][0]}→{r['months'][-1]}" if len(r["months"]) > 1 else r["months"][0]
         span = f"{span} ({len(r['months'])}mo)"
-        ret = f"{r['return_30d_pct']}% ({r['returned_30d']}/{r['cohort_30d']})"
-        md = f"{r['multi_day_pct']}%"
+        ret = (f"{r['return_30d_pct']}% ({r['returned_30d']}/{r['cohort_30d']})"
+               if r["cohort_30d"] is not None else "-")
+        md = f"{r['multi_day_pct']}%" if r["multi_day"] is not None else "-"
+        obs = f"{r['observable_pct']}%" if r["observable_pct"] is not None else "-"
         print(f"  {r['clone']:<18} {span:<26} {r['engaged']:>8} {ret:>12} {md:>11} "
-              f"{str(r['observable_pct'])+'%':>5} {str(r['outbound_ratio'])+'x':>7}")
+              f"{obs:>5} {str(r['outbound_ratio'])+'x':>7}")
 
     print(f"\n  MONTH OVER MONTH — of people who sent in month A, how many sent again in month B")
     for r in results:
@@ -170,8 +217,13 @@ def main():
 
     print(f"\n  reply rate (read against channel — ~100% is definitional on web/embed)")
     for r in results:
+        if args.summary:   # no per-person pass, so no dominant channel -- say what this is instead
+            top = next(iter(r["channel_days"]), None)
+            chan = f"top channel (contact-days): {top}" if top else "-"
+        else:
+            chan = r["dominant_channel"] or "-"
         print(f"    {r['clone']:<18} {str(r['reply_rate_pct'])+'%':>7} of {r['reached']:>6} reached"
-              f"   [{r['dominant_channel']}]")
+              f"   [{chan}]")
 
 
 if __name__ == "__main__":
@@ -40,13 +40,18 @@ Usage:
     python3 scripts/retention_trend.py --export conv.ndjson --account lewis_howes
 
     python3 scripts/retention_trend.py --history out/x.json --window-start 2026-06-01 --json
+
+    # full live audience from V4 contacts/threads (needs the contacts:list:pii scope)
+    python3 scripts/retention_trend.py --account lewis_howes_applaunch --v4
 """
 import argparse, datetime, json, os, sys
 import urllib.parse
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import audience_audit as aa
+import checkpoint
 import d30_retention as d30
+import timestamps
 
 HORIZONS = [1, 7, 14, 30]
 MIN_COHORT = 20   # below this, a rate is too noisy to publish
@@ -67,7 +72,7 @@ def load_history(path):
     raw = json.load(open(path))
     out = {}
     for e, times in raw.items():
-        ts = sorted(d30.parse_ts(t) for t in times if d30.parse_ts(t))
+        ts = sorted(x for x in map(timestamps.parse, times) if x)
         if ts:
             out[e] = ts
     return out
@@ -161,7 +166,7 @@ def monthly_activity(by_user, window_start, reference):
 def main():
     ap = argparse.ArgumentParser(description="Month-over-month retention trend (read-only).")
     ap.add_argument("--history", help="Reuse a {email:[iso]} dump from d30_retention.py --dump-history.")
-    ap.add_argument("--export", help="NDJSON export (used with --account, or alone).")
+    ap.add_argument("--export", help="NDJSON export, optionally .gz / .bz2 / .zst (used with --account, or alone).")
     ap.add_argument("--account")
     ap.add_argument("--api-key")
     ap.add_argument("--window-start", help="ISO date the observation window opens (e.g. 2026-06-01). "
@@ -170,25 +175,45 @@ def main():
     ap.add_argument("--exclude-email", action="append", default=[])
     ap.add_argument("--json", action="store_true")
     ap.add_argument("--dump-history", help="Write resolved {email:[iso]} history here (PII -- keep local).")
+    d30.add_live_pull_args(ap)
     args = ap.parse_args()
 
     exclude = d30.DEFAULT_EXCLUDE | {e.lower() for e in args.exclude_email}
     reference = datetime.datetime.now(datetime.timezone.utc)
 
+    basis = None   # V4 dates conversations by lastMessageAt; see d30_retention.py
     if args.history:
         by_user = load_history(args.history)
         by_user = {e: t for e, t in by_user.items() if d30.is_real(e, exclude)}
         source = f"history dump ({args.history})"
     elif args.export and (args.account or args.api_key):
         key, style = d30.resolve_key_preferring_applaunch(args)
-        export_by_user, _ = d30.load_from_export(args.export, exclude)
-        by_user = d30.load_api_for_emails(list(export_by_user.keys()), key, style)
-        source = "export + live API"
+        export_by_user, _ = d30.load_export_candidates(args.export, exclude)
+        clone = d30.resolve_clone(key)
+        if args.v4:
+            by_user, _ = d30.load_from_v4(key, exclude, style, emails=list(export_by_user.keys()),
+                                          ckpt=checkpoint.Checkpoint(clone, "trend-v4-histories", args.resume))
+            source, basis = "export + live V4 contacts/threads", d30.V4_START_BASIS
+        else:
+            hcache = d30.open_history_cache(args, clone)
+            by_user = d30.load_api_for_emails(list(export_by_user.keys()), key, style, cache=hcache,
+                                              active={e: ts[-1] for e, ts in export_by_user.items()},
+                                              ckpt=checkpoint.Checkpoint(clone, "trend-histories", args.resume))
+            if hcache is not None:
+                hcache.close()
+            source = "export + live API"
+    elif args.v4 and (args.account or args.api_key):
+        key, style = d30.resolve_key_preferring_applaunch(args)
+        clone = d30.resolve_clone(key)
+        by_user, _ = d30.load_from_v4(key, exclude, style,
+                                      ckpt=checkpoint.Checkpoint(clone, "trend-v4-histories", args.resume))
+        source, basis = "live V4 contacts/threads (full audience)", d30.V4_START_BASIS
     elif args.export:
         by_user, _ = d30.load_from_export(args.export, exclude)
         source = "export only (first-seen = first in export, not first ever)"
     else:
-        sys.exit("Provide --history, or --export (optionally with --account/--api-key).")
+        sys.exit("Provide --history, --export (optionally with --account/--api-key), "
+                 "or --account/--api-key with --v4.")
 
     if not by_user:
         sys.exit("No users resolved.")
@@ -210,6 +235,7 @@ def main():
     activity = monthly_activity(by_user, window_start, reference)
     out = {
         "source": source,
+        "start_time_basis": basis,
         "reference_time": reference.isoformat(),
         "window_start": window_start.isoformat() if window_start else None,
         "users_analyzed": len(by_user),
@@ -225,6 +251,9 @@ def main():
     print("RETENTION TREND — monthly acquisition cohorts at matched horizons")
     print("=" * 78)
     print(f"  source: {source}")
+    if out["start_time_basis"]:
+        print(f"  conversation times: V4 {out['start_time_basis']} (last activity, not start -- "
+              f"not directly comparable with V3 cohorts)")
     print(f"  users analyzed: {len(by_user)}")
     print(f"  reference: {reference.isoformat()}")
     if window_start:
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Incremental SSE parsing and latency metrics for Delphi's CloneResponse streams.
+
+WHY
+---
+The chat check only looked for `data:` and `[DONE]` somewhere in the fully
+buffered body, so it could say a stream worked but not how it FELT: how long
+until the first word, how fast words came, whether they stalled. Those are the
+numbers users notice.
+
+Both streaming endpoints speak the same frame contract:
+
+    POST /v3/stream                                  {"message", "conversation_id"}
+    POST /v4/conversations/{id}/messages/stream      {"text"}
+
+    data: {"current_token": "Hel", ...}
+    data: {"current_token": "lo", ...}
+    data: {"current_token": "[DONE]", "text": "Hello", "id": ..., "citations": ...}
+
+The final frame is JSON like the rest, with the whole reply in `text`; it is
+not a token. A bare `data: [DONE]` line is accepted as the end too.
+
+This reads the response as it arrives (never buffering it whole), timestamps
+every frame, and reports:
+
+    ttfb_s          request sent -> response headers
+    ttft_s          request sent -> first non-empty current_token
+    total_s         request sent -> [DONE] (or end of stream)
+    text_matches_final  the tokens joined == the final frame's `text`
+                    (None when the stream carried no text to check against)
+    tokens          frames carrying a non-empty current_token
+    tokens_per_s    tokens after the first / time from first to last token
+    gap_ms          p50 / p90 / p99 / max gap between consecutive token frames
+                    -- a high p99 with a fine p50 is a stall, not a slow model
+
+Usage:
+    m = sse_stream.stream_chat("https://api.delphi.ai/v3/stream", key,
+                               {"message": "hi", "conversation_id": cid})
+    m["status"], m["done"], m["ttft_s"], m["tokens_per_s"], m["gap_ms"]["p99"]
+"""
+import json, math, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import http_client
+
+
+def percentile(values: list, p: float):
+    """Nearest-rank percentile (p in 0..100) of `values`; None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class SSEParser:
+    """Incremental text/event-stream parser: feed() bytes, get complete events.
+
+    Events are {"event", "data", "id"}; multi-line `data:` fields are joined
+    with newlines, `:` comment lines are skipped, CRLF / LF / CR all end a line.
+    """
+
+    def __init__(self):
+        self._buf = b""
+        self._data, self._event, self._id = [], None, None
+
+    def feed(self, chunk: bytes) -> list:
+        self._buf += chunk
+        events = []
+        while True:
+            lf, cr = self._buf.find(b"\n"), self._buf.find(b"\r")
+            if cr >= 0 and (lf < 0 or cr < lf):
+                if cr == len(self._buf) - 1:
+                    return events  # trailing CR: wait to see whether an LF follows
+                cut, skip = cr, 2 if self._buf[cr + 1:cr + 2] == b"\n" else 1
+            elif lf >= 0:
+                cut, skip = lf, 1
+            else:
+                return events
+            line, self._buf = self._buf[:cut], self._buf[cut + skip:]
+            ev = self._line(line.decode("utf-8", errors="replace"))
+            if ev is not None:
+                events.append(ev)
+
+    def close(self) -> list:
+        """End of stream: flush a last line / event not followed by a blank line."""
+        events = []
+        if self._buf:
+            ev = self._line(self._buf.rstrip(b"\r").decode("utf-8", errors="replace"))
+            self._buf = b""
+            if ev is not None:
+                events.append(ev)
+        ev = self._line("")
+        return events + ([ev] if ev is not None else [])
+
+    def _line(self, line: str):
+        if not line:
+            if not self._data and self._event is None:
+                return None
+            ev = {"event": self._event or "message", "data": "\n".join(self._data), "id": self._id}
+            self._data, self._event = [], None
+            return ev
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            self._id = value
+        return None
+
+
+def clone_token(data: str):
+    """(token_text, is_done) for one CloneResponse frame's data field."""
+    if data.strip() == "[DONE]":
+        return "", True
+    try:
+        frame = json.loads(data)
+    except ValueError:
+        return "", False
+    if not isinstance(frame, dict):
+        return "", False
+    token = frame.get("current_token") or ""
+    if token == "[DONE]":
+        return "", True
+    return token, False
+
+
+def _final_text(data: str):
+    try:
+        frame = json.loads(data)
+    except ValueError:
+        return None
+    return frame.get("text") if isinstance(frame, dict) else None
+
+
+class StreamMeter:
+    """Timestamps frames of one stream; summary() gives the metrics dict."""
+
+    def __init__(self, t0: float = None):
+        self.t0 = time.monotonic() if t0 is None else t0
+        self.t_headers = self.t_first_byte = self.t_done = self.t_end = None
+        self.token_times, self.parts = [], []
+        self.frames = 0
+        self.done = False
+        self.final_text = None
+        self.raw_head = b""
+        self._parser = SSEParser()
+
+    def headers(self):
+        self.t_headers = time.monotonic()
+
+    def chunk(self, data: bytes):
+        now = time.monotonic()
+        if self.t_first_byte is None:
+            self.t_first_byte = now
+        if len(self.raw_head) < 280:
+            self.raw_head += data[:280 - len(self.raw_head)]
+        self._events(self._parser.feed(data), now)
+
+    def end(self):
+        now = time.monotonic()
+        self._events(self._parser.close(), now)
+        self.t_end = now
+
+    def _events(self, events, now):
+        for ev in events:
+            self.frames += 1
+            token, done = clone_token(ev["data"])
+            if done:
+                self.done, self.t_done = True, now
+                self.final_text = _final_text(ev["data"])
+            elif token:
+                self.token_times.append(now)
+                self.parts.append(token)
+
+    def summary(self) -> dict:
+        rel = lambda t: round(t - self.t0, 3) if t is not None else None
+        tt = self.token_times
+        gaps = [(b - a) * 1000 for a, b in zip(tt, tt[1:])]
+        span = tt[-1] - tt[0] if len(tt) > 1 else 0
+        return {
+            "ttfb_s": rel(self.t_headers),
+            "first_byte_s": rel(self.t_first_byte),
+            "ttft_s": rel(tt[0]) if tt else None,
+            "total_s": rel(self.t_done or self.t_end),
+            "frames": self.frames,
+            "tokens": len(tt),
+            "tokens_per_s": round((len(tt) - 1) / span, 1) if span > 0 else None,
+            "gap_ms": {k: (round(percentile(gaps, p), 1) if gaps else None)
+                       for k, p in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+            "done": self.done,
+            "text_matches_final": None if self.final_text is None else self.final_text == self.text,
+            "chars": sum(len(p) for p in self.parts),
+        }
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def stream_chat(url: str, api_key: str, payload: dict, timeout: float = 120) -> dict:
+    """POST one streaming chat request and measure it.
+
+    Returns summary() plus "status" (str, "000" on a transport error),
+    "text" (the assembled reply), "preview" (first raw bytes) and "error".
+    """
+    headers = {"x-api-key": api_key, "Content-Type": "application/json", "Accept": "text/event-stream"}
+    meter = StreamMeter()
+    status, error = "000", None
+    try:
+        with http_client.stream("POST", url, headers=headers, payload=payload, timeout=timeout) as r:
+            meter.headers()
+            status = str(r.status)
+            for chunk in r.iter_chunks(8192):
+                meter.chunk(chunk)
+    except Exception as e:
+        error = str(e)[:200]
+    meter.end()
+    out = meter.summary()
+    out.update({"status": status, "text": meter.text,
+                "preview": meter.raw_head.decode("utf-8", errors="replace"), "error": error})
+    return out
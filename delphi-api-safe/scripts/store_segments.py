@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Columnar binary twin of an engagement-store month file (PII -- keep local).
+
+WHY
+---
+out/store/<clone>/<YYYY-MM>.jsonl is one JSON object per (contact, day).
+Reading two years of a large clone back meant millions of json.loads calls
+and a dict per row -- seconds of CPU and hundreds of MB before any analysis
+started. Next to each month file ingest now also writes
+
+    out/store/<clone>/<YYYY-MM>.seg
+
+holding the same rows as five packed columns, so a month loads with one
+read and no per-row parsing:
+
+    contact   u32   the clone-wide contact id (engagement_store.ContactDict)
+    day       i32   days since 1970-01-01
+    in        u32   inbound messages
+    out       u32   outbound messages
+    ch        u32   channel bitmask; bit i = the segment's channels[i]
+
+Layout, little-endian:
+
+    b"DSEG"  u32 version  u32 rows  u32 meta_len
+    meta     JSON {"channels": [...]}, space-padded to 4 bytes
+    columns  contact[rows] day[rows] in[rows] out[rows] ch[rows]
+
+The JSONL stays the format to read, diff and hand to other tools; the
+segment is derived from the same rows and can be rebuilt from it at any
+time (engagement_store.py segment). Readers ignore a segment older than
+its JSONL, or of another version (version 1 carried its own contact table).
+"""
+import array, datetime, json, os, struct, sys
+
+MAGIC = b"DSEG"
+VERSION = 2
+_HEAD = struct.Struct("<4sIII")
+COLUMNS = ("contact", "day", "in", "out", "ch")
+TYPES = {"contact": "I", "day": "i", "in": "I", "out": "I", "ch": "I"}
+MAX_CHANNELS = 32
+_EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+for _code in set(TYPES.values()):
+    assert array.array(_code).itemsize == 4, "store_segments needs 4-byte I/i arrays"
+
+
+def day_number(iso: str) -> int:
+    return datetime.date.fromisoformat(iso).toordinal() - _EPOCH
+
+
+def day_iso(n: int) -> str:
+    return datetime.date.fromordinal(n + _EPOCH).isoformat()
+
+
+class SegmentWriter:
+    """Collects one month's rows, in order, and writes them as a segment."""
+
+    def __init__(self):
+        self.channels = {}   # name -> bit
+        self.cols = {c: array.array(TYPES[c]) for c in COLUMNS}
+        self._days = {}      # iso -> day number
+
+    def add(self, u: int, d: str, i: int, o: int, ch: list):
+        day = self._days.get(d)
+        if day is None:
+            day = self._days[d] = day_number(d)
+        mask = 0
+        for c in ch:
+            bit = self.channels.get(c)
+            if bit is None:
+                if len(self.channels) == MAX_CHANNELS:
+                    raise ValueError(f"more than {MAX_CHANNELS} channels; no segment for this month")
+                bit = self.channels[c] = len(self.channels)
+            mask |= 1 << bit
+        cols = self.cols
+        cols["contact"].append(u)
+        cols["day"].append(day)
+        cols["in"].append(i)
+        cols["out"].append(o)
+        cols["ch"].append(mask)
+
+    def segment(self) -> "Segment":
+        return Segment(list(self.channels), self.cols, len(self.cols["contact"]))
+
+    def write(self, path: str):
+        meta = json.dumps({"channels": list(self.channels)}, separators=(",", ":")).encode()
+        meta += b" " * (-len(meta) % 4)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEAD.pack(MAGIC, VERSION, len(self.cols["contact"]), len(meta)))
+            f.write(meta)
+            for c in COLUMNS:
+                col = self.cols[c]
+                if sys.byteorder == "big":
+                    col = array.array(col.typecode, col)
+                    col.byteswap()
+                col.tofile(f)
+        os.replace(tmp, path)
+
+
+class Segment:
+    """One month's columns: `channels`, and an array per column in `cols`,
+    all `rows` long."""
+
+    def __init__(self, channels: list, cols: dict, rows: int):
+        self.channels = channels
+        self.cols = cols
+        self.rows = rows
+
+
+def read(path: str) -> Segment:
+    """Load a segment with one read. ValueError when it is not a whole
+    segment of this version (truncated, padded, or another format), so the
+    caller falls back to the JSONL."""
+    with open(path, "rb") as f:
+        buf = f.read()
+    if len(buf) < _HEAD.size:
+        raise ValueError(f"{path}: truncated store segment header")
+    magic, version, rows, meta_len = _HEAD.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a version-{VERSION} store segment")
+    if len(buf) != _HEAD.size + meta_len + 4 * len(COLUMNS) * rows:
+        raise ValueError(f"{path}: {len(buf)} bytes, header says "
+                         f"{_HEAD.size + meta_len + 4 * len(COLUMNS) * rows}")
+    at = _HEAD.size
+    meta = json.loads(buf[at:at + meta_len])
+    at += meta_len
+    cols = {}
+    for c in COLUMNS:
+        cols[c] = array.array(TYPES[c])
+        cols[c].frombytes(buf[at:at + 4 * rows])
+        if sys.byteorder == "big":
+            cols[c].byteswap()
+        at += 4 * rows
+    return Segment(meta["channels"], cols, rows)
@@ -1,55 +1,28 @@
 #!/usr/bin/env python3
 import argparse
 import json
-import shlex
-import subprocess
+import os
+import sys
 from typing import Any, Dict, List, Optional, Tuple
 
-BASE = "https://api.delphi.ai/v3"
-
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import http_client
+import pcm_stream
+import sse_stream
+from check_runner import CheckRunner
 
-def run(cmd: str) -> str:
-    p = subprocess.run(cmd, shell=True, text=True, capture_output=True)
-    return (p.stdout or "") + ("" if p.returncode == 0 else ("\n" + (p.stderr or "")))
+BASE = "https://api.delphi.ai/v3"
 
 
 def http_json(method: str, path: str, api_key: str, payload: Optional[dict] = None, stream: bool = False, max_time: int = 25) -> Tuple[str, str]:
-    data = ""
-    if payload is not None:
-        data = f" -d {shlex.quote(json.dumps(payload))}"
-    stream_flag = "-N " if stream else ""
-    cmd = (
-        f"curl -sS {stream_flag}--max-time {max_time} -w '\\nHTTP_STATUS:%{{http_code}}' -X {method} '{BASE}{path}' "
-        f"-H 'x-api-key: {api_key}' -H 'Content-Type: application/json'{data}"
-    )
-    raw = run(cmd)
-    if "HTTP_STATUS:" not in raw:
-        return "000", raw.strip()
-    body, status = raw.rsplit("HTTP_STATUS:", 1)
-    return status.strip(), body.strip()
-
-
-def http_binary(method: str, path: str, api_key: str, payload: Optional[dict] = None, max_time: int = 30) -> Tuple[str, int]:
-    """Make an HTTP request expecting binary response. Returns (status, byte_count)."""
-    data = ""
-    if payload is not None:
-        data = f" -d {shlex.quote(json.dumps(payload))}"
-    cmd = (
-        f"curl -sS --max-time {max_time} -w '\\nHTTP_STATUS:%{{http_code}}' -o /tmp/delphi_voice_test.bin -X {method} '{BASE}{path}' "
-        f"-H 'x-api-key: {api_key}' -H 'Content-Type: application/json'{data}"
-    )
-    raw = run(cmd)
-    if "HTTP_STATUS:" not in raw:
-        return "000", 0
-    _, status = raw.rsplit("HTTP_STATUS:", 1)
-    status = status.strip()
-    # Count bytes in output file
+    headers = {"x-api-key": api_key, "Content-Type": "application/json"}
+    if stream:
+        headers["Accept"] = "text/event-stream"
     try:
-        import os
-        byte_count = os.path.getsize("/tmp/delphi_voice_test.bin")
-    except Exception:
-        byte_count = 0
-    return status, byte_count
+        r = http_client.request(method, f"{BASE}{path}", headers=headers, payload=payload, timeout=max_time)
+    except Exception as e:
+        return "000", str(e)
+    return str(r.status), r.text.strip()
 
 
 def test_clone(api_key: str) -> Dict[str, Any]:
@@ -105,14 +78,10 @@ def test_chat(api_key: str, message: str, overrides: Optional[dict] = None) -> D
             "conversation_body": c_body[:240],
         }
 
-    s_status, s_body = http_json(
-        "POST",
-        "/stream",
-        api_key,
-        {"message": message, "conversation_id": cid},
-        stream=True,
-    )
-    s_ok = s_status == "200" and "data:" in s_body and "[DONE]" in s_body
+    # Read the SSE frames as they arrive so the check can time them (sse_stream.py).
+    m = sse_stream.stream_chat(f"{BASE}/stream", api_key, {"message": message, "conversation_id": cid}, timeout=25)
+    s_status = m["status"]
+    s_ok = s_status == "200" and m["frames"] > 0 and m["done"]
     return {
         "conversation": "PASS",
         "stream": "PASS" if s_ok else "FAIL",
@@ -121,12 +90,13 @@ def test_chat(api_key: str, message: str, overrides: Optional[dict] = None) -> D
         "conversation_http": c_status,
         "stream_http": s_status,
         "conversation_id": cid,
-        "stream_preview": s_body[:280],
+        "stream_preview": m["preview"],
+        "stream_metrics": {k: m[k] for k in ("ttfb_s", "ttft_s", "total_s", "tokens", "tokens_per_s", "gap_ms")},
     }
 
 
-def test_voice(api_key: str, message: str) -> Dict[str, Any]:
-    """Test voice streaming via POST /v3/voice/stream."""
+def test_voice(api_key: str, message: str, buffers_ms=pcm_stream.DEFAULT_BUFFERS_MS) -> Dict[str, Any]:
+    """Test voice streaming via POST /v3/voice/stream, measured in memory (pcm_stream.py)."""
     # Need a conversation_id first
     c_status, c_body = http_json("POST", "/conversation", api_key, {})
     cid = None
@@ -144,22 +114,28 @@ def test_voice(api_key: str, message: str) -> Dict[str, Any]:
             "byte_count": 0,
         }
 
-    v_status, byte_count = http_binary(
-        "POST",
-        "/voice/stream",
-        api_key,
-        {"message": message, "conversation_id": cid},
-        max_time=30,
-    )
+    m = pcm_stream.stream_voice(f"{BASE}/voice/stream", api_key,
+                                {"message": message, "conversation_id": cid},
+                                timeout=30, buffers_ms=buffers_ms)
+    v_status, byte_count = m["status"], m["bytes"]
 
     # Voice is PASS if we got 200 and received some PCM data (at least 4800 bytes = 0.1s of audio)
     v_ok = v_status == "200" and byte_count >= 4800
+    if v_ok:
+        note = "stream is all silence" if m["silent"] else ""
+    elif v_status != "200":
+        note = f"voice http {v_status}" + (f" {m['error']}" if m["error"] else "")
+    else:
+        note = f"too few bytes ({byte_count})"
     return {
         "voice": "PASS" if v_ok else "FAIL",
         "voice_http": v_status,
         "byte_count": byte_count,
-        "duration_estimate": f"{byte_count / 48000:.1f}s" if byte_count > 0 else "0s",
-        "note": "" if v_ok else (f"voice http {v_status}" if v_status != "200" else f"too few bytes ({byte_count})"),
+        "duration_estimate": f"{m['audio_s']:.1f}s",
+        "note": note,
+        "voice_metrics": {k: m[k] for k in ("ttfb_s", "ttfa_s", "total_s", "audio_s", "chunks",
+                                            "realtime_factor", "odd_chunks", "silent",
+                                            "playback", "smooth_buffer_ms")},
     }
 
 
@@ -577,6 +553,19 @@ def summarize(result: Dict[str, Any]) -> Dict[str, Any]:
     return {"overall": overall, "checks": len(checks), "passed": sum(1 for x in checks if x)}
 
 
+def check_verdict(name: str, result: Dict[str, Any]) -> str:
+    """PASS/FAIL for one check's result, whatever shape it reports in."""
+    for v in (result.get(name), result.get("overall")):
+        if v in ("PASS", "FAIL", "SKIP"):
+            return v
+    for v in result.values():
+        if v in ("PASS", "FAIL", "SKIP"):
+            return v
+    if any(isinstance(v, dict) and "pass" in v for v in result.values()):
+        return summarize(result)["overall"]
+    return "-"
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="Delphi V3 tester (clone + chat + voice + search + agent + users + tags + info + conversations + questions)")
     ap.add_argument("--api-key", required=True)
@@ -589,6 +578,8 @@ def main() -> None:
     ap.add_argument("--info-text", help="Text for user info create/delete test")
     ap.add_argument("--allow-write", action="store_true", help="Enable write endpoints (PUT/PATCH/POST/DELETE)")
     ap.add_argument("--test-voice", action="store_true", help="Include voice streaming test")
+    ap.add_argument("--voice-buffers-ms", default=",".join(map(str, pcm_stream.DEFAULT_BUFFERS_MS)),
+                    help="Client jitter-buffer sizes (ms, comma-separated) to simulate playback underruns for")
     ap.add_argument("--test-search", action="store_true", help="Include knowledge base search tests")
     ap.add_argument("--search-query", default="What is your background?", help="Query string for search tests")
     ap.add_argument("--language", help="overrides.default_language (BCP-47, e.g. es) on conversation create")
@@ -601,18 +592,27 @@ def main() -> None:
     ap.add_argument("--test-agent", action="store_true", help="Include the knowledge-base agent test (POST /v3/agent/run — slower/heavier than search)")
     ap.add_argument("--agent-objective", default="Summarize the key themes covered in the knowledge base.", help="Objective string for the agent/run test")
     ap.add_argument("--agent-thinking-time", type=int, default=10, help="thinking_time budget in seconds (1-120) for the agent/run test")
+    ap.add_argument("--workers", type=int, default=8, help="Checks run concurrently (1 = one at a time, the old behaviour)")
     args = ap.parse_args()
 
     output: Dict[str, Any] = {"account": args.account, "mode": args.mode}
+    key = args.api_key
+
+    # Independent checks run concurrently (check_runner.py). Only the checks on
+    # the chat conversation depend on another: history/insights wait for chat,
+    # and the write tests on it run in order, with delete last.
+    runner = CheckRunner(args.workers)
+    chat_cid = lambda r: (r.get("chat") or {}).get("conversation_id")
+    on_chat = lambda test: lambda r: test(key, chat_cid(r)) if chat_cid(r) else None
 
-    # Always discover clone identity first
-    output["clone"] = test_clone(args.api_key)
+    # Always discover clone identity
+    runner.add("clone", lambda r: test_clone(key))
 
     # Always test questions (read-only, available to all clones)
-    output["questions"] = test_questions(args.api_key)
+    runner.add("questions", lambda r: test_questions(key))
 
     # Always test list users (read-only)
-    output["list_users"] = test_list_users(args.api_key)
+    runner.add("list_users", lambda r: test_list_users(key))
 
     if args.mode in ("chat", "full"):
         overrides = {}
@@ -620,52 +620,58 @@ def main() -> None:
         if args.lock_language: overrides["multiple_languages"] = False
         if args.purpose: overrides["purpose"] = args.purpose
         if overrides: output["overrides_sent"] = overrides
-        output["chat"] = test_chat(args.api_key, args.message, overrides or None)
-        chat_cid = output["chat"].get("conversation_id") if "chat" in output else None
+        runner.add("chat", lambda r: test_chat(key, args.message, overrides or None))
 
         # Test conversation history if we got a conversation_id
-        if chat_cid:
-            output["conversation_history"] = test_conversation_history(args.api_key, chat_cid)
-            output["conversation_insights"] = test_conversation_insights(args.api_key, chat_cid)
+        runner.add("conversation_history", on_chat(test_conversation_history), after=("chat",))
+        runner.add("conversation_insights", on_chat(test_conversation_insights), after=("chat",))
 
         # Test conversation list if we have a user email
         if args.user_email:
-            output["list_conversations"] = test_list_conversations(args.api_key, args.user_email)
+            runner.add("list_conversations", lambda r: test_list_conversations(key, args.user_email))
 
         # Write-dependent conversation tests
-        if chat_cid and args.allow_write:
-            output["append_clone_message"] = test_append_clone_message(args.api_key, chat_cid)
-            output["update_title"] = test_update_conversation_title(args.api_key, chat_cid)
+        if args.allow_write:
+            runner.add("append_clone_message", on_chat(test_append_clone_message), after=("chat",))
+            runner.add("update_title", on_chat(test_update_conversation_title),
+                       after=("append_clone_message",))
             # Delete conversation last (soft-delete)
-            output["delete_conversation"] = test_delete_conversation(args.api_key, chat_cid)
+            runner.add("delete_conversation", on_chat(test_delete_conversation),
+                       after=("conversation_history", "conversation_insights", "update_title"))
 
     # Voice tests (optional, since not all clones have voice)
     if args.test_voice:
-        output["voice"] = test_voice(args.api_key, args.message)
-        output["synthesize"] = test_synthesize(args.api_key)
+        buffers = tuple(int(b) for b in args.voice_buffers_ms.split(",") if b.strip())
+        runner.add("voice", lambda r: test_voice(key, args.message, buffers))
+        runner.add("synthesize", lambda r: test_synthesize(key))
 
     # Search tests (optional, requires Immortal plan)
     if args.test_search:
-        output["search_query"] = test_search_query(args.api_key, args.search_query)
-        output["search_content"] = test_search_content(args.api_key, args.search_query)
+        runner.add("search_query", lambda r: test_search_query(key, args.search_query))
+        runner.add("search_content", lambda r: test_search_content(key, args.search_query))
 
     if args.test_ask:
-        output["ask"] = test_ask(args.api_key, args.ask_question)
+        runner.add("ask", lambda r: test_ask(key, args.ask_question))
 
     if args.test_agent:
-        output["agent_run"] = test_agent_run(args.api_key, args.agent_objective, args.agent_thinking_time)
+        runner.add("agent_run", lambda r: test_agent_run(key, args.agent_objective, args.agent_thinking_time))
 
     if args.mode == "full":
-        lookup_tags = test_lookup_and_tags(args.api_key, args.user_email, args.allow_write, args.tag_name)
-        output["lookup_tags"] = lookup_tags
-
-        user_id = args.user_id or lookup_tags.get("derived_user_id")
-        if user_id:
-            output["users"] = test_user_endpoints(args.api_key, user_id, args.allow_write, args.tag_name, args.info_text)
-        else:
-            output["users"] = {
+        runner.add("lookup_tags", lambda r: test_lookup_and_tags(key, args.user_email, args.allow_write, args.tag_name))
+
+        def users_check(r):
+            user_id = args.user_id or r["lookup_tags"].get("derived_user_id")
+            if user_id:
+                return test_user_endpoints(key, user_id, args.allow_write, args.tag_name, args.info_text)
+            return {
                 "note": "Skipped user endpoint checks because no user_id available. Provide --user-id or --user-email."
             }
+        runner.add("users", users_check, after=("lookup_tags",))
+
+    results, timings = runner.run()
+    output.update(results)
+    output["timings"] = runner.timing_report(timings)
+    runner.print_timings(timings, lambda n: check_verdict(n, output[n]))
 
     # summaries
     if "clone" in output:
@@ -682,6 +688,8 @@ def main() -> None:
             "overall": c.get("overall", "UNKNOWN"),
             "conversation_http": c.get("conversation_http"),
             "stream_http": c.get("stream_http"),
+            "ttft_s": (c.get("stream_metrics") or {}).get("ttft_s"),
+            "tokens_per_s": (c.get("stream_metrics") or {}).get("tokens_per_s"),
         }
 
     if "voice" in output:
@@ -691,6 +699,9 @@ def main() -> None:
             "voice_http": v.get("voice_http"),
             "byte_count": v.get("byte_count"),
             "duration_estimate": v.get("duration_estimate"),
+            "ttfa_s": (v.get("voice_metrics") or {}).get("ttfa_s"),
+            "realtime_factor": (v.get("voice_metrics") or {}).get("realtime_factor"),
+            "smooth_buffer_ms": (v.get("voice_metrics") or {}).get("smooth_buffer_ms"),
         }
 
     if "synthesize" in output:
@@ -24,38 +24,32 @@ Usage:
 import argparse
 import json
 import os
-import shlex
-import subprocess
 import sys
 import time
 from typing import Any, Dict, Optional, Tuple
 
-BASE = "https://api.delphi.ai/v4"
-
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import http_client
+import sse_stream
+from check_runner import CheckRunner
 
-def run(cmd: str) -> str:
-    p = subprocess.run(cmd, shell=True, text=True, capture_output=True)
-    return (p.stdout or "") + ("" if p.returncode == 0 else ("\n" + (p.stderr or "")))
+BASE = "https://api.delphi.ai/v4"
 
 
 def http_json(method: str, path: str, api_key: str, payload: Optional[dict] = None,
               max_time: int = 45) -> Tuple[str, Any, str]:
     """Returns (status, parsed_json_or_None, raw_body_truncated)."""
-    data = f" -d {shlex.quote(json.dumps(payload))}" if payload is not None else ""
-    cmd = (
-        f"curl -sS --max-time {max_time} -w '\\nHTTP_STATUS:%{{http_code}}' -X {method} "
-        f"'{BASE}{path}' -H 'x-api-key: {api_key}' -H 'Content-Type: application/json'{data}"
-    )
-    raw = run(cmd)
-    if "HTTP_STATUS:" not in raw:
-        return "000", None, raw.strip()[:200]
-    body, status = raw.rsplit("HTTP_STATUS:", 1)
-    body = body.strip()
+    try:
+        r = http_client.request(method, f"{BASE}{path}", payload=payload, timeout=max_time,
+                                headers={"x-api-key": api_key, "Content-Type": "application/json"})
+    except Exception as e:
+        return "000", None, str(e)[:200]
+    body = r.text.strip()
     try:
         parsed = json.loads(body)
     except Exception:
         parsed = None
-    return status.strip(), parsed, body[:200]
+    return str(r.status), parsed, body[:200]
 
 
 def err_note(status: str, parsed: Any, raw: str) -> str:
@@ -151,8 +145,9 @@ def test_content(api_key: str) -> Tuple[Dict[str, Any], Optional[str]]:
     return res, content_id
 
 
-def test_conversations(api_key: str, message: str) -> Dict[str, Any]:
-    """Exercise the v4 conversational surface added 2026-08-02.
+def test_conversations(api_key: str, message: str, stream: bool = False) -> Dict[str, Any]:
+    """Exercise the v4 conversational surface added 2026-08-02. With `stream`,
+    also send one message via /messages/stream and time it (sse_stream.py).
 
     Gated on `conversations:write` — most dlph_ App-Launch keys lack it and get
     403 here while legacy dsk- keys succeed. A 403 is reported as a scope gap,
@@ -203,6 +198,20 @@ def test_conversations(api_key: str, message: str) -> Dict[str, Any]:
     if not ok2:
         out["messages_sync_note"] = err_note(st2, parsed2, raw2)
 
+    # SSE send — same CloneResponse frames as /v3/stream. Runs after the sync
+    # send, so the thread is known to exist by now.
+    if stream:
+        m = sse_stream.stream_chat(f"{BASE}/conversations/{cid}/messages/stream", api_key,
+                                   {"text": message}, timeout=120)
+        ok_s = m["status"] == "200" and m["tokens"] > 0 and m["done"]
+        out["messages_stream"] = "PASS" if ok_s else "FAIL"
+        out["messages_stream_http"] = m["status"]
+        out["stream_metrics"] = {k: m[k] for k in ("ttfb_s", "ttft_s", "total_s", "tokens",
+                                                   "tokens_per_s", "gap_ms")}
+        if not ok_s:
+            out["messages_stream_note"] = m["error"] or (
+                "stream ended without [DONE]" if m["status"] == "200" else f"http {m['status']} {m['preview'][:160]}")
+
     # insights — async, so an empty list is a PASS
     st3, parsed3, raw3 = http_json("GET", f"/conversations/{cid}/insights?limit=5", api_key)
     ins = unwrap(parsed3)
@@ -322,50 +331,68 @@ def main() -> None:
                     help="Include the v4 conversational surface (create + synchronous send + "
                          "insights). Needs `conversations:write`; invokes the model.")
     ap.add_argument("--conversation-message", default="Reply in one short sentence.")
+    ap.add_argument("--test-stream", action="store_true",
+                    help="With --test-conversations, also send via /messages/stream and report "
+                         "time-to-first-token, tokens/s and inter-token gaps.")
     ap.add_argument("--test-ask", action="store_true",
                     help="Include POST /v4/ask (stateless Q&A; verified working 2026-08-02).")
     ap.add_argument("--ask-question", default="What is your background?")
+    ap.add_argument("--workers", type=int, default=8,
+                    help="Checks run concurrently (1 = one at a time, the old behaviour).")
     args = ap.parse_args()
     key = resolve_key(args)
 
     out: Dict[str, Any] = {"api": "v4", "base": BASE}
 
-    out["profile"] = test_profile(key)
-    out["profile_questions"], _ = check_get("profile_questions", "/profile/questions",
-                                            key, nested=("questions",), want="list")
-
-    username = args.username or out["profile"].get("username")
-    if username:
-        out["profile_by_username"], _ = check_get(
-            "profile_by_username", f"/profiles/{username}", key, want="dict")
-
-    out["contacts"], contact_id = test_contacts(key)
-    if contact_id:
-        out["contact_detail"] = test_contact_detail(key, contact_id)
-        out["contact_threads"] = test_contact_threads(key, contact_id)
-
-    out["contact_tags"], _ = check_get("contact_tags", "/contact-tags", key, want="list")
-    out["contact_property_defs"], _ = check_get(
-        "contact_property_defs", "/contact-properties/definitions", key, want="list")
-
-    out["content"], content_id = test_content(key)
-    if content_id:
-        out["content_detail"], _ = check_get(
-            "content_detail", f"/content/{content_id}", key, want="dict")
-
-    out["integrations"], _ = check_get("integrations", "/integrations?limit=5", key, want="list")
-    out["webhook_subscriptions"], _ = check_get(
-        "webhook_subscriptions", "/webhook-subscriptions", key,
-        nested=("subscriptions",), want="list")
+    # Checks run concurrently (check_runner.py); the detail checks wait for the
+    # list they take an id from. check_get/test_contacts/test_content return
+    # (result, payload) tuples -- only the result goes into the report.
+    runner = CheckRunner(args.workers)
+    first = lambda v: v[0] if isinstance(v, tuple) else v
+
+    runner.add("profile", lambda r: test_profile(key))
+    runner.add("profile_questions", lambda r: check_get(
+        "profile_questions", "/profile/questions", key, nested=("questions",), want="list"))
+
+    def profile_by_username(r):
+        username = args.username or r["profile"].get("username")
+        if username:
+            return check_get("profile_by_username", f"/profiles/{username}", key, want="dict")
+    runner.add("profile_by_username", profile_by_username, after=("profile",))
+
+    contact_id = lambda r: r["contacts"][1] if isinstance(r["contacts"], tuple) else None
+    runner.add("contacts", lambda r: test_contacts(key))
+    runner.add("contact_detail", lambda r: test_contact_detail(key, contact_id(r)) if contact_id(r) else None,
+               after=("contacts",))
+    runner.add("contact_threads", lambda r: test_contact_threads(key, contact_id(r)) if contact_id(r) else None,
+               after=("contacts",))
+
+    runner.add("contact_tags", lambda r: check_get("contact_tags", "/contact-tags", key, want="list"))
+    runner.add("contact_property_defs", lambda r: check_get(
+        "contact_property_defs", "/contact-properties/definitions", key, want="list"))
+
+    content_id = lambda r: r["content"][1] if isinstance(r["content"], tuple) else None
+    runner.add("content", lambda r: test_content(key))
+    runner.add("content_detail", lambda r: check_get(
+        "content_detail", f"/content/{content_id(r)}", key, want="dict") if content_id(r) else None,
+        after=("content",))
+
+    runner.add("integrations", lambda r: check_get("integrations", "/integrations?limit=5", key, want="list"))
+    runner.add("webhook_subscriptions", lambda r: check_get(
+        "webhook_subscriptions", "/webhook-subscriptions", key, nested=("subscriptions",), want="list"))
 
     if args.test_conversations:
-        out["conversations"] = test_conversations(key, args.conversation_message)
+        runner.add("conversations", lambda r: test_conversations(key, args.conversation_message,
+                                                                 args.test_stream))
     if args.test_ask:
-        out["ask"] = test_ask(key, args.ask_question)
+        runner.add("ask", lambda r: test_ask(key, args.ask_question))
     if args.test_generate:
-        out["generate"] = test_generate(key, args.generate_prompt, args.idempotency_key)
+        runner.add("generate", lambda r: test_generate(key, args.generate_prompt, args.idempotency_key))
     if args.test_llm:
-        out["llm"] = test_llm(key, args.llm_prompt)
+        runner.add("llm", lambda r: test_llm(key, args.llm_prompt))
+
+    results, timings = runner.run()
+    out.update({name: first(v) for name, v in results.items()})
 
     # Roll-up. SKIP is deliberately NOT counted as a failure: it means the key
     # lacks a scope, which is a provisioning gap rather than a fault, and making
@@ -385,7 +412,7 @@ def main() -> None:
             if verdict == "SKIP":
                 skipped.append(f"{name}.{label}" if label != name else name)
             elif verdict in ("PASS", "FAIL") and (label == name or label in
-                    ("messages_sync", "insights", "conversations")):
+                    ("messages_sync", "messages_stream", "insights", "conversations")):
                 checks.append((f"{name}.{label}" if label != name else name, verdict))
 
     failed = [n for n, v in checks if v == "FAIL"]
@@ -398,6 +425,9 @@ def main() -> None:
         "regressions_502": regressions,
     }
 
+    out["timings"] = runner.timing_report(timings)
+    runner.print_timings(timings, lambda n: out[n].get(n, "-"))
+
     print(json.dumps(out, indent=2))
 
 
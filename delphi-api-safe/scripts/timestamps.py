@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Decoding for the ISO-8601 timestamps Delphi returns, shared by every script.
+
+WHY
+---
+Each script had its own copy of
+
+    datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+inside a try, called per message -- and audience_audit.compute_retention
+called it up to three times on the same created_at. On message-heavy SMS
+clones that is a large share of the runtime. Here it is decoded once:
+
+    parse(s)      -> aware datetime, or None for anything unparseable
+    epoch(s)      -> int seconds since 1970 (naive values read as UTC), or None;
+                     also takes an already-parsed datetime
+    day(s)        -> datetime.date as written in the string, or None
+    bucket(s)     -> (day, "YYYY-MM-DD") in one lookup, or None
+
+Day bucketing is by the date as written (what `.date()` gave the old code,
+offset and all), so day() / bucket() only check that the string parses and
+then look its date prefix up in a memo: every message on a given day shares
+one date object and one key string instead of formatting its own.
+
+Accepted: "2026-05-03T14:07:21Z", "...21.123456Z", "...21+00:00", and any
+other form datetime.fromisoformat accepts. None, "" and garbage give None,
+never an exception.
+"""
+import datetime, sys
+
+UTC = datetime.timezone.utc
+
+if sys.version_info >= (3, 11):
+    _fromiso = datetime.datetime.fromisoformat   # takes a trailing Z itself
+else:
+    def _fromiso(s):
+        return datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+_days = {}   # "YYYY-MM-DD" -> (date, key); one entry per distinct day seen
+
+
+def parse(s):
+    try:
+        return _fromiso(s)
+    except (TypeError, ValueError, AttributeError):
+        pass
+    try:   # the odd form only the "Z" -> "+00:00" spelling accepts, e.g. "2026-05-03Z"
+        return datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def epoch(s):
+    dt = s if isinstance(s, datetime.datetime) else parse(s)
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return int(dt.timestamp())
+
+
+def bucket(s, dt=None):
+    """(date, "YYYY-MM-DD") for `s`, or None. Pass `dt` when it is already parsed."""
+    if dt is None:
+        dt = parse(s)
+        if dt is None:
+            return None
+    prefix = s[:10] if s[4:5] == "-" else None   # extended form: the prefix is the date
+    hit = _days.get(prefix)
+    if hit is None:
+        d = dt.date()
+        hit = (d, d.isoformat())
+        if prefix is not None and prefix == hit[1]:
+            _days[prefix] = hit
+    return hit
+
+
+def day(s, dt=None):
+    hit = bucket(s, dt)
+    return hit[0] if hit else None
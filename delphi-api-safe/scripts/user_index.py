@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Persisted per-clone index of the /v3/users audience, refreshed incrementally (PII).
+
+WHY
+---
+Knowing how big the real audience is (d30_retention's coverage check, the
+full live sweep) meant walking every page of /v3/users?limit=200 on every run
+-- hundreds of requests on a large clone, just to count and filter emails.
+
+This keeps the last sweep per clone:
+
+    out/cache/<clone>/users.json
+    {"swept_at": "...", "order": "newest_first", "users": [{"user_id","email","date_joined"}, ...]}
+
+and refreshes it as cheaply as the API's ordering allows:
+
+  * newest_first   pages from the top and STOPS at the first page containing a
+                   user already in the index -- everything past it is known.
+                   A handful of requests instead of hundreds.
+  * otherwise      (oldest-first, or no usable order) a full sweep, diffed
+                   against the index so the run can report who joined/left.
+
+The order is not documented for /v3/users, so it is detected from the
+`date_joined` sequence of each full sweep rather than assumed. Incremental
+refresh cannot see deletions or revocations, so a full sweep is forced once the
+index is older than FULL_SWEEP_DAYS (or with --full-user-sweep).
+"""
+import datetime, json, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import audience_audit as aa
+import checkpoint
+import history_cache
+import timestamps
+
+FULL_SWEEP_DAYS = 7
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _slim(u: dict) -> dict:
+    return {"user_id": u.get("user_id"), "email": u.get("email"), "date_joined": u.get("date_joined")}
+
+
+def _joined(u: dict):
+    return timestamps.parse(u.get("date_joined"))
+
+
+def detect_order(users: list) -> str:
+    """'newest_first' / 'oldest_first' from page order of date_joined, else 'unknown'."""
+    ts = [t for t in (_joined(u) for u in users) if t]
+    if len(set(ts)) < 2:
+        return "unknown"
+    pairs = list(zip(ts, ts[1:]))
+    if all(a >= b for a, b in pairs):
+        return "newest_first"
+    if all(a <= b for a, b in pairs):
+        return "oldest_first"
+    return "unknown"
+
+
+def index_path(clone: str) -> str:
+    return os.path.join(history_cache.clone_dir(clone), "users.json")
+
+
+def load(clone: str):
+    path = index_path(clone)
+    return json.load(open(path)) if os.path.exists(path) else None
+
+
+def save(clone: str, idx: dict):
+    path = index_path(clone)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    json.dump(idx, open(tmp, "w"), separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _incremental(key: str, idx: dict):
+    """newest_first: page from the top until a known user shows up."""
+    known = {u["user_id"] for u in idx["users"]}
+    new, cursor, requests = [], None, 0
+    while True:
+        d = aa.users_page(key, cursor)
+        requests += 1
+        page = [_slim(u) for u in d.get("users", [])]
+        new.extend(u for u in page if u["user_id"] not in known)
+        cursor = d.get("next_cursor")
+        if any(u["user_id"] in known for u in page) or not d.get("has_more") or not cursor:
+            return new, requests
+
+
+def refresh(key: str, clone: str, full: bool = False, sweep: str = None, resume: bool = False,
+            verbose: bool = True):
+    """Current audience as [{'user_id','email','date_joined'}] plus a summary dict.
+
+    With `sweep`, a full sweep is journaled to that checkpoint.Checkpoint
+    (`resume` as in --resume). It is opened only when a full sweep runs, so
+    the incremental path leaves an interrupted sweep's journal alone."""
+    idx = load(clone)
+    age = None
+    if idx is not None:
+        age = _now() - datetime.datetime.fromisoformat(idx["swept_at"])
+    if (not full and idx is not None and idx.get("order") == "newest_first"
+            and age < datetime.timedelta(days=FULL_SWEEP_DAYS)):
+        new, requests = _incremental(key, idx)
+        users = new + idx["users"]
+        idx = {"swept_at": idx["swept_at"], "refreshed_at": _now().isoformat(),
+               "order": "newest_first", "users": users}
+        summary = {"mode": "incremental", "requests": requests, "added": len(new), "removed": None}
+    else:
+        ckpt = checkpoint.Checkpoint(clone, sweep, resume) if sweep else None
+        swept = [_slim(u) for u in aa.sweep_users(key, ckpt)]
+        before = {u["user_id"] for u in idx["users"]} if idx else set()
+        after = {u["user_id"] for u in swept}
+        users = swept
+        now = _now().isoformat()
+        idx = {"swept_at": now, "refreshed_at": now, "order": detect_order(swept), "users": users}
+        summary = {"mode": "full", "requests": None,
+                   "added": len(after - before) if before else None,
+                   "removed": len(before - after) if before else None}
+    save(clone, idx)
+    summary.update({"users": len(users), "order": idx["order"]})
+    if verbose:
+        print(f"  user index ({summary['mode']}): {len(users)} users, order={idx['order']}, "
+              f"+{summary['added'] or 0}"
+              + (f" / -{summary['removed']}" if summary["removed"] is not None else "")
+              + (f" in {summary['requests']} request(s)" if summary["requests"] else ""),
+              file=sys.stderr)
+    return users, summary
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Lazy, prefetching walker for V4's cursor-paginated list endpoints.
+
+WHY
+---
+test_delphi_v4 only reads page one of each list and reports whether a
+`nextCursor` came back. A bulk V4 job (every contact, every content item, a
+contact's whole thread history) needs the rest, and a naive loop pays a full
+round trip between pages while the consumer sits idle, or collects everything
+into one list first.
+
+V4 pagination is uniform: `?cursor=<nextCursor>&limit=<1..200>`, the page in
+`data` (sometimes one level deeper), `nextCursor: null` on the last page.
+
+    for contact in v4_pages.CursorPages(key, "/contacts"):
+        ...
+    for thread in v4_pages.CursorPages(key, f"/contacts/{cid}/threads"):
+        ...
+    subs = v4_pages.CursorPages(key, "/webhook-subscriptions", nested=("subscriptions",))
+
+  * LAZY        nothing is fetched until iteration starts, and iteration can
+                stop at any point (break / close) without fetching the rest.
+  * PREFETCH    as soon as page N arrives, page N+1 is requested on a
+                background thread, so the network overlaps the consumer's work.
+  * BOUNDED     at most two pages are held: the one being consumed and the
+                one in flight. Memory does not grow with the listing.
+  * PACED       every request goes through the key's AdaptiveLimiter and is
+                retried on 429/5xx (rate_limit.py), like the audits.
+
+A 4xx that is not retryable (403 missing scope, 404) is raised as
+http_client.HTTPStatusError from the iteration, at the page it happened on.
+
+Usage (CLI -- counts, or NDJSON of every item with --ndjson):
+    python3 scripts/v4_pages.py --account <name> /contacts
+    python3 scripts/v4_pages.py --account <name> /content --ndjson > content.ndjson
+"""
+import argparse, concurrent.futures, json, os, sys, time, urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import rate_limit as rl
+
+BASE = "https://api.delphi.ai/v4"
+MAX_LIMIT = 200
+UA = "delphi-api-safe/1.0"
+
+
+def get_page(api_key: str, url: str, retries: int = 5) -> dict:
+    """GET one page with per-key pacing and retries on 429/5xx; returns the JSON."""
+    headers = {"x-api-key": api_key, "User-Agent": UA}
+    return rl.paced_request("GET", url, api_key, headers=headers, retries=retries).json()
+
+
+class CursorPages:
+    """Iterate the items of one V4 list endpoint across all its pages.
+
+    Iterating yields items one by one; pages() yields each page's list.
+    `stats` is filled in as it goes: pages, items, and wait_s -- the time the
+    consumer actually spent blocked on the network (near zero when prefetch
+    keeps up).
+    """
+
+    def __init__(self, api_key: str, path: str, *, limit: int = MAX_LIMIT, nested: tuple = (),
+                 prefetch: bool = True, base: str = BASE, retries: int = 5):
+        self.api_key, self.nested, self.prefetch, self.retries = api_key, nested, prefetch, retries
+        sep = "&" if "?" in path else "?"
+        if "limit=" not in path:
+            path = f"{path}{sep}limit={max(1, min(MAX_LIMIT, limit))}"
+            sep = "&"
+        self.url, self._sep = f"{base}{path}", sep
+        self.stats = {"pages": 0, "items": 0, "wait_s": 0.0}
+
+    def _fetch(self, cursor):
+        url = self.url + (f"{self._sep}cursor={urllib.parse.quote(cursor, safe='')}" if cursor else "")
+        parsed = get_page(self.api_key, url, self.retries)
+        data = parsed.get("data") if isinstance(parsed, dict) else None
+        nxt = parsed.get("nextCursor") if isinstance(parsed, dict) else None
+        for key in self.nested:
+            if isinstance(data, dict) and key in data:
+                nxt = nxt or data.get("nextCursor")
+                data = data[key]
+        if not isinstance(data, list):
+            raise ValueError(f"{url}: expected a list page, got {type(data).__name__}")
+        return data, nxt
+
+    def pages(self):
+        ex = concurrent.futures.ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        pending, seen = None, set()
+        try:
+            cursor = None
+            while True:
+                t0 = time.monotonic()
+                page, nxt = pending.result() if pending is not None else self._fetch(cursor)
+                self.stats["wait_s"] = round(self.stats["wait_s"] + time.monotonic() - t0, 3)
+                pending = None
+                # a cursor we already followed would loop forever -- treat as the end
+                if nxt and nxt not in seen:
+                    seen.add(nxt)
+                    cursor = nxt
+                    if ex is not None:
+                        pending = ex.submit(self._fetch, cursor)
+                else:
+                    cursor = None
+                self.stats["pages"] += 1
+                self.stats["items"] += len(page)
+                yield page
+                del page
+                if cursor is None:
+                    return
+        finally:
+            if pending is not None:
+                pending.cancel()
+            if ex is not None:
+                ex.shutdown(wait=False)
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Walk every page of a V4 list endpoint.")
+    ap.add_argument("path", help="e.g. /contacts, /content, /contacts/<id>/threads, /webhook-subscriptions")
+    ap.add_argument("--api-key", help="Delphi API key (or $DELPHI_API_KEY, or --account).")
+    ap.add_argument("--account", help="Account name from keys.json.")
+    ap.add_argument("--nested", default="", help="Key the list sits under inside `data` "
+                    "(default: 'subscriptions' for /webhook-subscriptions).")
+    ap.add_argument("--limit", type=int, default=MAX_LIMIT, help="Page size, 1-200.")
+    ap.add_argument("--max-items", type=int, default=0, help="Stop after this many items (0 = all).")
+    ap.add_argument("--no-prefetch", action="store_true", help="Fetch pages strictly one after another.")
+    ap.add_argument("--ndjson", action="store_true", help="Print every item as one JSON line.")
+    args = ap.parse_args()
+    import audience_audit
+    key = audience_audit.resolve_key(args)
+    nested = tuple(filter(None, args.nested.split("."))) or \
+        (("subscriptions",) if args.path.startswith("/webhook-subscriptions") else ())
+
+    walker = CursorPages(key, args.path, limit=args.limit, nested=nested, prefetch=not args.no_prefetch)
+    t0 = time.monotonic()
+    n = 0
+    for item in walker:
+        n += 1
+        if args.ndjson:
+            print(json.dumps(item))
+        if args.max_items and n >= args.max_items:
+            break
+    stats = dict(walker.stats, wall_s=round(time.monotonic() - t0, 2))
+    print(json.dumps(stats), file=sys.stderr if args.ndjson else sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Content-addressed local cache of /v3/voice/synthesize audio.
+
+WHY
+---
+Greetings, hold lines and other canned replies are synthesized over and over,
+and every call takes seconds and spends voice quota for audio we already
+have. Synthesis is deterministic enough to reuse: the same clone, the same
+voice, the same text give interchangeable audio. So the decoded PCM is kept
+on disk, addressed by a digest of exactly those three things:
+
+    out/cache/<clone>/voice/<digest[:2]>/<digest>.pcm     raw 24 kHz s16le mono
+
+    digest = sha256(canonical JSON of {"voice": <settings>, "text": <text>})
+
+`voice` is whatever determines the sound besides the text. The API takes only
+`text` and uses the clone's configured voice, so by default it is empty. Pass
+a label (e.g. {"voice": "v2"}) and change it when the clone's voice is
+changed; older entries then simply stop matching and age out.
+
+  * BOUNDED    total size per clone is capped (default 256 MB); the least
+               recently used files are evicted first. A hit refreshes the
+               file's mtime, which is what recency is measured by, so the
+               order survives across runs.
+  * ATOMIC     files are written to a temp name and renamed, so a reader
+               never sees half a clip and concurrent writers are harmless.
+
+Usage:
+    cache = voice_cache.VoiceCache(clone)
+    pcm, hit = cache.fetch_or_synthesize(api_key, "Hi, thanks for reaching out!")
+
+    python3 scripts/voice_cache.py --account <name> "Hi, thanks for reaching out!" --out hi.wav
+"""
+import argparse, base64, hashlib, json, os, sys, threading, time, wave
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import history_cache, http_client
+
+BASE = "https://api.delphi.ai/v3"
+DEFAULT_MAX_MB = 256
+SAMPLE_RATE = 24000
+
+
+def digest(text: str, voice: dict = None) -> str:
+    canonical = json.dumps({"voice": voice or {}, "text": text}, sort_keys=True,
+                           separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def synthesize(api_key: str, text: str, timeout: float = 60) -> bytes:
+    """One batch POST /v3/voice/synthesize, decoded to raw PCM bytes."""
+    r = http_client.request("POST", f"{BASE}/voice/synthesize", payload={"text": text}, timeout=timeout,
+                            headers={"x-api-key": api_key, "Content-Type": "application/json"})
+    r.raise_for_status()
+    audio = base64.b64decode(r.json().get("audio") or "")
+    if not audio:
+        raise ValueError("synthesize returned no audio")
+    return audio
+
+
+class VoiceCache:
+    """Thread-safe (clone, voice, text) -> PCM cache with a size-bounded LRU."""
+
+    def __init__(self, clone: str, max_mb: float = DEFAULT_MAX_MB, root: str = history_cache.CACHE_ROOT):
+        self.dir = os.path.join(history_cache.clone_dir(clone, root), "voice")
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = self.misses = self.evicted = 0
+        self._lock = threading.Lock()
+        self._index = {}   # digest -> (size, mtime)
+        if os.path.isdir(self.dir):
+            for sub in os.listdir(self.dir):
+                subdir = os.path.join(self.dir, sub)
+                if not os.path.isdir(subdir):
+                    continue
+                for name in os.listdir(subdir):
+                    if name.endswith(".pcm"):
+                        st = os.stat(os.path.join(subdir, name))
+                        self._index[name[:-4]] = (st.st_size, st.st_mtime)
+        self._bytes = sum(size for size, _ in self._index.values())
+
+    def _path(self, d: str) -> str:
+        return os.path.join(self.dir, d[:2], f"{d}.pcm")
+
+    def get(self, text: str, voice: dict = None):
+        """Cached PCM bytes, or None."""
+        d = digest(text, voice)
+        with self._lock:
+            if d not in self._index:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(d), "rb") as f:
+                    pcm = f.read()
+                os.utime(self._path(d))
+            except OSError:   # evicted by another process
+                self._bytes -= self._index.pop(d)[0]
+                self.misses += 1
+                return None
+            self._index[d] = (len(pcm), time.time())
+            self.hits += 1
+            return pcm
+
+    def put(self, text: str, pcm: bytes, voice: dict = None):
+        d = digest(text, voice)
+        path = self._path(d)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp, path)
+        with self._lock:
+            old = self._index.get(d)
+            self._bytes += len(pcm) - (old[0] if old else 0)
+            self._index[d] = (len(pcm), time.time())
+            self._evict(keep=d)
+
+    def _evict(self, keep: str):
+        # Caller holds the lock.
+        if self._bytes <= self.max_bytes:
+            return
+        for d, (size, _) in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+            if self._bytes <= self.max_bytes:
+                break
+            if d == keep:
+                continue
+            try:
+                os.remove(self._path(d))
+            except OSError:
+                pass
+            del self._index[d]
+            self._bytes -= size
+            self.evicted += 1
+
+    def fetch_or_synthesize(self, api_key: str, text: str, voice: dict = None) -> tuple:
+        """(pcm, was_cached): the cached clip, else synthesize, store and return it."""
+        pcm = self.get(text, voice)
+        if pcm is not None:
+            return pcm, True
+        pcm = synthesize(api_key, text)
+        self.put(text, pcm, voice)
+        return pcm, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted,
+                    "entries": len(self._index), "bytes": self._bytes,
+                    "max_bytes": self.max_bytes, "dir": self.dir}
+
+
+def write_wav(path: str, pcm: bytes):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(pcm)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Synthesize text in the clone's voice, served from a local cache.")
+    ap.add_argument("text", nargs="+", help="One or more lines to fetch-or-synthesize.")
+    ap.add_argument("--api-key", help="Delphi API key (or $DELPHI_API_KEY, or --account).")
+    ap.add_argument("--account", help="Account name from keys.json.")
+    ap.add_argument("--voice", default="", help="Voice label included in the cache key; change it "
+                                                "after the clone's voice changes.")
+    ap.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB, help="Cache size cap per clone.")
+    ap.add_argument("--out", help="Write the (last) clip here as .wav (or raw PCM for any other extension).")
+    args = ap.parse_args()
+    import audience_audit
+    key = audience_audit.resolve_key(args)
+    cache = VoiceCache(audience_audit.clone_slug(key), args.max_mb)
+    voice = {"voice": args.voice} if args.voice else None
+    pcm = b""
+    for text in args.text:
+        t0 = time.monotonic()
+        pcm, hit = cache.fetch_or_synthesize(key, text, voice)
+        print(f"{'HIT ' if hit else 'MISS'}  {time.monotonic() - t0:6.3f}s  "
+              f"{len(pcm) / (2 * SAMPLE_RATE):5.1f}s audio  {text[:60]}")
+    if args.out:
+        if args.out.endswith(".wav"):
+            write_wav(args.out, pcm)
+        else:
+            with open(args.out, "wb") as f:
+                f.write(pcm)
+    print(json.dumps(cache.stats()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
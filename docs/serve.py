@@ -17,13 +17,16 @@ import argparse
 import http.server
 import json
 import os
-import ssl
-import urllib.error
-import urllib.request
+import sys
 
 DELPHI_BASE = "https://api.delphi.ai"
 DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Upstream calls share the skill's keep-alive pool, so clicking Send repeatedly
+# reuses one TLS connection to api.delphi.ai instead of handshaking every time.
+sys.path.insert(0, os.path.join(os.path.dirname(DOCS_DIR), "delphi-api-safe", "scripts"))
+import http_client
+
 
 class ProxyHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
@@ -50,37 +53,41 @@ class ProxyHandler(http.server.SimpleHTTPRequestHandler):
             headers["x-api-key"] = api_key
         return target, body, headers
 
+    def _send_error_body(self, status, resp_body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(resp_body)
+
     def _proxy(self, method):
         target, body, headers = self._build_request()
-        req = urllib.request.Request(target, data=body, headers=headers, method=method)
         try:
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                resp_body = resp.read()
-                self.send_response(resp.status)
-                self.send_header("Content-Type", resp.headers.get("Content-Type", "application/json"))
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(resp_body)
-        except urllib.error.HTTPError as e:
-            resp_body = e.read()
-            self.send_response(e.code)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(resp_body)
+            resp = http_client.request(method, target, headers=headers, body=body, timeout=30)
         except Exception as e:
-            self.send_response(502)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
+            self._send_error_body(502, json.dumps({"error": str(e)}).encode())
+            return
+        if resp.status >= 400:
+            self._send_error_body(resp.status, resp.body)
+            return
+        self.send_response(resp.status)
+        self.send_header("Content-Type", resp.headers.get("Content-Type", "application/json"))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(resp.body)
 
     def _proxy_binary(self):
         """Binary streaming proxy: forward PCM audio chunks as they arrive."""
         target, body, headers = self._build_request()
-        req = urllib.request.Request(target, data=body, headers=headers, method="POST")
         try:
-            resp = urllib.request.urlopen(req, timeout=60)
+            resp = http_client.stream("POST", target, headers=headers, body=body, timeout=60)
+        except Exception as e:
+            self._send_error_body(502, json.dumps({"error": str(e)}).encode())
+            return
+        with resp:
+            if resp.status >= 400:
+                self._send_error_body(resp.status, resp.read())
+                return
             self.send_response(resp.status)
             ct = resp.headers.get("Content-Type", "application/octet-stream")
             self.send_header("Content-Type", ct)
@@ -99,39 +106,27 @@ class ProxyHandler(http.server.SimpleHTTPRequestHandler):
             # http.server defaults to HTTP/1.0 which doesn't decode it in browsers.
             try:
                 n = 0
-                while True:
-                    chunk = resp.read(8192)
-                    if not chunk:
-                        break
+                for chunk in resp.iter_chunks(8192):
                     n += 1
                     self.wfile.write(chunk)
                     self.wfile.flush()
                 print(f"    \033[35mvoice\033[0m streamed {n} chunks")
             except (BrokenPipeError, ConnectionResetError):
                 pass
-            finally:
-                resp.close()
-        except urllib.error.HTTPError as e:
-            resp_body = e.read()
-            self.send_response(e.code)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(resp_body)
-        except Exception as e:
-            self.send_response(502)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
 
     def _proxy_stream(self):
         """SSE streaming proxy: forward chunks as they arrive."""
         target, body, headers = self._build_request()
         headers["Accept"] = "text/event-stream"
-        req = urllib.request.Request(target, data=body, headers=headers, method="POST")
         try:
-            resp = urllib.request.urlopen(req, timeout=120)
+            resp = http_client.stream("POST", target, headers=headers, body=body, timeout=120)
+        except Exception as e:
+            self._send_error_body(502, json.dumps({"error": str(e)}).encode())
+            return
+        with resp:
+            if resp.status >= 400:
+                self._send_error_body(resp.status, resp.read())
+                return
             self.send_response(resp.status)
             self.send_header("Content-Type", "text/event-stream")
             self.send_header("Cache-Control", "no-cache")
@@ -140,26 +135,11 @@ class ProxyHandler(http.server.SimpleHTTPRequestHandler):
             self.end_headers()
             # Stream line-by-line
             try:
-                for raw_line in resp:
+                for raw_line in resp.iter_lines():
                     self.wfile.write(raw_line)
                     self.wfile.flush()
             except (BrokenPipeError, ConnectionResetError):
                 pass
-            finally:
-                resp.close()
-        except urllib.error.HTTPError as e:
-            resp_body = e.read()
-            self.send_response(e.code)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(resp_body)
-        except Exception as e:
-            self.send_response(502)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
 
     def do_GET(self):
         if self._is_proxy():
@@ -0,0 +1,60 @@
+"""Shared fixtures for the script tests: the scripts directory on sys.path, a
+synthetic NDJSON export, and a scratch directory.
+
+Run the suite from the repo root:  python3 -m unittest discover -s tests
+"""
+import json, os, random, shutil, sys, tempfile, unittest
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "delphi-api-safe", "scripts")
+sys.path.insert(0, SCRIPTS)
+
+SENDERS = ("user", "agent", "owner", "USER", "CLONE", None)
+MEDIUMS = ("sms", "whatsapp", "web", "embed", None)
+BODY = 'He said "hi" \\ then é left\n' * 20   # > BODY_SKIP_BYTES, escapes and non-ASCII
+
+
+def thread(email, medium, messages, tid: str = "t-0") -> dict:
+    return {"id": tid, "user_email": email, "medium": medium,
+            "messages": [{"sender": s, "created_at": c, "text": t} for s, c, t in messages]}
+
+
+def make_threads(n: int = 400, seed: int = 7) -> list:
+    """`n` threads over ~n/4 contacts and two months: mixed senders, channels
+    and timestamp spellings, long bodies, and a few placeholder / fake owners."""
+    rnd = random.Random(seed)
+    emails = [f"Person{k}@Mail.com" if k % 5 == 0 else f"person{k}@mail.com"
+              for k in range(max(1, n // 4))]
+    emails += ["person0@mail.com", "support@delphi.ai", "test@test.com", "", "  padded@mail.com "]
+    out = []
+    for k in range(n):
+        msgs = []
+        for _ in range(rnd.randint(0, 6)):
+            day, hour = rnd.randint(1, 58), rnd.randint(0, 23)
+            month, day = (7, day) if day <= 31 else (8, day - 31)
+            spell = rnd.choice(("Z", "+00:00", "+05:30", "bad"))
+            c = "not a time" if spell == "bad" else f"2026-{month:02d}-{day:02d}T{hour:02d}:15:00{spell}"
+            msgs.append((rnd.choice(SENDERS), c, rnd.choice(("ok", BODY, 'short "q"'))))
+        out.append(thread(rnd.choice(emails), rnd.choice(MEDIUMS), msgs, f"t-{k}"))
+    return out
+
+
+def write_export(path: str, threads: list, newline: str = "\n", extra: tuple = ()) -> str:
+    """NDJSON with `newline` line ends; `extra` raw lines are appended as-is."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for t in threads:
+            f.write(json.dumps(t, ensure_ascii=False) + newline)
+        for line in extra:
+            f.write(line + newline)
+    return path
+
+
+class TempDirTest(unittest.TestCase):
+    """A fresh scratch directory per test, as self.tmp."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="delphi-test-")
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.tmp, *parts)
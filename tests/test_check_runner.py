@@ -0,0 +1,57 @@
+"""check_runner: dependency order, result order, and failures as results."""
+import io, threading, time, unittest
+
+import support  # noqa: F401  (puts the scripts on sys.path)
+from check_runner import CheckRunner
+
+
+class CheckRunnerTest(unittest.TestCase):
+
+    def test_dependencies_run_first_and_see_their_results(self):
+        for workers in (1, 4):
+            r = CheckRunner(workers)
+            r.add("create", lambda res: {"create": "PASS", "cid": "c1"})
+            r.add("send", lambda res: {"send": "PASS", "to": res["create"]["cid"]}, after=("create",))
+            r.add("independent", lambda res: {"independent": "PASS", "saw": sorted(res)})
+            results, timings = r.run()
+            self.assertEqual(list(results), ["create", "send", "independent"])
+            self.assertEqual(results["send"]["to"], "c1")
+            self.assertEqual(list(timings), list(results))
+
+    def test_independent_checks_overlap(self):
+        barrier = threading.Barrier(2, timeout=5)
+        r = CheckRunner(2)
+        r.add("a", lambda res: {"a": barrier.wait()})
+        r.add("b", lambda res: {"b": barrier.wait()})
+        results, _ = r.run()   # one worker would leave the barrier waiting until it broke
+        self.assertEqual(sorted(v for res in results.values() for v in res.values()), [0, 1])
+
+    def test_none_is_left_out_and_a_raise_is_a_fail(self):
+        r = CheckRunner()
+        r.add("skipped", lambda res: None)
+        r.add("boom", lambda res: 1 / 0)
+        r.add("after", lambda res: {"after": "PASS"}, after=("skipped", "boom"))
+        results, timings = r.run()
+        self.assertEqual(list(results), ["boom", "after"])
+        self.assertEqual(results["boom"]["boom"], "FAIL")
+        self.assertIn("ZeroDivisionError", results["boom"]["note"])
+        self.assertNotIn("skipped", timings)
+
+    def test_unknown_dependency_is_refused(self):
+        with self.assertRaises(ValueError):
+            CheckRunner().add("send", lambda res: None, after=("create",))
+
+    def test_timing_report(self):
+        r = CheckRunner(3)
+        r.add("slow", lambda res: time.sleep(0.05) or {"slow": "PASS"})
+        _, timings = r.run()
+        report = r.timing_report(timings)
+        self.assertEqual(report["workers"], 3)
+        self.assertGreaterEqual(report["checks"]["slow"], 0.05)
+        out = io.StringIO()
+        r.print_timings(timings, lambda name: "ok", file=out)
+        self.assertIn("slow", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
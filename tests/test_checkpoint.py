@@ -0,0 +1,53 @@
+"""checkpoint: a sweep's journal is kept for --resume and dropped otherwise."""
+import json, os, unittest
+from unittest import mock
+
+import support
+import checkpoint
+
+
+class CheckpointTest(support.TempDirTest):
+
+    def open(self, resume: bool, sweep: str = "d30-histories") -> checkpoint.Checkpoint:
+        with mock.patch("sys.stderr"):
+            ck = checkpoint.Checkpoint("Some Clone/1", sweep, resume, root=self.tmp)
+        self.addCleanup(ck.close)
+        return ck
+
+    def test_resume_reads_back_what_was_journaled(self):
+        ck = self.open(False)
+        ck.append({"email": "a@mail.com", "n": 1})
+        ck.append({"email": "b@mail.com", "when": ck})   # default=str: anything serialises
+        ck.close()
+        with open(ck.path, "a") as f:
+            f.write('{"email": "torn')                    # an interrupted last write
+        again = self.open(True)
+        self.assertEqual([r["email"] for r in again.records], ["a@mail.com", "b@mail.com"])
+
+    def test_a_fresh_run_discards_the_old_journal(self):
+        ck = self.open(False)
+        ck.append({"n": 1})
+        ck.close()
+        self.assertEqual(self.open(False).records, [])
+        self.assertEqual(os.path.getsize(ck.path), 0)
+
+    def test_finish_removes_the_journal(self):
+        ck = self.open(False)
+        ck.append({"n": 1})
+        ck.finish()
+        self.assertFalse(os.path.exists(ck.path))
+        self.assertEqual(self.open(True).records, [])
+
+    def test_sweeps_of_one_clone_are_separate_files(self):
+        a, b = self.open(False, "d30-histories"), self.open(False, "trend-histories")
+        self.assertNotEqual(a.path, b.path)
+        self.assertEqual(os.path.dirname(a.path), os.path.join(self.tmp, "Some_Clone_1"))
+        a.append({"n": 1})
+        with open(b.path) as f:
+            self.assertEqual(f.read(), "")
+        with open(a.path) as f:
+            self.assertEqual(json.loads(f.read()), {"n": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""engagement_store: contact ids, manifest bitmaps, spilled vs in-memory
+ingest, and the JSONL / segment forms of a month."""
+import gzip, json, os, shutil, unittest
+from unittest import mock
+
+import support
+import d30_retention as d30
+import engagement_store as es
+import export_scan
+
+EXCLUDE = d30.DEFAULT_EXCLUDE
+
+
+class StoreTest(support.TempDirTest):
+    """engagement_store and export_scan writing under the scratch directory."""
+
+    def setUp(self):
+        super().setUp()
+        store = self.path("store")
+        for target, name, value in ((es, "STORE", store), (es, "MANIFEST", os.path.join(store, "manifest.json")),
+                                    (es, "SPILL_ROOT", self.path("spill")),
+                                    (export_scan, "SCAN_ROOT", self.path("scan"))):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ingest(self, clone, export, **kw):
+        with mock.patch("sys.stdout"), mock.patch("sys.stderr"):
+            return es.ingest(clone, export, kw.pop("force", False), EXCLUDE, **kw)
+
+    def month_files(self, clone) -> dict:
+        d, out = os.path.join(es.STORE, clone), {}
+        for fn in sorted(os.listdir(d)):
+            with open(os.path.join(d, fn), "rb") as f:
+                out[fn] = f.read()
+        return out
+
+
+class ContactDictTest(StoreTest):
+
+    def test_ids_are_dense_and_survive_a_reload(self):
+        c = es.ContactDict("k")
+        self.assertEqual([c.id(e) for e in ("a@x.com", "b@x.com", "a@x.com")], [0, 1, 0])
+        c.flush()
+        c.id("c@x.com")
+        c.flush()
+        again = es.ContactDict("k")
+        self.assertEqual(again.emails, ["a@x.com", "b@x.com", "c@x.com"])
+        self.assertEqual(again.id("b@x.com"), 1)
+
+    def test_torn_append_is_dropped_and_cut_off(self):
+        c = es.ContactDict("k")
+        c.id("a@x.com")
+        c.flush()
+        with open(c.path, "ab") as f:
+            f.write(b'"half@x.')
+        again = es.ContactDict("k")
+        self.assertEqual(again.emails, ["a@x.com"])
+        again.id("b@x.com")
+        again.flush()
+        with open(c.path) as f:
+            self.assertEqual([json.loads(line) for line in f], ["a@x.com", "b@x.com"])
+
+    def test_missing_contacts_are_refused(self):
+        es.save_manifest({"version": 1, "clones": {"k": {"months": {}, "contact_ids": 3}}})
+        with self.assertRaises(SystemExit):
+            es.load_contacts("k")
+
+
+class BitmapTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for ids in (set(), {0}, {7, 8}, {1, 5, 1000, 4096}):
+            bits = es.decode_ids(es.encode_ids(ids))
+            self.assertEqual({n for n in range(5000) if bits >> n & 1}, ids)
+            self.assertEqual(es.popcount(bits), len(ids))
+
+    def test_union_and_intersection(self):
+        a, b = es.decode_ids(es.encode_ids({1, 2, 3})), es.decode_ids(es.encode_ids({3, 4}))
+        self.assertEqual(es.popcount(a | b), 4)
+        self.assertEqual(a & b, 1 << 3)
+
+
+class IngestTest(StoreTest):
+
+    def setUp(self):
+        super().setUp()
+        self.export = support.write_export(self.path("conv.ndjson"), support.make_threads(1500))
+
+    def test_months_and_manifest(self):
+        self.assertEqual(self.ingest("k", self.export), 2)
+        self.assertEqual(set(self.month_files("k")),
+                         {"contacts.jsonl", "2026-07.jsonl", "2026-07.seg", "2026-08.jsonl", "2026-08.seg"})
+        man = es.load_manifest()["clones"]["k"]
+        self.assertEqual(man["contact_ids"], len(es.load_contacts("k")))
+        for month, meta in man["months"].items():
+            self.assertEqual(meta["source_bytes"], os.path.getsize(self.export))
+            with open(os.path.join(es.STORE, "k", f"{month}.jsonl")) as f:
+                self.assertEqual(meta["rows"], sum(1 for _ in f))
+
+    def test_spilled_ingest_matches_in_memory(self):
+        acc, _ = export_scan.scan(self.export, EXCLUDE, products=("cells",))
+        self.assertGreater(len(acc.cells), 2 * 1000)   # several runs at the 1000-cell floor
+        self.ingest("mem", self.export)
+        with mock.patch.object(es, "MERGE_FANIN", 2):   # and merge them in rounds
+            self.ingest("spill", self.export, max_memory_mb=0.01)
+        self.assertEqual(self.month_files("spill"), self.month_files("mem"))
+        months = {c: es.load_manifest()["clones"][c]["months"] for c in ("mem", "spill")}
+        for meta in (*months["mem"].values(), *months["spill"].values()):
+            del meta["ingested_at"]
+        self.assertEqual(months["spill"], months["mem"])
+        self.assertEqual(os.listdir(es.SPILL_ROOT), [])
+
+    def test_merge_runs_sums_split_contact_days(self):
+        spill = self.path("runs")
+        os.makedirs(spill)
+        _, _, runs = export_scan.scan_cells_spilled(self.export, EXCLUDE, 200, spill)
+        self.assertGreater(len(runs), 4)
+        spilled = 0
+        for run in runs:
+            with open(run) as f:
+                spilled += sum(1 for _ in f)
+        acc, _ = export_scan.scan(self.export, EXCLUDE, products=("cells",))
+        want = sorted([d, u, i, o, sorted(ch)] for (u, d), (i, o, ch) in acc.cells.items())
+        self.assertGreater(spilled, len(want))   # some contact-days are split across runs
+        with mock.patch.object(es, "MERGE_FANIN", 4):
+            self.assertEqual(list(es.merge_runs(runs, spill)), want)
+
+    def test_repeat_ingest_is_skipped_before_scanning(self):
+        self.ingest("k", self.export)
+        gz = self.path("renamed.gz")
+        with open(self.export, "rb") as src, gzip.open(gz, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        with mock.patch.object(export_scan, "load_or_scan", side_effect=AssertionError("scanned")):
+            self.assertEqual(self.ingest("k", self.export), 0)
+            self.assertEqual(self.ingest("k", gz), 0)
+        self.assertEqual(self.ingest("k", self.export, force=True), 2)
+
+
+class MonthReadTest(StoreTest):
+
+    def setUp(self):
+        super().setUp()
+        self.ingest("k", support.write_export(self.path("conv.ndjson"), support.make_threads(600)))
+        self.dir = os.path.join(es.STORE, "k")
+
+    def columns(self):
+        cols = es.load_columns("k")
+        return cols.channels, {c: list(v) for c, v in cols.cols.items()}
+
+    def test_segments_match_the_jsonl(self):
+        with mock.patch.object(es, "_read_jsonl", side_effect=AssertionError("parsed JSONL")):
+            from_segments = self.columns()
+        for fn in os.listdir(self.dir):
+            if fn.endswith(".seg"):
+                os.remove(os.path.join(self.dir, fn))
+        self.assertEqual(self.columns(), from_segments)
+
+    def test_damaged_segment_falls_back_to_the_jsonl(self):
+        want = self.columns()
+        seg = os.path.join(self.dir, "2026-07.seg")
+        with open(seg, "r+b") as f:
+            f.truncate(os.path.getsize(seg) - 4)
+        self.assertEqual(self.columns(), want)
+
+    def test_stale_segment_is_ignored(self):
+        want = self.columns()
+        seg = os.path.join(self.dir, "2026-08.seg")
+        shutil.copy(os.path.join(self.dir, "2026-07.seg"), seg)
+        st = os.stat(os.path.join(self.dir, "2026-08.jsonl"))
+        os.utime(seg, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+        self.assertEqual(self.columns(), want)
+
+    def test_aggregates_match_a_rebuild_from_rows(self):
+        recorded = es.month_aggregates("k")
+        man = es.load_manifest()
+        for meta in man["clones"]["k"]["months"].values():
+            del meta["aggregates"]
+        es.save_manifest(man)
+        self.assertEqual(es.month_aggregates("k"), recorded)
+
+    def test_segment_moves_email_rows_onto_ids(self):
+        path = os.path.join(self.dir, "2026-07.jsonl")
+        emails = es.load_contacts("k").emails
+        want = self.columns()
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        with open(path, "w") as f:
+            for r in rows:
+                f.write(json.dumps({**r, "u": emails[r["u"]]}) + "\n")
+        with mock.patch("sys.stdout"), mock.patch("sys.stderr"):
+            es.segment("k")
+        with open(path) as f:
+            self.assertEqual([json.loads(line) for line in f], rows)
+        self.assertEqual(self.columns(), want)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+"""export_scan: projection, per-product scans and their equivalences, the
+saved scan, and the thread index."""
+import bz2, collections, gzip, json, os, shutil, unittest
+from unittest import mock
+
+import support
+import d30_retention as d30
+import export_scan
+import timestamps
+
+EXCLUDE = d30.DEFAULT_EXCLUDE
+
+
+def expected_project(t: dict) -> tuple:
+    return (t.get("user_email", ""), t.get("medium"),
+            [(m.get("sender"), m.get("created_at")) for m in t.get("messages", [])])
+
+
+class ProjectTest(unittest.TestCase):
+
+    def test_long_strings_are_emptied_and_short_ones_kept(self):
+        line = json.dumps({"a": "x" * 300, "b": "short", "c": ["y" * 257, 3]}).encode()
+        self.assertEqual(json.loads(export_scan._blank(line)), {"a": "", "b": "short", "c": ["", 3]})
+
+    def test_escapes_inside_long_bodies(self):
+        for body in ('say "hi" ' * 40, "\\" * 300, "ends in a backslash \\" * 20, '\\"' * 200):
+            t = support.thread("a@mail.com", "sms", [("user", "2026-07-01T00:00:00Z", body)])
+            line = json.dumps(t).encode()
+            self.assertEqual(json.loads(export_scan._blank(line))["messages"][0]["text"], "")
+            self.assertEqual(export_scan.project(line), expected_project(t))
+
+    def test_project_matches_a_full_decode(self):
+        for t in support.make_threads(200):
+            line = json.dumps(t, ensure_ascii=False).encode()
+            self.assertEqual(export_scan.project(line), expected_project(t))
+            with mock.patch.object(export_scan, "SWAP_MAX_BYTES", 0):   # the no-swap path
+                self.assertEqual(export_scan.project(line), expected_project(t))
+
+    def test_malformed_line_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            export_scan.project(b'{"user_email": "a@mail.com", ')
+
+
+class ScanTest(support.TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.threads = support.make_threads()
+        self.export = support.write_export(self.path("conv.ndjson"), self.threads,
+                                           extra=("{not json", "", "   "))
+
+    def compressed(self, opener, suffix: str) -> str:
+        out = self.path("conv.ndjson" + suffix)
+        with open(self.export, "rb") as src, opener(out, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        return out
+
+    def test_coverage_counts(self):
+        acc, source = export_scan.scan(self.export, EXCLUDE)
+        cov = acc.coverage()
+        self.assertEqual(cov["threads"], len(self.threads))
+        self.assertEqual(cov["malformed_lines"], 1)
+        self.assertEqual(source["bytes"], os.path.getsize(self.export))
+        self.assertIsNone(source["compression"])
+
+    def test_cells_match_a_direct_count(self):
+        want = collections.defaultdict(lambda: [0, 0, set()])
+        for t in self.threads:
+            email = t["user_email"].strip()
+            if not d30.is_real(email, EXCLUDE):
+                continue
+            for m in t["messages"]:
+                dt = timestamps.parse(m["created_at"])
+                if dt is None:
+                    continue
+                cell = want[(email.lower(), dt.date().isoformat())]
+                cell[0] += m["sender"] in export_scan.INBOUND
+                cell[1] += m["sender"] in export_scan.OUTBOUND
+                cell[2].add(t["medium"] or "unknown")
+        acc, _ = export_scan.scan(self.export, EXCLUDE, products=("cells",))
+        self.assertEqual({k: list(v) for k, v in acc.cells.items()}, dict(want))
+
+    def test_parallel_matches_serial(self):
+        serial, source = export_scan.scan(self.export, EXCLUDE, index=True)
+        with mock.patch.object(export_scan, "PARALLEL_MIN_BYTES", 0):
+            parallel, psource = export_scan.scan(self.export, EXCLUDE, jobs=3, index=True)
+        self.assertEqual(psource, source)
+        self.assertEqual(parallel.product(psource), serial.product(source))
+        self.assertEqual(parallel.thread_index(psource), serial.thread_index(source))
+
+    def test_compressed_matches_plain(self):
+        plain, source = export_scan.scan(self.export, EXCLUDE, index=True)
+        want = plain.product(source)
+        for opener, suffix, kind in ((gzip.open, ".gz", "gzip"), (bz2.open, ".bz2", "bz2")):
+            path = self.compressed(opener, suffix)
+            self.assertEqual(export_scan.compression(path), kind)
+            acc, csource = export_scan.scan(path, EXCLUDE, index=True)
+            self.assertEqual(csource["sha256"], source["sha256"])
+            self.assertEqual(csource["bytes"], source["bytes"])
+            self.assertEqual(csource["compression"], kind)
+            got = acc.product(csource)
+            got["source"] = want["source"]
+            self.assertEqual(got, want)
+            self.assertEqual(acc.lines, [])   # not seekable: no index
+            self.assertIsNone(export_scan.load_index(path))
+
+    def test_crlf_matches_lf(self):
+        crlf = support.write_export(self.path("crlf.ndjson"), self.threads, "\r\n", extra=("{not json",))
+        lf, _ = export_scan.scan(self.export, EXCLUDE)
+        acc, source = export_scan.scan(crlf, EXCLUDE, index=True)
+        self.assertEqual(acc.product(source)["cells"], lf.product(source)["cells"])
+        self.assertEqual(acc.product(source)["inbound"], lf.product(source)["inbound"])
+        idx = export_scan.ThreadIndex(crlf, acc.thread_index(source))
+        self.assertEqual([t["id"] for t in idx.threads(idx.lines)], [t["id"] for t in self.threads])
+
+    def test_each_product_alone_matches_the_full_scan(self):
+        full, source = export_scan.scan(self.export, EXCLUDE)
+        want = full.product(source)
+        for p in export_scan.PRODUCTS:
+            acc, _ = export_scan.scan(self.export, EXCLUDE, products=(p,))
+            got = acc.product(source)
+            self.assertTrue(want[p])
+            self.assertEqual(got[p], want[p])
+            self.assertEqual(set(got) & set(export_scan.PRODUCTS), {p})
+
+    def test_unknown_product_is_refused(self):
+        with self.assertRaises(ValueError):
+            export_scan.Accumulator(EXCLUDE, ("cells", "nope"))
+
+    def test_fingerprint_matches_the_scan_source(self):
+        _, source = export_scan.scan(self.export, EXCLUDE)
+        self.assertEqual(export_scan.fingerprint(self.export), source)
+        gz = self.compressed(gzip.open, ".gz")
+        self.assertEqual(export_scan.fingerprint(gz)["sha256"], source["sha256"])
+
+
+class LoadOrScanTest(support.TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.export = support.write_export(self.path("conv.ndjson"), support.make_threads())
+        self.cache = self.path("cache")
+        patcher = mock.patch.object(export_scan, "SCAN_ROOT", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def load(self, **kw):
+        return export_scan.load_or_scan(self.export, EXCLUDE, verbose=False, **kw)
+
+    def test_one_shot_scan_writes_nothing(self):
+        s = self.load(products=("inbound",))
+        self.assertEqual(s.products, ("inbound",))
+        self.assertFalse(os.path.exists(self.cache))
+        with self.assertRaises(ValueError):
+            s.cells()
+
+    def test_saved_scan_reads_back_as_the_fresh_views(self):
+        fresh = self.load(save=True)
+        self.assertEqual(len(os.listdir(self.cache)), 2)   # product and thread index
+        saved = self.load(products=("starts",))
+        self.assertIsNone(saved._acc)
+        self.assertEqual(saved.products, export_scan.PRODUCTS)
+        self.assertEqual(saved.source, fresh.source)
+        self.assertEqual(saved.coverage, fresh.coverage)
+        self.assertEqual(saved.cells(), fresh.cells())
+        self.assertEqual(saved.starts(), fresh.starts())
+        self.assertEqual(saved.inbound(), fresh.inbound())
+
+    def test_use_cache_false_rescans(self):
+        self.load(save=True)
+        s = self.load(use_cache=False, products=("cells",))
+        self.assertIsNotNone(s._acc)
+
+    def test_d30_load_from_export(self):
+        with mock.patch("sys.stderr"):
+            starts, threads = d30.load_from_export(self.export, EXCLUDE, use_cache=False)
+        self.assertEqual(starts, self.load(products=("starts",)).starts())
+        self.assertEqual(threads, len(support.make_threads()))
+
+
+class ThreadIndexTest(support.TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.threads = support.make_threads()
+        self.export = support.write_export(self.path("conv.ndjson"), self.threads, extra=("{not json",))
+        patcher = mock.patch.object(export_scan, "SCAN_ROOT", self.path("cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.idx = export_scan.load_index(self.export, verbose=False)
+
+    def test_one_row_per_parsed_line(self):
+        self.assertEqual(len(self.idx), len(self.threads))
+
+    def test_for_contact_ignores_case_and_padding(self):
+        rows = self.idx.for_contact(" PERSON0@mail.com")
+        want = [t["id"] for t in self.threads if t["user_email"].strip().lower() == "person0@mail.com"]
+        self.assertTrue(want)
+        self.assertEqual([t["id"] for t in self.idx.threads(rows)], want)
+
+    def test_raw_is_the_exact_line(self):
+        with open(self.export, "rb") as f:
+            lines = [line.rstrip(b"\n") for line in f]
+        self.assertEqual(list(self.idx.raw(self.idx.lines)), lines[:len(self.threads)])
+
+    def test_overlapping(self):
+        lo, hi = "2026-08-01", "2026-08-10T23:59:59Z"
+        want = []
+        for t in self.threads:
+            secs = [timestamps.epoch(m["created_at"]) for m in t["messages"]]
+            secs = [s for s in secs if s is not None]
+            if secs and min(secs) <= timestamps.epoch(hi) and max(secs) >= timestamps.epoch(lo):
+                want.append(t["id"])
+        got = [t["id"] for t in self.idx.threads(self.idx.overlapping(lo, hi))]
+        self.assertEqual(got, want)
+        self.assertEqual(len(self.idx.overlapping()), sum(1 for r in self.idx.lines if r[3] is not None))
+
+    def test_starts_match_the_scan(self):
+        acc, _ = export_scan.scan(self.export, EXCLUDE, products=("starts",))
+        epochs = lambda by: {e: sorted(timestamps.epoch(x) for x in ts) for e, ts in by.items()}
+        self.assertEqual(epochs(self.idx.starts(EXCLUDE)), epochs(acc.starts))
+
+    def test_saved_index_is_reused(self):
+        export_scan.load_index(self.export, verbose=False, save=True)
+        with mock.patch.object(export_scan, "_fresh", side_effect=AssertionError("rescanned")):
+            idx = export_scan.load_index(self.export)
+        self.assertEqual(idx.lines, self.idx.lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
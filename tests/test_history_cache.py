@@ -0,0 +1,88 @@
+"""history_cache: TTL, activity-based staleness, and the on-disk journal."""
+import datetime, os, unittest
+from unittest import mock
+
+import support
+import history_cache
+
+UTC = datetime.timezone.utc
+T0 = datetime.datetime(2026, 7, 1, 12, 0, tzinfo=UTC)
+CONVOS = [{"created_at": "2026-06-30T10:00:00Z", "medium": "sms", "text": "dropped"}]
+SLIM = [{"created_at": "2026-06-30T10:00:00Z", "medium": "sms"}]
+
+
+class HistoryCacheTest(support.TempDirTest):
+
+    def cache(self, ttl_hours: float = 24, now=T0) -> history_cache.HistoryCache:
+        with mock.patch.object(history_cache, "_now", return_value=now):
+            c = history_cache.HistoryCache("k", ttl_hours, root=self.tmp)
+        self.addCleanup(c.close)
+        return c
+
+    def at(self, when):
+        return mock.patch.object(history_cache, "_now", return_value=when)
+
+    def test_put_then_get(self):
+        c = self.cache()
+        with self.at(T0):
+            self.assertIsNone(c.get("a@mail.com"))
+            c.put("a@mail.com", CONVOS)
+            self.assertEqual(c.get("a@mail.com"), SLIM)
+        self.assertEqual(c.stats()["hits"], 1)
+        self.assertEqual(c.stats()["misses"], 1)
+
+    def test_expires_after_the_ttl(self):
+        c = self.cache(ttl_hours=1)
+        with self.at(T0):
+            c.put("a@mail.com", CONVOS)
+        with self.at(T0 + datetime.timedelta(minutes=59)):
+            self.assertEqual(c.get("a@mail.com"), SLIM)
+        with self.at(T0 + datetime.timedelta(minutes=61)):
+            self.assertIsNone(c.get("a@mail.com"))
+        self.assertEqual(c.stats()["refreshed_stale"], 1)
+
+    def test_activity_after_the_pull_makes_it_stale(self):
+        c = self.cache()
+        with self.at(T0):
+            c.put("a@mail.com", CONVOS)
+            self.assertEqual(c.get("a@mail.com", T0 - datetime.timedelta(hours=1)), SLIM)
+            self.assertIsNone(c.get("a@mail.com", T0 + datetime.timedelta(hours=1)))
+
+    def test_naive_active_since_is_utc(self):
+        c = self.cache()
+        with self.at(T0):
+            c.put("a@mail.com", CONVOS)
+            naive = T0.replace(tzinfo=None)
+            self.assertEqual(c.get("a@mail.com", naive - datetime.timedelta(minutes=1)), SLIM)
+            self.assertIsNone(c.get("a@mail.com", naive + datetime.timedelta(minutes=1)))
+
+    def test_reload_keeps_the_latest_entry_and_skips_a_torn_line(self):
+        c = self.cache()
+        with self.at(T0):
+            c.put("a@mail.com", [])
+            c.put("a@mail.com", CONVOS)
+        c.close()
+        with open(c.path, "a") as f:
+            f.write('{"e": "b@mail.com", "f": ')
+        with self.at(T0):
+            self.assertEqual(self.cache().get("a@mail.com"), SLIM)
+
+    def test_compacts_a_journal_of_mostly_rewrites(self):
+        c = self.cache()
+        with self.at(T0):
+            for _ in range(150):
+                c.put("a@mail.com", CONVOS)
+        c.close()
+        again = self.cache()
+        with open(again.path) as f:
+            self.assertEqual(sum(1 for _ in f), 1)
+        with self.at(T0):
+            self.assertEqual(again.get("a@mail.com"), SLIM)
+
+    def test_clone_dir_is_path_safe(self):
+        self.assertEqual(history_cache.clone_dir("a/../b c", self.tmp), os.path.join(self.tmp, "a_.._b_c"))
+        self.assertEqual(history_cache.clone_dir("", self.tmp), os.path.join(self.tmp, "unknown"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""pcm_stream: jitter-buffer playback simulation and PCM chunk metering."""
+import array, sys, unittest
+
+import support  # noqa: F401  (puts the scripts on sys.path)
+import pcm_stream
+
+play = pcm_stream.simulate_playback
+
+
+def pcm(*samples) -> bytes:
+    a = array.array("h", samples)
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a.tobytes()
+
+
+class SimulatePlaybackTest(unittest.TestCase):
+
+    def test_faster_than_realtime_never_stalls(self):
+        arrivals = [(0.1 * k, 0.2) for k in range(10)]
+        self.assertEqual(play(arrivals, 0, 1.0), {"start_s": 0.0, "underruns": 0, "stall_s": 0.0})
+        self.assertEqual(play(arrivals, 0.5, 1.0)["start_s"], 0.2)   # third chunk fills 0.5 s
+
+    def test_underrun_and_stall(self):
+        # 0.5 s of audio at t=0, then nothing until t=1.0: dry at 0.5, resumes at 1.0
+        r = play([(0.0, 0.5), (1.0, 0.5)], 0, 2.0)
+        self.assertEqual(r, {"start_s": 0.0, "underruns": 1, "stall_s": 0.5})
+
+    def test_a_buffer_absorbs_the_gap(self):
+        arrivals = [(0.0, 0.3), (0.4, 0.3), (0.8, 0.3)]
+        self.assertEqual(play(arrivals, 0, 1.2)["underruns"], 2)
+        self.assertEqual(play(arrivals, 0.25, 1.2)["underruns"], 2)
+        self.assertEqual(play(arrivals, 0.6, 1.2), {"start_s": 0.4, "underruns": 0, "stall_s": 0.0})
+
+    def test_stream_ends_before_the_buffer_fills(self):
+        self.assertEqual(play([(0.1, 0.2)], 0.5, 0.3), {"start_s": 0.3, "underruns": 0, "stall_s": 0.0})
+        self.assertEqual(play([], 0.5, 0.3)["start_s"], None)
+
+
+class PCMMeterTest(unittest.TestCase):
+
+    def test_odd_byte_chunks_carry_the_half_sample(self):
+        data = pcm(0, 1000, -3000, 7, 0, 0)
+        m = pcm_stream.PCMMeter()
+        for part in (data[:3], data[3:4], data[4:9], data[9:]):
+            m.chunk(part)
+        m.end()
+        s = m.summary()
+        self.assertEqual(s["bytes"], len(data))
+        self.assertEqual(s["odd_chunks"], 2)    # 3 bytes, then 9 -- each leaves half a sample
+        self.assertEqual(m.peak, 3000)
+        self.assertFalse(s["silent"])
+        self.assertAlmostEqual(sum(a for _, a in m.arrivals), 6 / pcm_stream.SAMPLE_RATE)
+
+    def test_silence(self):
+        m = pcm_stream.PCMMeter()
+        m.chunk(pcm(0, 0, 0))
+        m.chunk(b"")
+        m.end()
+        s = m.summary()
+        self.assertTrue(s["silent"])
+        self.assertEqual(s["chunks"], 1)
+        self.assertEqual(set(s["playback"]), {str(ms) for ms in pcm_stream.DEFAULT_BUFFERS_MS})
+
+
+if __name__ == "__main__":
+    unittest.main()
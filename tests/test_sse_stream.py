@@ -0,0 +1,83 @@
+"""sse_stream: event parsing across arbitrary chunk splits, and token metering."""
+import json, unittest
+
+import support  # noqa: F401  (puts the scripts on sys.path)
+import sse_stream
+
+STREAM = (b": keep-alive\r\n"
+          b"event: token\r\ndata: {\"current_token\": \"Hel\"}\r\n\r\n"
+          b"data: {\"current_token\": \"lo\"}\n\n"
+          b"id: 7\rdata: line one\rdata: line two\r\r"
+          b"data: caf\xc3\xa9\n\n"
+          b"data: [DONE]\n\n")
+EVENTS = [{"event": "token", "data": '{"current_token": "Hel"}', "id": None},
+          {"event": "message", "data": '{"current_token": "lo"}', "id": None},
+          {"event": "message", "data": "line one\nline two", "id": "7"},
+          {"event": "message", "data": "café", "id": "7"},
+          {"event": "message", "data": "[DONE]", "id": "7"}]
+
+
+def parse(chunks) -> list:
+    p = sse_stream.SSEParser()
+    events = []
+    for c in chunks:
+        events += p.feed(c)
+    return events + p.close()
+
+
+class SSEParserTest(unittest.TestCase):
+
+    def test_whole_stream(self):
+        self.assertEqual(parse([STREAM]), EVENTS)
+
+    def test_every_two_way_split(self):
+        # covers a CRLF split between its CR and LF, and a UTF-8 character split in two
+        for cut in range(1, len(STREAM)):
+            self.assertEqual(parse([STREAM[:cut], STREAM[cut:]]), EVENTS, f"split at {cut}")
+
+    def test_byte_at_a_time(self):
+        self.assertEqual(parse([STREAM[i:i + 1] for i in range(len(STREAM))]), EVENTS)
+
+    def test_close_flushes_an_unterminated_event(self):
+        self.assertEqual(parse([b"data: tail\r"]), [{"event": "message", "data": "tail", "id": None}])
+        self.assertEqual(parse([b"data: tail"]), [{"event": "message", "data": "tail", "id": None}])
+        self.assertEqual(parse([b": only a comment\n"]), [])
+
+
+class CloneTokenTest(unittest.TestCase):
+
+    def test_frames(self):
+        self.assertEqual(sse_stream.clone_token('{"current_token": "hi"}'), ("hi", False))
+        self.assertEqual(sse_stream.clone_token('{"current_token": "[DONE]"}'), ("", True))
+        self.assertEqual(sse_stream.clone_token(" [DONE] "), ("", True))
+        self.assertEqual(sse_stream.clone_token("not json"), ("", False))
+        self.assertEqual(sse_stream.clone_token("[1, 2]"), ("", False))
+
+    def test_percentile(self):
+        self.assertIsNone(sse_stream.percentile([], 50))
+        self.assertEqual(sse_stream.percentile([3, 1, 2, 4], 50), 2)
+        self.assertEqual(sse_stream.percentile([3, 1, 2, 4], 100), 4)
+        self.assertEqual(sse_stream.percentile([3, 1, 2, 4], 0), 1)
+
+
+class StreamMeterTest(unittest.TestCase):
+
+    def test_summary(self):
+        frames = [json.dumps({"current_token": t}) for t in ("Hel", "lo", "")]
+        body = "".join(f"data: {f}\n\n" for f in frames)
+        body += "data: " + json.dumps({"current_token": "[DONE]", "text": "Hello"}) + "\n\n"
+        m = sse_stream.StreamMeter()
+        m.headers()
+        for i in range(0, len(body), 5):
+            m.chunk(body[i:i + 5].encode())
+        m.end()
+        s = m.summary()
+        self.assertEqual(m.text, "Hello")
+        self.assertEqual((s["frames"], s["tokens"], s["chars"]), (4, 2, 5))
+        self.assertTrue(s["done"])
+        self.assertTrue(s["text_matches_final"])
+        self.assertLessEqual(s["ttfb_s"], s["ttft_s"])
+
+
+if __name__ == "__main__":
+    unittest.main()
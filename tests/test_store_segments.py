@@ -0,0 +1,67 @@
+"""store_segments: the binary month format round-trips and rejects anything
+that is not a whole segment."""
+import os, unittest
+
+import support
+import store_segments as ss
+
+
+def rows() -> list:
+    return [(0, "2026-07-01", 2, 1, ["sms"]), (3, "2026-07-01", 0, 4, []),
+            (1, "2026-07-31", 1, 0, ["web", "sms"]), (70000, "1970-01-01", 0, 0, ["embed"])]
+
+
+class SegmentTest(support.TempDirTest):
+
+    def written(self, data=None) -> str:
+        w = ss.SegmentWriter()
+        for r in (rows() if data is None else data):
+            w.add(*r)
+        path = self.path("2026-07.seg")
+        w.write(path)
+        return path
+
+    def test_day_numbers(self):
+        self.assertEqual(ss.day_number("1970-01-01"), 0)
+        self.assertEqual(ss.day_iso(ss.day_number("2026-07-31")), "2026-07-31")
+
+    def test_round_trip(self):
+        seg = ss.read(self.written())
+        self.assertEqual(seg.rows, 4)
+        self.assertEqual(seg.channels, ["sms", "web", "embed"])
+        self.assertEqual(list(seg.cols["contact"]), [0, 3, 1, 70000])
+        self.assertEqual([ss.day_iso(d) for d in seg.cols["day"]], [r[1] for r in rows()])
+        self.assertEqual(list(seg.cols["in"]), [2, 0, 1, 0])
+        self.assertEqual(list(seg.cols["out"]), [1, 4, 0, 0])
+        self.assertEqual(list(seg.cols["ch"]), [0b001, 0, 0b011, 0b100])
+
+    def test_writer_segment_matches_the_file(self):
+        w = ss.SegmentWriter()
+        for r in rows():
+            w.add(*r)
+        mem, disk = w.segment(), ss.read(self.written())
+        self.assertEqual((mem.channels, mem.rows, mem.cols), (disk.channels, disk.rows, disk.cols))
+
+    def test_empty_segment(self):
+        seg = ss.read(self.written([]))
+        self.assertEqual((seg.rows, seg.channels), (0, []))
+
+    def test_too_many_channels(self):
+        w = ss.SegmentWriter()
+        with self.assertRaises(ValueError):
+            w.add(0, "2026-07-01", 1, 0, [f"ch{n}" for n in range(ss.MAX_CHANNELS + 1)])
+
+    def test_rejects_truncated_padded_and_foreign_files(self):
+        path = self.written()
+        with open(path, "rb") as f:
+            whole = f.read()
+        for bad in (whole[:5], whole[:-1], whole + b"\0\0\0\0", b"XSEG" + whole[4:], b""):
+            with open(path, "wb") as f:
+                f.write(bad)
+            with self.assertRaises(ValueError, msg=f"{len(bad)} bytes"):
+                ss.read(path)
+        self.assertFalse([fn for fn in os.listdir(self.tmp) if fn.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""user_index: order detection, full vs incremental refresh, and the lazily
+opened sweep checkpoint."""
+import datetime, functools, json, os, unittest
+from unittest import mock
+
+import support
+import audience_audit as aa
+import checkpoint
+import user_index
+
+T0 = datetime.datetime(2026, 7, 1, tzinfo=datetime.timezone.utc)
+
+
+def user(n: int) -> dict:
+    return {"user_id": f"u{n}", "email": f"person{n}@mail.com", "name": "dropped",
+            "date_joined": (T0 - datetime.timedelta(days=n)).isoformat()}
+
+
+class FakeUsers:
+    """GET /v3/users, newest first, `per_page` to a page; `pages` counts requests."""
+
+    def __init__(self, users: list, per_page: int = 3):
+        self.users, self.per_page, self.pages = users, per_page, 0
+
+    def __call__(self, key, cursor=None):
+        self.pages += 1
+        at = int(cursor or 0)
+        page = self.users[at:at + self.per_page]
+        more = at + self.per_page < len(self.users)
+        return {"users": page, "has_more": more, "next_cursor": str(at + self.per_page) if more else None}
+
+
+class DetectOrderTest(unittest.TestCase):
+
+    def test_orders(self):
+        users = [user(n) for n in range(4)]
+        self.assertEqual(user_index.detect_order(users), "newest_first")
+        self.assertEqual(user_index.detect_order(users[::-1]), "oldest_first")
+        self.assertEqual(user_index.detect_order([users[1], users[0], users[2]]), "unknown")
+        self.assertEqual(user_index.detect_order(users[:1]), "unknown")
+        self.assertEqual(user_index.detect_order([{"user_id": "x"}] * 3), "unknown")
+
+
+class RefreshTest(support.TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.now = T0
+        for patcher in (
+                mock.patch.object(user_index, "index_path", lambda clone: self.path(clone, "users.json")),
+                mock.patch.object(user_index, "_now", lambda: self.now),
+                mock.patch.object(checkpoint, "Checkpoint",
+                                  functools.partial(checkpoint.Checkpoint, root=self.path("checkpoints"))),
+                mock.patch("sys.stderr")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def refresh(self, fake: FakeUsers, **kw):
+        with mock.patch.object(aa, "users_page", fake):
+            return user_index.refresh("key", "k", verbose=False, **kw)
+
+    def journal(self, sweep: str) -> str:
+        return self.path("checkpoints", "k", f"{sweep}.jsonl")
+
+    def test_first_run_is_a_full_sweep(self):
+        users, summary = self.refresh(FakeUsers([user(n) for n in range(7)]))
+        self.assertEqual(summary["mode"], "full")
+        self.assertEqual(summary["order"], "newest_first")
+        self.assertEqual([u["user_id"] for u in users], [f"u{n}" for n in range(7)])
+        self.assertEqual(set(users[0]), {"user_id", "email", "date_joined"})
+        self.assertEqual(user_index.load("k")["users"], users)
+
+    def test_newest_first_refresh_stops_at_a_known_user(self):
+        self.refresh(FakeUsers([user(n) for n in range(3, 12)]))
+        fake = FakeUsers([user(n) for n in range(12)])
+        users, summary = self.refresh(fake)
+        self.assertEqual(summary["mode"], "incremental")
+        self.assertEqual(summary["added"], 3)
+        self.assertEqual(fake.pages, 2)   # page 2 holds u3, already indexed
+        self.assertEqual([u["user_id"] for u in users], [f"u{n}" for n in range(12)])
+
+    def test_old_index_or_full_forces_a_sweep(self):
+        self.refresh(FakeUsers([user(n) for n in range(1, 6)]))
+        _, summary = self.refresh(FakeUsers([user(n) for n in range(5)]), full=True)
+        self.assertEqual((summary["mode"], summary["added"], summary["removed"]), ("full", 1, 1))
+        self.now = T0 + datetime.timedelta(days=user_index.FULL_SWEEP_DAYS + 1)
+        _, summary = self.refresh(FakeUsers([user(n) for n in range(5)]))
+        self.assertEqual(summary["mode"], "full")
+
+    def test_oldest_first_always_sweeps(self):
+        self.refresh(FakeUsers([user(n) for n in range(5)][::-1]))
+        _, summary = self.refresh(FakeUsers([user(n) for n in range(5)][::-1]))
+        self.assertEqual((summary["mode"], summary["order"]), ("full", "oldest_first"))
+
+    def test_incremental_refresh_leaves_a_sweep_journal_alone(self):
+        self.refresh(FakeUsers([user(n) for n in range(5)]))
+        os.makedirs(os.path.dirname(self.journal("d30-users")))
+        with open(self.journal("d30-users"), "w") as f:
+            f.write('{"cursor": "3", "has_more": true, "users": []}\n')
+        _, summary = self.refresh(FakeUsers([user(n) for n in range(5)]), sweep="d30-users")
+        self.assertEqual(summary["mode"], "incremental")
+        self.assertTrue(os.path.exists(self.journal("d30-users")))
+
+    def test_full_sweep_resumes_from_its_journal(self):
+        users = [user(n) for n in range(7)]
+        os.makedirs(os.path.dirname(self.journal("d30-users")))
+        with open(self.journal("d30-users"), "w") as f:
+            f.write(json.dumps({"cursor": "3", "has_more": True, "users": users[:3]}) + "\n")
+        fake = FakeUsers(users)
+        got, _ = self.refresh(fake, full=True, sweep="d30-users", resume=True)
+        self.assertEqual(fake.pages, 2)   # from cursor 3 on; the first page was journaled
+        self.assertEqual([u["user_id"] for u in got], [f"u{n}" for n in range(7)])
+        self.assertFalse(os.path.exists(self.journal("d30-users")))   # finished
+
+
+if __name__ == "__main__":
+    unittest.main()
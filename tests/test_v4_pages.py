@@ -0,0 +1,66 @@
+"""v4_pages: cursor paging with and without prefetch."""
+import unittest
+from unittest import mock
+
+import support  # noqa: F401  (puts the scripts on sys.path)
+import v4_pages
+
+
+class FakeAPI:
+    """get_page stand-in: `pages` maps cursor (None = first) to a response."""
+
+    def __init__(self, pages: dict):
+        self.pages, self.urls = pages, []
+
+    def __call__(self, api_key, url, retries=5):
+        self.urls.append(url)
+        cursor = url.split("cursor=", 1)[1] if "cursor=" in url else None
+        return self.pages[cursor]
+
+
+def flat(items, nxt):
+    return {"data": items, "nextCursor": nxt}
+
+
+class CursorPagesTest(unittest.TestCase):
+
+    def collect(self, api: FakeAPI, path="/conversations", **kw):
+        with mock.patch.object(v4_pages, "get_page", api):
+            pager = v4_pages.CursorPages("key", path, **kw)
+            return list(pager), pager
+
+    def test_follows_the_cursor_with_and_without_prefetch(self):
+        pages = {None: flat([1, 2], "a b"), "a%20b": flat([3], "c"), "c": flat([4, 5], None)}
+        for prefetch in (True, False):
+            api = FakeAPI(pages)
+            items, pager = self.collect(api, prefetch=prefetch)
+            self.assertEqual(items, [1, 2, 3, 4, 5])
+            self.assertEqual((pager.stats["pages"], pager.stats["items"]), (3, 5))
+            self.assertEqual(api.urls[0], f"{v4_pages.BASE}/conversations?limit={v4_pages.MAX_LIMIT}")
+            self.assertEqual(api.urls[1], f"{v4_pages.BASE}/conversations?limit={v4_pages.MAX_LIMIT}&cursor=a%20b")
+
+    def test_nested_list_and_cursor(self):
+        api = FakeAPI({None: {"data": {"users": [1], "nextCursor": "n"}},
+                       "n": {"data": {"users": [2]}}})
+        items, _ = self.collect(api, "/users?active=1", nested=("users",), limit=500)
+        self.assertEqual(items, [1, 2])
+        self.assertTrue(api.urls[0].endswith("/users?active=1&limit=200"))
+
+    def test_a_repeated_cursor_ends_the_walk(self):
+        api = FakeAPI({None: flat([1], "x"), "x": flat([2], "x")})
+        items, pager = self.collect(api)
+        self.assertEqual(items, [1, 2])
+        self.assertEqual(pager.stats["pages"], 2)
+
+    def test_a_non_list_page_raises(self):
+        with self.assertRaises(ValueError):
+            self.collect(FakeAPI({None: {"data": {"unexpected": 1}}}))
+
+    def test_pages_yields_each_page(self):
+        api = FakeAPI({None: flat([1, 2], "c"), "c": flat([], None)})
+        with mock.patch.object(v4_pages, "get_page", api):
+            self.assertEqual(list(v4_pages.CursorPages("key", "/x").pages()), [[1, 2], []])
+
+
+if __name__ == "__main__":
+    unittest.main()